@@ -0,0 +1,109 @@
+"""
+Benchmark of the rays pruned by an aperture stop in a train of relay lenses.
+
+A simple camera looks at an image through a field lens followed by a train of weak
+relay lenses. An aperture stop right behind the field lens ends the rays hitting its
+ring, so only the rays going through its hole are traced through the relay. Every
+train is traced without the stop and with stops of a shrinking hole, and the script
+prints the tracing times and the lens refractions they took, also relative to the
+train without the stop. Run from the repository root:
+
+    uv run experiments/2026/10/aperture_stop_benchmark.py
+"""
+import time
+
+import numpy as np
+from optics_raytracer import (
+    ApertureStop,
+    ColorTracer,
+    Exporter3D,
+    FloatSize,
+    InsertedImage,
+    IntegerSize,
+    Lens,
+    SimpleCamera,
+)
+
+IMAGE_SIDE = 600
+LENS_COUNTS = [2, 4, 8]
+HOLE_RADII = [None, 0.5, 0.25, 0.1]
+REPEATS = 3
+
+
+def build_scene(lens_count, hole_radius):
+    normal = np.array([0, 0, -1], dtype=np.float32)
+    lenses = [
+        Lens.build(
+            center=np.array([0, 0, -1 - index], dtype=np.float32),
+            radius=1.0,
+            normal=normal,
+            focal_distance=2.0,
+        )
+        for index in range(lens_count)
+    ]
+    objects = [
+        InsertedImage(
+            image_path="examples/assets/image.png",
+            width=4.0,
+            height=3.0,
+            middle_point=np.array([0, 0, -lens_count - 2], dtype=np.float32),
+            normal=normal,
+            u_vector=np.array([1, 0, 0], dtype=np.float32),
+        )
+    ]
+    if hole_radius is not None:
+        objects.append(
+            ApertureStop(
+                center=np.array([0, 0, -1.05], dtype=np.float32),
+                normal=normal,
+                outer_radius=1.0,
+                inner_radius=hole_radius,
+            )
+        )
+    camera = SimpleCamera.build(
+        camera_center=np.array([0, 0, 0], dtype=np.float32),
+        focal_distance=1.0,
+        viewport_size=FloatSize(1, 1),
+        image_size=IntegerSize(IMAGE_SIDE, IMAGE_SIDE),
+        viewport_u_vector=np.array([1, 0, 0], dtype=np.float32),
+        viewport_normal=normal,
+    )
+    return camera, objects, lenses
+
+
+def best_time(function):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    print(
+        f"{'lenses':>6} {'hole':>5} {'time (s)':>9} {'speedup':>8} "
+        f"{'refractions':>12} {'kept':>7}"
+    )
+    for lens_count in LENS_COUNTS:
+        plain_time = plain_refractions = None
+        for hole_radius in HOLE_RADII:
+            camera, objects, lenses = build_scene(lens_count, hole_radius)
+            exporter = Exporter3D()
+            tracer = ColorTracer(
+                exporter, objects, lenses, ray_sampling_rate_for_3d_export=0
+            )
+            rays = camera.get_rays(exporter, 0)
+            trace_time, _ = best_time(lambda: tracer.get_colors(rays))
+            refractions = tracer.refracted_ray_counts.sum()
+            if hole_radius is None:
+                plain_time, plain_refractions = trace_time, refractions
+            print(
+                f"{lens_count:>6} {'none' if hole_radius is None else hole_radius:>5} "
+                f"{trace_time:>9.3f} {plain_time / trace_time:>8.2f} "
+                f"{refractions:>12} {refractions / plain_refractions:>7.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
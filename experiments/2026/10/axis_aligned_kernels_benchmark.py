@@ -0,0 +1,163 @@
+"""
+Equivalence and benchmark of the axis-aligned hit kernels against the general one.
+
+Every scene is packed twice, with the specialized kernels for its axis-aligned
+surfaces and with the general kernel for all of them, and both must give the same
+nearest surface, t and (u, v) for every ray. The scenes are sheets of lenses in
+front of an image, facing along each world axis with both orientations of the (u, v)
+frame, a sheet with some tilted lenses that mixes both kernels, and a sheet large
+enough for the BVH. The plane and rectangle helpers are checked against their
+general formulas too. Run from the repository root:
+
+    uv run experiments/2026/10/axis_aligned_kernels_benchmark.py
+"""
+import time
+
+import numpy as np
+from optics_raytracer import Lens, RayBatch, Rectangle, get_surface_hit_ts
+from optics_raytracer.geometry.rectangle import ColoredRectangle
+from optics_raytracer.scene.bvh import BoundingVolumeHierarchy
+from optics_raytracer.scene.packed_scene import PackedScene
+
+RAY_COUNT = 200_000
+SHEET_SIZE = 4.0
+GRID_SIDES = [1, 2, 4, 8]
+BVH_GRID_SIDE = 16
+REPEATS = 5
+
+
+def get_frame(axis, flip):
+    """Get a normal along the axis and an in-plane u vector, in world coordinates."""
+    normal = np.zeros(3, dtype=np.float32)
+    normal[axis] = -1
+    u_vector = np.zeros(3, dtype=np.float32)
+    u_vector[(axis + 1) % 3] = -1 if flip else 1
+    return normal, u_vector
+
+
+def build_sheet(grid_side, axis, flip, tilt=0.0, **options):
+    normal, u_vector = get_frame(axis, flip)
+    v_vector = np.cross(normal, u_vector)
+    pitch = SHEET_SIZE / grid_side
+    lenses = []
+    for i in range(grid_side):
+        for j in range(grid_side):
+            offsets = (np.array([i, j]) + 0.5) * pitch - SHEET_SIZE / 2
+            lens_normal = normal.copy()
+            if tilt and (i + j) % 2:
+                lens_normal += tilt * u_vector
+            lenses.append(
+                Lens.build(
+                    center=5 * normal + offsets[0] * u_vector + offsets[1] * v_vector,
+                    radius=pitch * 0.45,
+                    normal=lens_normal,
+                    focal_distance=1.0,
+                )
+            )
+    screen = ColoredRectangle(
+        Rectangle.build(
+            middle_point=10 * normal,
+            normal=normal,
+            width=SHEET_SIZE * 3,
+            height=SHEET_SIZE * 2,
+            u_vector=u_vector,
+        ),
+        np.array([1, 1, 1]),
+    )
+    return [
+        PackedScene.build([screen], lenses, axis_aligned_kernels=aligned, **options)
+        for aligned in (True, False)
+    ]
+
+
+def build_rays(axis):
+    rng = np.random.default_rng(axis)
+    targets = rng.uniform(-SHEET_SIZE, SHEET_SIZE, (RAY_COUNT, 3)).astype(np.float32)
+    targets[:, axis] = -5
+    directions = targets / np.linalg.norm(targets, axis=1, keepdims=True)
+    origins = rng.uniform(-0.5, 0.5, (RAY_COUNT, 3)).astype(np.float32)
+    return RayBatch(origins, directions)
+
+
+def best_time(function):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def check_hits(name, aligned_hits, general_hits):
+    aligned_indices, aligned_ts, aligned_uvs = aligned_hits
+    general_indices, general_ts, general_uvs = general_hits
+    # The (u, v) of misses are meaningless
+    hits = general_indices >= 0
+    if not (
+        np.array_equal(aligned_indices, general_indices)
+        and np.array_equal(aligned_ts, general_ts)
+        and np.array_equal(aligned_uvs[hits], general_uvs[hits])
+    ):
+        raise AssertionError(f"{name}: the kernels disagree")
+
+
+def check_helpers(rays):
+    normal, u_vector = get_frame(2, flip=True)
+    point = np.array([0.1, -0.2, -5], dtype=np.float32)
+    ts = get_surface_hit_ts(rays, point, normal)
+    general_ts = np.divide(
+        np.matvec(point - rays.origins, normal), np.matvec(rays.directions, normal)
+    )
+    general_ts[(general_ts < 1e-6) | (general_ts > 100000)] = np.inf
+    if not np.array_equal(ts, general_ts):
+        raise AssertionError("get_surface_hit_ts disagrees with the general formula")
+
+    rectangle = Rectangle.build(point, normal, 1.5, 0.5, u_vector)
+    points = rays.origins + np.nan_to_num(ts, posinf=0)[:, np.newaxis] * rays.directions
+    offsets = points - point
+    v_vector = np.cross(normal, u_vector)
+    general_inside = (np.abs(offsets @ u_vector) <= 0.75) & (
+        np.abs(offsets @ v_vector) <= 0.25
+    )
+    if not np.array_equal(Rectangle.get_hits_mask(rectangle.array, points), general_inside):
+        raise AssertionError("Rectangle.get_hits_mask disagrees with the general formula")
+
+
+def main():
+    print(f"{'scene':>24} {'surfaces':>8} {'aligned (s)':>12} {'general (s)':>12} {'speedup':>8}")
+    cases = [
+        (f"axis {axis}{' flipped' if flip else ''}", grid_side, axis, flip, {})
+        for axis in range(3)
+        for flip in (False, True)
+        for grid_side in GRID_SIDES
+    ]
+    cases.append(("half tilted", 4, 2, False, {"tilt": 0.1}))
+    for name, grid_side, axis, flip, options in cases:
+        rays = build_rays(axis)
+        aligned_scene, general_scene = build_sheet(grid_side, axis, flip, **options)
+        aligned_time, aligned_hits = best_time(lambda: aligned_scene.nearest_hit(rays))
+        general_time, general_hits = best_time(lambda: general_scene.nearest_hit(rays))
+        check_hits(name, aligned_hits, general_hits)
+        print(
+            f"{name:>24} {len(aligned_scene):>8} {aligned_time:>12.4f} "
+            f"{general_time:>12.4f} {general_time / aligned_time:>8.2f}"
+        )
+
+    rays = build_rays(2)
+    aligned_bvh, general_bvh = (
+        BoundingVolumeHierarchy.build(scene) for scene in build_sheet(BVH_GRID_SIDE, 2, False)
+    )
+    aligned_time, aligned_hits = best_time(lambda: aligned_bvh.nearest_hit(rays))
+    general_time, general_hits = best_time(lambda: general_bvh.nearest_hit(rays))
+    check_hits("bvh", aligned_hits, general_hits)
+    print(
+        f"{'bvh':>24} {len(aligned_bvh):>8} {aligned_time:>12.4f} "
+        f"{general_time:>12.4f} {general_time / aligned_time:>8.2f}"
+    )
+
+    check_helpers(rays)
+    print("Both kernels agree on every hit")
+
+
+if __name__ == "__main__":
+    main()
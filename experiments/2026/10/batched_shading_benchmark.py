@@ -0,0 +1,114 @@
+"""
+Benchmark of the shading batched by object type.
+
+The scene is a wall of GRID_SIDE x GRID_SIDE colored rectangles and colored circles
+seen by a simple camera. The primary rays are intersected once with the packed
+scene of the objects, then shaded object by object with get_colors_at_uv and type
+by type with the shade call of every registered type. The script prints the
+number of shading calls and the best time of REPEATS of each way, and whether the
+colors agree. Run from the repository root:
+
+    uv run experiments/2026/10/batched_shading_benchmark.py
+"""
+import time
+
+import numpy as np
+from optics_raytracer import (
+    Circle,
+    ColorTracer,
+    Exporter3D,
+    FloatSize,
+    IntegerSize,
+    Rectangle,
+    SimpleCamera,
+)
+from optics_raytracer.core.grouping import group_by_index
+from optics_raytracer.geometry.circle import ColoredCircle
+from optics_raytracer.geometry.rectangle import ColoredRectangle
+from optics_raytracer.scene.packed_scene import PackedScene
+
+WALL_SIZE = 4.0
+GRID_SIDE = 32
+IMAGE_SIDE = 800
+REPEATS = 5
+
+
+def build_objects():
+    pitch = WALL_SIZE / GRID_SIDE
+    normal = np.array([0, 0, -1], dtype=np.float32)
+    rng = np.random.default_rng(0)
+    objects = []
+    for i in range(GRID_SIDE):
+        for j in range(GRID_SIDE):
+            center = np.array(
+                [(i + 0.5) * pitch - WALL_SIZE / 2, (j + 0.5) * pitch - WALL_SIZE / 2, -5],
+                dtype=np.float32,
+            )
+            color = rng.random(3)
+            if (i + j) % 2:
+                objects.append(
+                    ColoredCircle(Circle.build(center, pitch * 0.45, normal), color)
+                )
+            else:
+                rectangle = Rectangle.build(
+                    middle_point=center,
+                    normal=normal,
+                    width=pitch * 0.9,
+                    height=pitch * 0.9,
+                    u_vector=np.array([1, 0, 0], dtype=np.float32),
+                )
+                objects.append(ColoredRectangle(rectangle, color))
+    return objects
+
+
+def shade_per_object(objects, uvs, ids):
+    colors = np.empty((len(uvs), 3), dtype=uvs.dtype)
+    order, offsets = group_by_index(ids, len(objects))
+    calls = 0
+    for index in np.flatnonzero(np.diff(offsets)):
+        group = order[offsets[index] : offsets[index + 1]]
+        colors[group] = objects[index].get_colors_at_uv(uvs[group])
+        calls += 1
+    return colors, calls
+
+
+def best_time(function):
+    best = np.inf
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    objects = build_objects()
+    camera = SimpleCamera.build(
+        camera_center=np.array([0, 0, 0], dtype=np.float32),
+        focal_distance=1.0,
+        viewport_size=FloatSize(1, 1),
+        image_size=IntegerSize(IMAGE_SIDE, IMAGE_SIDE),
+        viewport_u_vector=np.array([1, 0, 0], dtype=np.float32),
+        viewport_normal=np.array([0, 0, -1], dtype=np.float32),
+    )
+    rays = camera.get_rays(Exporter3D(), 0)
+    tracer = ColorTracer(
+        Exporter3D(), objects, [], ray_sampling_rate_for_3d_export=0
+    )
+    # Without lenses the surface indices are the object indices
+    ids, _, uvs = PackedScene.build(objects, []).nearest_hit(rays)
+    uvs, ids = uvs[ids >= 0], ids[ids >= 0]
+    print(f"{len(objects)} objects, {len(ids)} of {len(rays)} rays hit one")
+
+    per_object_time, (per_object_colors, calls) = best_time(
+        lambda: shade_per_object(objects, uvs, ids)
+    )
+    batched_time, batched_colors = best_time(lambda: tracer.shade_objects(ids, uvs))
+    print(f"{'shading':<11} {'calls':>6} {'time':>8}")
+    print(f"{'per object':<11} {calls:>6} {per_object_time:>7.4f}s")
+    print(f"{'per type':<11} {len(tracer.object_groups):>6} {batched_time:>7.4f}s")
+    print(f"same colors {np.array_equal(per_object_colors, batched_colors)}")
+
+
+if __name__ == "__main__":
+    main()
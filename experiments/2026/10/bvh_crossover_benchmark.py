@@ -0,0 +1,89 @@
+"""
+Benchmark of the nearest-hit query: brute-force PackedScene pass against the BVH.
+
+The scene is a square sheet of small lenses in front of a large image, the layout of
+a microlens sheet or an image mosaic. Run from the repository root:
+
+    uv run experiments/2026/10/bvh_crossover_benchmark.py
+"""
+import time
+
+import numpy as np
+from optics_raytracer import Lens, Rectangle, build_rays
+from optics_raytracer.geometry.rectangle import ColoredRectangle
+from optics_raytracer.scene.bvh import BoundingVolumeHierarchy
+from optics_raytracer.scene.packed_scene import PackedScene
+
+RAY_COUNT = 200_000
+SHEET_SIZE = 4.0
+GRID_SIDES = [1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64]
+REPEATS = 3
+
+
+def build_scene(grid_side):
+    pitch = SHEET_SIZE / grid_side
+    lenses = [
+        Lens.build(
+            center=np.array(
+                [(i + 0.5) * pitch - SHEET_SIZE / 2, (j + 0.5) * pitch - SHEET_SIZE / 2, -5],
+                dtype=np.float32,
+            ),
+            radius=pitch * 0.45,
+            normal=np.array([0, 0, -1], dtype=np.float32),
+            focal_distance=1.0,
+        )
+        for i in range(grid_side)
+        for j in range(grid_side)
+    ]
+    screen = ColoredRectangle(
+        Rectangle.build(
+            middle_point=np.array([0, 0, -10], dtype=np.float32),
+            normal=np.array([0, 0, -1], dtype=np.float32),
+            width=SHEET_SIZE * 3,
+            height=SHEET_SIZE * 3,
+            u_vector=np.array([1, 0, 0], dtype=np.float32),
+        ),
+        np.array([1, 1, 1]),
+    )
+    return PackedScene.build([screen], lenses)
+
+
+def build_camera_rays():
+    rng = np.random.default_rng(0)
+    targets = np.column_stack(
+        [
+            rng.uniform(-SHEET_SIZE / 2, SHEET_SIZE / 2, RAY_COUNT),
+            rng.uniform(-SHEET_SIZE / 2, SHEET_SIZE / 2, RAY_COUNT),
+            np.full(RAY_COUNT, -5.0),
+        ]
+    ).astype(np.float32)
+    directions = targets / np.linalg.norm(targets, axis=1, keepdims=True)
+    return build_rays(np.zeros_like(directions), directions)
+
+
+def best_time(function):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+rays = build_camera_rays()
+crossover = None
+print(f"{'surfaces':>8} {'brute (s)':>10} {'bvh (s)':>10} {'build (s)':>10} {'speedup':>8}")
+for grid_side in GRID_SIDES:
+    scene = build_scene(grid_side)
+    build_time, bvh = best_time(lambda: BoundingVolumeHierarchy.build(scene))
+    brute_time, (brute_indices, _, _) = best_time(lambda: scene.nearest_hit(rays))
+    bvh_time, (bvh_indices, _, _) = best_time(lambda: bvh.nearest_hit(rays))
+    if not np.array_equal(brute_indices, bvh_indices):
+        raise AssertionError(f"BVH disagrees with the brute-force pass for {len(scene)} surfaces")
+
+    speedup = brute_time / bvh_time
+    if crossover is None and speedup > 1:
+        crossover = len(scene)
+    print(f"{len(scene):>8} {brute_time:>10.4f} {bvh_time:>10.4f} {build_time:>10.4f} {speedup:>8.2f}")
+
+print(f"BVH is faster from {crossover} surfaces on")
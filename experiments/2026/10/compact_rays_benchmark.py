@@ -0,0 +1,86 @@
+"""
+Benchmark of the compact ray storage on a many-sample eye camera render.
+
+The eye camera scenario is rendered with RAYS_PER_CIRCLE rays on each of
+NUMBER_OF_CIRCLES lens circles per pixel, once with the full precision camera rays
+and once with compact rays. The script prints the peak memory allocated during each
+render (numpy buffers included, through tracemalloc), the render time and the pixel
+deviation of the compact render from the full one. Before that, the compact rays of
+the eye camera and of an orthographic camera are decoded and compared with their full
+precision rays, for unit and non-unit viewport u vectors, and the script prints the
+largest origin and direction errors. Run from the repository root:
+
+    uv run experiments/2026/10/compact_rays_benchmark.py
+"""
+import json
+import time
+import tracemalloc
+
+import numpy as np
+from optics_raytracer import Exporter3D, parse_config
+
+SCENARIO = "examples/scenarios/eye_like_camera/test_with_eye_camera.json"
+NUMBER_OF_CIRCLES = 4
+RAYS_PER_CIRCLE = 16
+U_VECTORS = [[1, 0, 0], [2, 0, 0], [1, 1, 0]]
+
+
+def render(config, compact_rays):
+    engine = parse_config(dict(config, ray_sampling_rate=0.0, compact_rays=compact_rays))
+    tracemalloc.start()
+    start = time.perf_counter()
+    image = np.asarray(engine.render(), dtype=np.int16)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return image, elapsed, peak
+
+
+def check_round_trip(config):
+    print(
+        f"{'camera':<13} {'u vector':<10} {'origin error':>13} "
+        f"{'direction error':>16}"
+    )
+    orthographic = dict(config["camera"], type="orthographic")
+    for camera_config in (config["camera"], orthographic):
+        for u_vector in U_VECTORS:
+            camera_config = dict(camera_config, u_vector=u_vector)
+            engine = parse_config(dict(config, camera=camera_config))
+            rays = engine.camera.get_rays(Exporter3D(), 0)
+            compact_rays = engine.camera.get_compact_rays(Exporter3D(), 0, 1 << 16)
+            decoded = compact_rays.decode(0, len(compact_rays))
+            origin_error = np.abs(decoded["origin"] - rays["origin"]).max()
+            direction_error = np.abs(decoded["direction"] - rays["direction"]).max()
+            print(
+                f"{camera_config['type']:<13} {str(u_vector):<10} "
+                f"{origin_error:>13.2e} {direction_error:>16.2e}"
+            )
+
+
+def main():
+    with open(SCENARIO) as f:
+        config = json.load(f)
+    check_round_trip(config)
+    config["camera"].update(
+        number_of_circles=NUMBER_OF_CIRCLES, rays_per_circle=RAYS_PER_CIRCLE
+    )
+    width, height = config["camera"]["image_size"]
+    print(f"{width * height * NUMBER_OF_CIRCLES * RAYS_PER_CIRCLE} camera rays")
+    print(f"{'storage':<8} {'peak memory':>12} {'time':>8}")
+    images = []
+    for compact_rays in (False, True):
+        image, elapsed, peak = render(config, compact_rays)
+        images.append(image)
+        print(
+            f"{'compact' if compact_rays else 'full':<8} "
+            f"{peak / 2**20:>9.0f} MB {elapsed:>7.2f}s"
+        )
+    deviation = np.abs(images[0] - images[1]).max(axis=2)
+    print(
+        f"max deviation {deviation.max()}, pixels deviating by more than 2: "
+        f"{(deviation > 2).mean():.4%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
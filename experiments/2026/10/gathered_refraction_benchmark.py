@@ -0,0 +1,105 @@
+"""
+Benchmark of the gathered lens refraction against one refraction call per lens.
+
+Waves of rays hit a sheet of lenses, spread evenly over them and sorted by lens like
+in the tracer. They are refracted once lens by lens, through Lens.get_new_directions
+on the slice of every lens, and once in a single PackedLenses.get_new_directions pass
+gathering the lens of every ray. The lenses of the sheet are either parallel or
+every other one is tilted, so the normals have to be gathered too. The script prints
+both times and the largest difference between the directions for every wave size
+and lens count. Run from the repository root:
+
+    uv run experiments/2026/10/gathered_refraction_benchmark.py
+"""
+import time
+
+import numpy as np
+from optics_raytracer import Lens
+from optics_raytracer.optics.packed_lenses import PackedLenses
+
+RAY_COUNTS = [10_000, 100_000, 1_000_000]
+SHEET_SIZE = 4.0
+GRID_SIDES = [1, 4, 8, 16]
+REPEATS = 5
+
+
+def build_lenses(grid_side, tilted):
+    pitch = SHEET_SIZE / grid_side
+    return [
+        Lens.build(
+            center=np.array(
+                [(i + 0.5) * pitch - SHEET_SIZE / 2, (j + 0.5) * pitch - SHEET_SIZE / 2, -5],
+                dtype=np.float32,
+            ),
+            radius=pitch * 0.45,
+            normal=np.array(
+                [0.1 * tilted * ((i + j) % 2), 0, -1], dtype=np.float32
+            ),
+            focal_distance=1.0 + 0.1 * (i + j),
+        )
+        for i in range(grid_side)
+        for j in range(grid_side)
+    ]
+
+
+def build_hits(lenses, ray_count):
+    rng = np.random.default_rng(0)
+    lens_indices = np.sort(rng.integers(0, len(lenses), ray_count))
+    centers = np.array([lens.center for lens in lenses], dtype=np.float32)
+    radii = np.array([lens.array["radius"] for lens in lenses], dtype=np.float32)
+    offsets = rng.uniform(-0.7, 0.7, (ray_count, 3)).astype(np.float32)
+    offsets[:, 2] = 0
+    hit_points = centers[lens_indices] + offsets * radii[lens_indices, np.newaxis]
+    directions = hit_points / np.linalg.norm(hit_points, axis=1, keepdims=True)
+    return directions, hit_points, lens_indices
+
+
+def refract_per_lens(lenses, directions, hit_points, lens_indices):
+    new_directions = np.empty_like(directions)
+    offsets = np.searchsorted(lens_indices, np.arange(len(lenses) + 1))
+    for lens_index, lens in enumerate(lenses):
+        group = slice(offsets[lens_index], offsets[lens_index + 1])
+        lens.get_new_directions(
+            directions[group], hit_points[group], out=new_directions[group]
+        )
+    return new_directions
+
+
+def best_time(function):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    print(
+        f"{'rays':>9} {'normals':>8} {'lenses':>6} {'per lens (s)':>13} "
+        f"{'gathered (s)':>13} {'speedup':>8} {'max difference':>15}"
+    )
+    for ray_count in RAY_COUNTS:
+        for tilted in (False, True):
+            for grid_side in GRID_SIDES:
+                lenses = build_lenses(grid_side, tilted)
+                packed_lenses = PackedLenses.build(lenses)
+                directions, hit_points, lens_indices = build_hits(lenses, ray_count)
+                per_lens_time, per_lens_directions = best_time(
+                    lambda: refract_per_lens(lenses, directions, hit_points, lens_indices)
+                )
+                gathered_time, gathered_directions = best_time(
+                    lambda: packed_lenses.get_new_directions(
+                        directions, hit_points, lens_indices
+                    )
+                )
+                difference = np.abs(gathered_directions - per_lens_directions).max()
+                print(
+                    f"{ray_count:>9} {'tilted' if tilted else 'parallel':>8} "
+                    f"{len(lenses):>6} {per_lens_time:>13.4f} {gathered_time:>13.4f} "
+                    f"{per_lens_time / gathered_time:>8.2f} {difference:>15.2e}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Check and benchmark of the LensArray primitive against separate lenses.
+
+A square microlens array with varying focal distances sits in front of a large
+image, seen by a simple camera. Each grid size is rendered once with the array and,
+up to MAX_SEPARATE_SIDE, once with the same cells as separate Lens entries. The script
+prints both render times and the pixel deviations between the images. Run from the
+repository root:
+
+    uv run experiments/2026/10/lens_array_check.py
+"""
+import time
+
+import numpy as np
+from optics_raytracer import (
+    FloatSize,
+    IntegerSize,
+    Lens,
+    LensArray,
+    OpticsRayTracingEngine,
+    Rectangle,
+    SimpleCamera,
+)
+from optics_raytracer.geometry.rectangle import ColoredRectangle
+
+SHEET_SIZE = 4.0
+GRID_SIDES = [4, 16, 32, 100]
+MAX_SEPARATE_SIDE = 32
+
+
+def build_lens_array(grid_side):
+    pitch = SHEET_SIZE / grid_side
+    rows, columns = np.indices((grid_side, grid_side))
+    return LensArray.build(
+        middle_point=np.array([0, 0, -5], dtype=np.float32),
+        normal=np.array([0, 0, -1], dtype=np.float32),
+        u_vector=np.array([1, 0, 0], dtype=np.float32),
+        pitch=pitch,
+        cell_radius=pitch * 0.45,
+        columns=grid_side,
+        rows=grid_side,
+        focal_distances=0.8 + 0.4 * (rows + columns) / (2 * grid_side),
+    )
+
+
+def get_separate_lenses(lens_array):
+    lenses = []
+    for row in range(lens_array.rows):
+        for column in range(lens_array.columns):
+            offset = (
+                (column + 0.5 - lens_array.columns / 2) * lens_array.u_vector
+                + (row + 0.5 - lens_array.rows / 2) * lens_array.v_vector
+            ) * lens_array.pitch
+            lenses.append(
+                Lens.build(
+                    center=lens_array.middle_point + offset,
+                    radius=lens_array.cell_radius,
+                    normal=lens_array.normal,
+                    focal_distance=lens_array.focal_distances[row, column],
+                )
+            )
+    return lenses
+
+
+def render(lenses):
+    screen = ColoredRectangle(
+        Rectangle.build(
+            middle_point=np.array([0, 0, -10], dtype=np.float32),
+            normal=np.array([0, 0, -1], dtype=np.float32),
+            width=SHEET_SIZE * 3,
+            height=SHEET_SIZE * 3,
+            u_vector=np.array([1, 0, 0], dtype=np.float32),
+        ),
+        np.array([1, 1, 1]),
+    )
+    camera = SimpleCamera.build(
+        camera_center=np.array([0, 0, 0], dtype=np.float32),
+        focal_distance=1.0,
+        viewport_size=FloatSize(1, 1),
+        image_size=IntegerSize(400, 400),
+        viewport_u_vector=np.array([1, 0, 0], dtype=np.float32),
+        viewport_normal=np.array([0, 0, -1], dtype=np.float32),
+    )
+    engine = OpticsRayTracingEngine(
+        camera, [screen], lenses, ray_sampling_rate_for_3d_export=0
+    )
+    start = time.perf_counter()
+    image = np.asarray(engine.render(), dtype=np.int16)
+    return image, time.perf_counter() - start
+
+
+def main():
+    for grid_side in GRID_SIDES:
+        lens_array = build_lens_array(grid_side)
+        array_image, array_time = render([lens_array])
+        if grid_side > MAX_SEPARATE_SIDE:
+            print(f"cells={grid_side**2:6d}  array {array_time:6.3f}s")
+            continue
+        separate_image, separate_time = render(get_separate_lenses(lens_array))
+        deviation = np.abs(array_image - separate_image).max(axis=2)
+        print(
+            f"cells={grid_side**2:6d}  array {array_time:6.3f}s  "
+            f"separate {separate_time:6.3f}s  max diff {deviation.max():3d}  "
+            f"pixels >2 {(deviation > 2).mean():.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark of the culling of the rays leaving a lens towards no other surface.
+
+The scene is a single strong lens in front of a small image, seen by a simple camera
+at a growing resolution. Most of the rays refracted by the lens spread past the
+image, so their final nearest-hit pass can be skipped. Every resolution is rendered
+with and without culling, and the script prints the render times, the fraction of
+refracted rays culled and whether the images match. Run from the repository root:
+
+    uv run experiments/2026/10/lens_culling_benchmark.py
+"""
+import time
+
+import numpy as np
+from optics_raytracer import (
+    FloatSize,
+    IntegerSize,
+    Lens,
+    OpticsRayTracingEngine,
+    Rectangle,
+    SimpleCamera,
+)
+from optics_raytracer.geometry.rectangle import ColoredRectangle
+
+IMAGE_SIDES = [200, 400, 800]
+
+
+def build_engine(image_side, cull_escaping_rays):
+    lens = Lens.build(
+        center=np.array([0, 0, -2], dtype=np.float32),
+        radius=1.0,
+        normal=np.array([0, 0, -1], dtype=np.float32),
+        focal_distance=0.5,
+    )
+    screen = ColoredRectangle(
+        Rectangle.build(
+            middle_point=np.array([0, 0, -6], dtype=np.float32),
+            normal=np.array([0, 0, -1], dtype=np.float32),
+            width=1.0,
+            height=1.0,
+            u_vector=np.array([1, 0, 0], dtype=np.float32),
+        ),
+        np.array([1, 1, 1]),
+    )
+    camera = SimpleCamera.build(
+        camera_center=np.array([0, 0, 0], dtype=np.float32),
+        focal_distance=1.0,
+        viewport_size=FloatSize(1, 1),
+        image_size=IntegerSize(image_side, image_side),
+        viewport_u_vector=np.array([1, 0, 0], dtype=np.float32),
+        viewport_normal=np.array([0, 0, -1], dtype=np.float32),
+    )
+    return OpticsRayTracingEngine(
+        camera,
+        [screen],
+        [lens],
+        ray_sampling_rate_for_3d_export=0,
+        cull_escaping_rays=cull_escaping_rays,
+    )
+
+
+def main():
+    for image_side in IMAGE_SIDES:
+        images = []
+        times = []
+        for cull_escaping_rays in (False, True):
+            engine = build_engine(image_side, cull_escaping_rays)
+            start = time.perf_counter()
+            images.append(np.asarray(engine.render()))
+            times.append(time.perf_counter() - start)
+        culled = engine.culled_ray_fractions[0]
+        print(
+            f"image={image_side:4d}  plain {times[0]:6.3f}s  culled {times[1]:6.3f}s  "
+            f"culled rays {culled:6.1%}  same image {np.array_equal(*images)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark of the lens visibility graph on sheets of side-by-side relays.
+
+A simple camera looks through a square grid of relay channels, every channel a stack
+of weak lenses one unit apart, at an image behind the last sheet. The rays leaving
+a lens can only reach the next lenses of their own channel and of a few neighbouring
+ones, so with the visibility graph they are tested against a small part of the scene
+instead of every lens. The camera rays of every grid are traced with and without
+the graph, and the script prints the surface count, the mean fraction of the scene
+kept by the lens exits, the time taken to build the graph, both tracing times and
+whether the colors match. Run from the repository root:
+
+    uv run experiments/2026/10/lens_visibility_benchmark.py
+"""
+import time
+
+import numpy as np
+from optics_raytracer import (
+    ColorTracer,
+    Exporter3D,
+    FloatSize,
+    InsertedImage,
+    IntegerSize,
+    Lens,
+    SimpleCamera,
+)
+from optics_raytracer.scene.lens_visibility import LensVisibility
+
+IMAGE_SIDE = 400
+SHEET_SIZE = 6.0
+FIRST_SHEET_DISTANCE = 4.0
+CASES = [(4, 2), (8, 2), (8, 4), (16, 4), (16, 8)]
+REPEATS = 3
+
+
+def build_scene(grid_side, stages):
+    normal = np.array([0, 0, -1], dtype=np.float32)
+    pitch = SHEET_SIZE / grid_side
+    lenses = [
+        Lens.build(
+            center=np.array(
+                [
+                    (i + 0.5) * pitch - SHEET_SIZE / 2,
+                    (j + 0.5) * pitch - SHEET_SIZE / 2,
+                    -FIRST_SHEET_DISTANCE - stage,
+                ],
+                dtype=np.float32,
+            ),
+            radius=pitch * 0.45,
+            normal=normal,
+            focal_distance=4.0,
+        )
+        for stage in range(stages)
+        for i in range(grid_side)
+        for j in range(grid_side)
+    ]
+    image = InsertedImage(
+        image_path="examples/assets/image.png",
+        width=SHEET_SIZE * 2,
+        height=SHEET_SIZE * 1.5,
+        middle_point=np.array(
+            [0, 0, -FIRST_SHEET_DISTANCE - stages - 2], dtype=np.float32
+        ),
+        normal=normal,
+        u_vector=np.array([1, 0, 0], dtype=np.float32),
+    )
+    camera = SimpleCamera.build(
+        camera_center=np.array([0, 0, 0], dtype=np.float32),
+        focal_distance=1.0,
+        viewport_size=FloatSize(1, 1),
+        image_size=IntegerSize(IMAGE_SIDE, IMAGE_SIDE),
+        viewport_u_vector=np.array([1, 0, 0], dtype=np.float32),
+        viewport_normal=normal,
+    )
+    return camera, [image], lenses
+
+
+def best_time(function):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    print(
+        f"{'grid':>5} {'stages':>6} {'surfaces':>8} {'kept':>7} {'build (s)':>10} "
+        f"{'plain (s)':>10} {'visible (s)':>12} {'speedup':>8} {'same colors':>12}"
+    )
+    for grid_side, stages in CASES:
+        camera, objects, lenses = build_scene(grid_side, stages)
+        exporter = Exporter3D()
+        tracer = ColorTracer(
+            exporter, objects, lenses, ray_sampling_rate_for_3d_export=0
+        )
+        rays = camera.get_rays(exporter, 0)
+        build_time, visibility = best_time(
+            lambda: LensVisibility.build(tracer.scene, lenses, rays)
+        )
+        plain_time, plain_colors = best_time(lambda: tracer.get_colors(rays).copy())
+        visible_time, visible_colors = best_time(
+            lambda: tracer.get_colors(rays, lens_visibility=visibility).copy()
+        )
+        print(
+            f"{grid_side:>5} {stages:>6} {len(tracer.scene):>8} "
+            f"{visibility.candidate_fraction:>7.1%} {build_time:>10.3f} "
+            f"{plain_time:>10.3f} {visible_time:>12.3f} "
+            f"{plain_time / visible_time:>8.2f} "
+            f"{np.array_equal(plain_colors, visible_colors)!s:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
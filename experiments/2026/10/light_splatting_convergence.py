@@ -0,0 +1,139 @@
+"""
+Convergence of the forward light splatting against backward sampling.
+
+A projector: a SOURCE_SIZE texel image at the origin, one lens and a screen. The
+screen image is computed forward, splatting rays emitted by the texels, and
+backward, tracing rays from the screen pixels in a cone towards the lens and
+averaging the source colors they reach. For every ray budget the script prints the
+relative RMS error of each method against its own reference render with
+REFERENCE_BUDGET rays, and the time it took. Run from the repository root:
+
+    uv run experiments/2026/10/light_splatting_convergence.py
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+from optics_raytracer import (
+    ColorTracer,
+    Exporter3D,
+    InsertedImage,
+    IntegerSize,
+    Lens,
+    RayBatch,
+    Rectangle,
+)
+from optics_raytracer.rendering.light_splatter import LightSplatter
+
+SOURCE_IMAGE = "examples/assets/image.png"
+SOURCE_SIZE = (160, 120)
+SCREEN_SIDE = 100
+SCREEN_WIDTH = 3.5
+CONE_ANGLE = 25.0
+BUDGETS = [80_000, 320_000, 1_280_000]
+REFERENCE_BUDGET = 20_000_000
+
+
+def build_scene(source_path):
+    normal = np.array([0, 0, -1], dtype=np.float32)
+    source = InsertedImage(
+        image_path=source_path,
+        width=1.0,
+        height=0.75,
+        middle_point=np.array([0, 0, 0], dtype=np.float32),
+        normal=normal,
+        u_vector=np.array([1, 0, 0], dtype=np.float32),
+    )
+    lens = Lens.build(
+        center=np.array([0, 0, -2], dtype=np.float32),
+        radius=0.8,
+        normal=normal,
+        focal_distance=1.5,
+    )
+    screen = Rectangle.build(
+        middle_point=np.array([0, 0, -8], dtype=np.float32),
+        normal=normal,
+        width=SCREEN_WIDTH,
+        height=SCREEN_WIDTH,
+        u_vector=np.array([-1, 0, 0], dtype=np.float32),
+    )
+    return source, [lens], screen
+
+
+def render_forward(source, lenses, screen, budget):
+    texels = source.pixels.shape[0] * source.pixels.shape[1]
+    splatter = LightSplatter(
+        source,
+        lenses,
+        screen,
+        IntegerSize(SCREEN_SIDE, SCREEN_SIDE),
+        rays_per_texel=max(budget // texels, 1),
+        emission_angle=CONE_ANGLE,
+    )
+    return splatter.splat()
+
+
+def render_backward(source, lenses, screen, budget):
+    rays_per_pixel = max(budget // SCREEN_SIDE**2, 1)
+    tracer = ColorTracer(
+        Exporter3D(), [source], lenses, ray_sampling_rate_for_3d_export=0
+    )
+    rng = np.random.default_rng(0)
+    u_vector = screen.u_vector / np.linalg.norm(screen.u_vector)
+    basis = np.array([u_vector, np.cross(screen.normal, u_vector), -screen.normal])
+    pixels = np.repeat(np.arange(SCREEN_SIDE**2), rays_per_pixel)
+    image = np.zeros((SCREEN_SIDE**2, 3))
+    for block in np.array_split(pixels, max(len(pixels) // (1 << 20), 1)):
+        rows, columns = np.divmod(block, SCREEN_SIDE)
+        samples = rng.random((len(block), 4))
+        u = ((columns + samples[:, 0]) / SCREEN_SIDE - 0.5) * SCREEN_WIDTH
+        v = (0.5 - (rows + samples[:, 1]) / SCREEN_SIDE) * SCREEN_WIDTH
+        origins = screen.middle_point + np.column_stack([u, v]) @ basis[:2]
+        cos_thetas = 1 - samples[:, 2] * (1 - np.cos(np.radians(CONE_ANGLE)))
+        sin_thetas = np.sqrt(1 - cos_thetas**2)
+        phis = 2 * np.pi * samples[:, 3]
+        directions = (
+            np.column_stack(
+                [sin_thetas * np.cos(phis), sin_thetas * np.sin(phis), cos_thetas]
+            )
+            @ basis
+        )
+        colors = tracer.get_colors(RayBatch(origins, directions))
+        for channel in range(3):
+            image[:, channel] += np.bincount(
+                block, weights=colors[:, channel], minlength=len(image)
+            )
+    return (image / rays_per_pixel).reshape(SCREEN_SIDE, SCREEN_SIDE, 3)
+
+
+def get_error(image, reference):
+    return np.sqrt(np.mean((image - reference) ** 2)) / np.mean(reference)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "source.png")
+        Image.open(SOURCE_IMAGE).convert("RGB").resize(SOURCE_SIZE).save(source_path)
+        source, lenses, screen = build_scene(source_path)
+
+    methods = {"forward": render_forward, "backward": render_backward}
+    references = {
+        name: render(source, lenses, screen, REFERENCE_BUDGET)
+        for name, render in methods.items()
+    }
+    header = "".join(f"{name + ' error':>16} {'time':>7}" for name in methods)
+    print(f"{'rays':>10}{header}")
+    for budget in BUDGETS:
+        row = f"{budget:>10}"
+        for name, render in methods.items():
+            start = time.perf_counter()
+            image = render(source, lenses, screen, budget)
+            elapsed = time.perf_counter() - start
+            row += f"{get_error(image, references[name]):>16.4f} {elapsed:>6.2f}s"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Focal length sweep of the microscope example with the paraxial ray-transfer matrices.
+
+For every candidate eyepiece focal distance the train matrices are rebuilt and all
+camera rays are mapped to the object plane, reporting the fraction of rays that clear
+the apertures and the spread of their landing points. Run from the repository root:
+
+    uv run experiments/2026/10/paraxial_focal_sweep.py
+"""
+import json
+import time
+
+import numpy as np
+from optics_raytracer import Lens, parse_config
+from optics_raytracer.scene.optical_train import OpticalTrain
+from optics_raytracer.scene.paraxial_train import ParaxialTrain, get_propagation_matrix
+
+CONFIG_PATH = "examples/scenarios/microscope/microscope.json"
+FOCAL_DISTANCES = np.linspace(0.1, 0.4, 31)
+
+
+def main():
+    with open(CONFIG_PATH) as f:
+        engine = parse_config(json.load(f))
+    rays = engine.camera.get_rays(engine.exporter, 0)
+    eyepiece = engine.lenses[0]
+    image = engine.objects[0]
+
+    total_start = time.perf_counter()
+    for focal_distance in FOCAL_DISTANCES:
+        start = time.perf_counter()
+        engine.lenses[0] = Lens.build(
+            eyepiece.center, eyepiece.array["radius"], eyepiece.normal, focal_distance
+        )
+        train = OpticalTrain.build(engine.objects, engine.lenses)
+        paraxial_train = ParaxialTrain.build(train)
+        states = paraxial_train.get_entry_states(
+            train.to_local(rays["origin"]), train.to_local(rays["direction"])
+        )
+        _, exit_states, cleared = paraxial_train.trace(states)
+
+        # Free flight from the last lens to the image plane
+        image_position = np.dot(image.rectangle.array["middle_point"], train.axis)
+        landing = exit_states[cleared] @ get_propagation_matrix(
+            image_position - train.positions[-1]
+        ).T
+        spread = np.ptp(landing[:, 0]) if len(landing) else 0.0
+        elapsed = time.perf_counter() - start
+        print(
+            f"f={focal_distance:.3f}  cleared {cleared.mean():6.1%}  "
+            f"landing spread {spread:8.4f}  {elapsed * 1000:6.1f} ms"
+        )
+    print(f"{len(FOCAL_DISTANCES)} designs in {time.perf_counter() - total_start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Check of the float32 and float64 precision modes of the tracer.
+
+Every example scenario is rendered in both precisions with a workspace. The script
+asserts that every floating workspace buffer, every nearest-hit result, every
+refracted direction and every shaded color of a render has the dtype of its
+precision, so no kernel silently promotes float32 data to float64. It then prints
+the render times and the pixel deviations of float32 from the float64 reference.
+Run from the repository root:
+
+    uv run experiments/2026/10/precision_check.py
+"""
+import glob
+import json
+import os
+import time
+
+import numpy as np
+from optics_raytracer import ColorTracer, InsertedImage, Lens, Workspace, parse_config
+from optics_raytracer.geometry.rectangle import ColoredRectangle
+from optics_raytracer.scene.packed_scene import PackedScene
+
+
+def record_dtypes(owner, name, dtypes, tracing, pick=lambda result: result):
+    """
+    Wrap a method so the dtype of its results is recorded while the tracer runs,
+    returning the restore. The camera rays are built in float32 before that.
+    """
+    saved = owner.__dict__[name]
+    original = getattr(owner, name)
+
+    def recording(*args, **kwargs):
+        result = original(*args, **kwargs)
+        if tracing:
+            dtypes.add((name, np.asarray(pick(result)).dtype))
+        return result
+
+    setattr(owner, name, recording)
+    return lambda: setattr(owner, name, saved)
+
+
+def render(config, precision):
+    engine = parse_config(dict(config, ray_sampling_rate=0.0, precision=precision))
+    engine.compare_with_without_lenses = False
+    engine.workspace = Workspace()
+    dtypes = set()
+    tracing = []
+    get_colors = ColorTracer.get_colors
+
+    def traced_get_colors(tracer, *args, **kwargs):
+        tracing.append(True)
+        try:
+            colors = get_colors(tracer, *args, **kwargs)
+        finally:
+            tracing.clear()
+        dtypes.add(("get_colors", colors.dtype))
+        return colors
+
+    ColorTracer.get_colors = traced_get_colors
+    restores = [
+        lambda: setattr(ColorTracer, "get_colors", get_colors),
+        record_dtypes(
+            PackedScene, "nearest_hit", dtypes, tracing, lambda result: result[1]
+        ),
+        record_dtypes(Lens, "get_new_directions", dtypes, tracing),
+        record_dtypes(InsertedImage, "get_colors_at_uv", dtypes, tracing),
+        record_dtypes(ColoredRectangle, "shade", dtypes, tracing),
+    ]
+    try:
+        start = time.perf_counter()
+        image = np.asarray(engine.render(), dtype=np.int16)
+        elapsed = time.perf_counter() - start
+    finally:
+        for restore in restores:
+            restore()
+
+    for name, buffer in engine.workspace.buffers.items():
+        if buffer.dtype.kind == "f":
+            dtypes.add((f"workspace {name}", buffer.dtype))
+    expected = np.dtype(precision)
+    promoted = sorted(name for name, dtype in dtypes if dtype != expected)
+    assert not promoted, f"{precision} render produced other dtypes in {promoted}"
+    return image, elapsed
+
+
+def main():
+    print(f"{'scenario':<30} {'float32':>9} {'float64':>9} {'max diff':>9} {'pixels >0':>10}")
+    for path in sorted(glob.glob("examples/scenarios/*/*.json")):
+        with open(path) as f:
+            config = json.load(f)
+        single_image, single_time = render(config, "float32")
+        double_image, double_time = render(config, "float64")
+        deviation = np.abs(single_image - double_image).max(axis=2)
+        print(
+            f"{os.path.basename(path):<30} {single_time:>8.3f}s {double_time:>8.3f}s "
+            f"{deviation.max():>9} {(deviation > 0).mean():>10.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
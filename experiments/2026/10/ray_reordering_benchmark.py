@@ -0,0 +1,115 @@
+"""
+Benchmark of the coherent reordering of the rays between depths.
+
+Every example scenario is rendered at SCALE times its resolution, with and without
+reordering. For each run the script prints the best render time of REPEATS and two
+locality measures: the mean number of distinct cache lines touched by every WINDOW
+consecutive texel reads of the inserted images, and the same for the color writes of
+the rays leaving the lenses. Lower means better locality. Run from the repository
+root:
+
+    uv run experiments/2026/10/ray_reordering_benchmark.py
+"""
+import glob
+import json
+import os
+import time
+
+import numpy as np
+from optics_raytracer import ColorTracer, InsertedImage, parse_config
+
+SCALE = 2
+REPEATS = 3
+
+# Reads per window, and bytes per cache line, of the locality measures
+WINDOW = 256
+CACHE_LINE = 64
+
+
+def get_lines_per_window(addresses):
+    """
+    Mean number of distinct cache lines touched by every WINDOW consecutive reads.
+    """
+    windows = len(addresses) // WINDOW
+    if windows == 0:
+        return 0.0
+    lines = np.sort((addresses[: windows * WINDOW] // CACHE_LINE).reshape(windows, WINDOW))
+    return float((np.diff(lines, axis=1) != 0).sum(axis=1).mean() + 1)
+
+
+def get_weighted_mean(measures):
+    counts = np.array([count for count, _ in measures], dtype=np.float64)
+    if counts.sum() == 0:
+        return 0.0
+    return float(np.dot(counts, [value for _, value in measures]) / counts.sum())
+
+
+def measure_locality(engine):
+    """
+    Render once more, recording the texel reads and the color writes.
+    """
+    texel_measures = []
+    color_measures = []
+    get_colors_at_uv = InsertedImage.get_colors_at_uv
+    trace_wave = ColorTracer._trace_wave
+
+    def recording_get_colors_at_uv(image, uvs):
+        img_height, img_width = image.pixels.shape[:2]
+        x = np.clip(((uvs[:, 0] / image.width + 0.5) * img_width).astype(int), 0, img_width - 1)
+        y = np.clip(((-uvs[:, 1] / image.height + 0.5) * img_height).astype(int), 0, img_height - 1)
+        texel_bytes = image.pixels[0, 0].nbytes
+        texel_measures.append((len(uvs), get_lines_per_window((y * img_width + x) * texel_bytes)))
+        return get_colors_at_uv(image, uvs)
+
+    def recording_trace_wave(tracer, rays, colors, depth, *args, **kwargs):
+        if depth is not None:
+            color_bytes = colors[0].nbytes
+            color_measures.append(
+                (len(rays), get_lines_per_window(rays.pixel_indices * color_bytes))
+            )
+        return trace_wave(tracer, rays, colors, depth, *args, **kwargs)
+
+    InsertedImage.get_colors_at_uv = recording_get_colors_at_uv
+    ColorTracer._trace_wave = recording_trace_wave
+    try:
+        engine.render()
+    finally:
+        InsertedImage.get_colors_at_uv = get_colors_at_uv
+        ColorTracer._trace_wave = trace_wave
+    return get_weighted_mean(texel_measures), get_weighted_mean(color_measures)
+
+
+def main():
+    print(
+        f"{'scenario':<30} {'order':<9} {'time':>8} {'texel lines':>12} "
+        f"{'color lines':>12} {'same image':>11}"
+    )
+    for path in sorted(glob.glob("examples/scenarios/*/*.json")):
+        with open(path) as f:
+            config = json.load(f)
+        camera = dict(config["camera"])
+        camera["image_size"] = [side * SCALE for side in camera["image_size"]]
+        name = os.path.basename(path)
+        images = []
+        for reorder_rays in (False, True):
+            run_config = dict(
+                config, camera=camera, ray_sampling_rate=0.0, reorder_rays=reorder_rays
+            )
+            best = np.inf
+            for _ in range(REPEATS):
+                engine = parse_config(run_config)
+                start = time.perf_counter()
+                image = np.asarray(engine.render())
+                best = min(best, time.perf_counter() - start)
+            images.append(image)
+            texel_lines, color_lines = measure_locality(parse_config(run_config))
+            same_image = str(np.array_equal(*images)) if reorder_rays else ""
+            print(
+                f"{name:<30} {'coherent' if reorder_rays else 'surface':<9} "
+                f"{best:>7.3f}s {texel_lines:>12.1f} {color_lines:>12.1f} "
+                f"{same_image:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
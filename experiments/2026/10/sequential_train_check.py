@@ -0,0 +1,58 @@
+"""
+Check of the sequential optical-train tracer and of the "auto" mode, which adds the
+projective warp of pinhole views, against the general tracer.
+
+Every example scenario is rendered in each mode, and the timings and the pixel
+deviations from the general mode are printed. Scenes that are not sequential trains
+are reported as such. Run from the repository root:
+
+    uv run experiments/2026/10/sequential_train_check.py
+"""
+import glob
+import json
+import os
+import time
+
+import numpy as np
+from optics_raytracer import parse_config
+from optics_raytracer.scene.optical_train import OpticalTrain
+
+
+def render(config, tracing_mode):
+    config = dict(config, ray_sampling_rate=0.0, tracing_mode=tracing_mode)
+    engine = parse_config(config)
+    engine.compare_with_without_lenses = False
+    start = time.perf_counter()
+    image = np.asarray(engine.render(), dtype=np.int16)
+    return image, time.perf_counter() - start
+
+
+def main():
+    print(
+        f"{'scenario':<32} {'general':>9} {'sequential':>11} {'auto':>9} "
+        f"{'max diff':>9} {'pixels >2':>10}"
+    )
+    for path in sorted(glob.glob("examples/scenarios/*/*.json")):
+        with open(path) as f:
+            config = json.load(f)
+        name = os.path.basename(path)
+        engine = parse_config(config)
+        if OpticalTrain.build(engine.objects, engine.lenses) is None:
+            print(f"{name:<32} not a sequential train")
+            continue
+
+        general_image, general_time = render(config, "general")
+        sequential_image, sequential_time = render(config, "sequential")
+        auto_image, auto_time = render(config, "auto")
+        deviation = np.maximum(
+            np.abs(general_image - sequential_image), np.abs(general_image - auto_image)
+        )
+        print(
+            f"{name:<32} {general_time:>8.3f}s {sequential_time:>10.3f}s "
+            f"{auto_time:>8.3f}s {deviation.max():>9} "
+            f"{(deviation.max(axis=2) > 2).mean():>10.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
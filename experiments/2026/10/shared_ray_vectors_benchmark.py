@@ -0,0 +1,123 @@
+"""
+Benchmark of the ray batches sharing one origin or one direction.
+
+The scene is a sheet of GRID_SIDE x GRID_SIDE lenses in front of a screen, seen by
+a simple camera (shared origin) and by an orthographic camera (shared direction).
+For each camera the primary rays are intersected with the packed scene twice, once
+as given and once with the shared vector copied to every ray. The script prints the
+bytes of the primary rays, the best nearest-hit time of REPEATS, whether the hits
+agree, and the render time with the shared rays. Run from the repository root:
+
+    uv run experiments/2026/10/shared_ray_vectors_benchmark.py
+"""
+import time
+
+import numpy as np
+from optics_raytracer import (
+    ColorTracer,
+    Exporter3D,
+    FloatSize,
+    IntegerSize,
+    Lens,
+    OpticsRayTracingEngine,
+    OrthographicCamera,
+    RayBatch,
+    Rectangle,
+    SimpleCamera,
+)
+from optics_raytracer.geometry.rectangle import ColoredRectangle
+
+SHEET_SIZE = 4.0
+GRID_SIDE = 8
+IMAGE_SIDE = 800
+REPEATS = 5
+
+
+def build_scene():
+    pitch = SHEET_SIZE / GRID_SIDE
+    lenses = [
+        Lens.build(
+            center=np.array(
+                [(i + 0.5) * pitch - SHEET_SIZE / 2, (j + 0.5) * pitch - SHEET_SIZE / 2, -5],
+                dtype=np.float32,
+            ),
+            radius=pitch * 0.45,
+            normal=np.array([0, 0, -1], dtype=np.float32),
+            focal_distance=1.0,
+        )
+        for i in range(GRID_SIDE)
+        for j in range(GRID_SIDE)
+    ]
+    screen = ColoredRectangle(
+        Rectangle.build(
+            middle_point=np.array([0, 0, -10], dtype=np.float32),
+            normal=np.array([0, 0, -1], dtype=np.float32),
+            width=SHEET_SIZE * 3,
+            height=SHEET_SIZE * 3,
+            u_vector=np.array([1, 0, 0], dtype=np.float32),
+        ),
+        np.array([1, 1, 1]),
+    )
+    return [screen], lenses
+
+
+def build_cameras():
+    image_size = IntegerSize(IMAGE_SIDE, IMAGE_SIDE)
+    u = np.array([1, 0, 0], dtype=np.float32)
+    normal = np.array([0, 0, -1], dtype=np.float32)
+    return {
+        "simple": SimpleCamera.build(
+            camera_center=np.array([0, 0, 0], dtype=np.float32),
+            focal_distance=1.0,
+            viewport_size=FloatSize(1, 1),
+            image_size=image_size,
+            viewport_u_vector=u,
+            viewport_normal=normal,
+        ),
+        "orthographic": OrthographicCamera.build(
+            viewport_center=np.array([0, 0, 0], dtype=np.float32),
+            viewport_size=FloatSize(SHEET_SIZE, SHEET_SIZE),
+            image_size=image_size,
+            viewport_u_vector=u,
+            viewport_normal=normal,
+        ),
+    }
+
+
+def time_nearest_hit(scene, rays):
+    best = np.inf
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        hits = scene.nearest_hit(rays)
+        best = min(best, time.perf_counter() - start)
+    return best, hits
+
+
+def main():
+    objects, lenses = build_scene()
+    scene = ColorTracer(Exporter3D(), objects, lenses).scene
+    print(f"{len(scene)} surfaces, {IMAGE_SIDE * IMAGE_SIDE} primary rays")
+    for name, camera in build_cameras().items():
+        shared = camera.get_rays(Exporter3D(), 0)
+        full = RayBatch(shared["origin"].copy(), shared["direction"].copy())
+        shared_time, shared_hits = time_nearest_hit(scene, shared)
+        full_time, full_hits = time_nearest_hit(scene, full)
+        same_hits = np.array_equal(shared_hits[0], full_hits[0]) and np.allclose(
+            shared_hits[1], full_hits[1], rtol=1e-5
+        )
+        engine = OpticsRayTracingEngine(
+            camera, objects, lenses, ray_sampling_rate_for_3d_export=0
+        )
+        start = time.perf_counter()
+        engine.render()
+        render_time = time.perf_counter() - start
+        print(
+            f"{name:<13} rays {full.origins.nbytes + full.directions.nbytes:>9} B -> "
+            f"{shared.origins.nbytes + shared.directions.nbytes:>9} B  "
+            f"nearest hit {full_time:6.3f}s -> {shared_time:6.3f}s  "
+            f"same hits {same_hits}  render {render_time:6.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
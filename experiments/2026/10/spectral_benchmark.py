@@ -0,0 +1,76 @@
+"""
+Benchmark of the spectral tracing against separate renders per wavelength.
+
+The prismatic effect scenario is given flint glass lenses (Abbe number ABBE_NUMBER)
+and rendered once in spectral mode with SAMPLES wavelengths. It is then rendered
+once per wavelength without dispersion, every lens focal distance set to its value
+at that wavelength, and the renders are combined with the RGB weights of the
+samples. The script prints both times and the pixel deviation of the spectral
+render from the combined one. Run from the repository root:
+
+    uv run experiments/2026/10/spectral_benchmark.py
+"""
+import json
+import time
+
+import numpy as np
+from optics_raytracer import parse_config
+from optics_raytracer.optics.spectrum import get_power_scales, get_spectral_samples
+
+SCENARIO = "examples/scenarios/prismatic_effect/prismatic_effect.json"
+ABBE_NUMBER = 30.0
+SAMPLES = 8
+
+
+def render(config):
+    engine = parse_config(
+        dict(config, ray_sampling_rate=0.0, compare_with_without_lenses=False)
+    )
+    start = time.perf_counter()
+    image = np.asarray(engine.render(), dtype=np.float64)
+    return image, time.perf_counter() - start
+
+
+def with_lenses(config, update):
+    objects = [
+        dict(obj, **update(obj)) if obj["type"] == "lens" else obj
+        for obj in config["objects"]
+    ]
+    return dict(config, objects=objects)
+
+
+def main():
+    with open(SCENARIO) as f:
+        config = json.load(f)
+    spectral_image, spectral_time = render(
+        dict(
+            with_lenses(config, lambda obj: {"abbe_number": ABBE_NUMBER}),
+            spectral_samples=SAMPLES,
+        )
+    )
+
+    wavelengths, weights = get_spectral_samples(SAMPLES)
+    scales = get_power_scales(ABBE_NUMBER, wavelengths)
+    combined_image = np.zeros_like(spectral_image)
+    separate_time = 0.0
+    for scale, weight in zip(scales, weights):
+        image, elapsed = render(
+            with_lenses(
+                config, lambda obj: {"focal_distance": obj["focal_distance"] / scale}
+            )
+        )
+        combined_image += weight * image
+        separate_time += elapsed
+
+    deviation = np.abs(spectral_image - combined_image).max(axis=2)
+    print(f"{SAMPLES} wavelengths, Abbe number {ABBE_NUMBER}")
+    print(f"spectral render  {spectral_time:7.3f}s")
+    print(f"separate renders {separate_time:7.3f}s")
+    print(
+        f"max deviation {deviation.max():.2f}, pixels deviating by more than 1: "
+        f"{(deviation > 1).mean():.4%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark of the screen-space tile binning of the primary rays.
+
+The scene is the microlens sheet of bvh_crossover_benchmark.py in front of a large
+image, seen by a simple camera. Every configuration is rendered without binning and
+with several tile sizes. The script prints the render time, the fraction of
+primary ray-surface pairs still tested, and whether the image matches the unbinned
+one. Run from the repository root:
+
+    uv run experiments/2026/10/tile_binning_benchmark.py
+"""
+import time
+
+import numpy as np
+from optics_raytracer import (
+    FloatSize,
+    IntegerSize,
+    Lens,
+    OpticsRayTracingEngine,
+    Rectangle,
+    SimpleCamera,
+)
+from optics_raytracer.geometry.rectangle import ColoredRectangle
+
+SHEET_SIZE = 4.0
+GRID_SIDES = [2, 4, 8, 16]
+TILE_SIZES = [None, 8, 16, 32]
+
+
+def build_engine(grid_side, tile_size):
+    pitch = SHEET_SIZE / grid_side
+    lenses = [
+        Lens.build(
+            center=np.array(
+                [(i + 0.5) * pitch - SHEET_SIZE / 2, (j + 0.5) * pitch - SHEET_SIZE / 2, -5],
+                dtype=np.float32,
+            ),
+            radius=pitch * 0.45,
+            normal=np.array([0, 0, -1], dtype=np.float32),
+            focal_distance=1.0,
+        )
+        for i in range(grid_side)
+        for j in range(grid_side)
+    ]
+    screen = ColoredRectangle(
+        Rectangle.build(
+            middle_point=np.array([0, 0, -10], dtype=np.float32),
+            normal=np.array([0, 0, -1], dtype=np.float32),
+            width=SHEET_SIZE * 3,
+            height=SHEET_SIZE * 3,
+            u_vector=np.array([1, 0, 0], dtype=np.float32),
+        ),
+        np.array([1, 1, 1]),
+    )
+    camera = SimpleCamera.build(
+        camera_center=np.array([0, 0, 0], dtype=np.float32),
+        focal_distance=1.0,
+        viewport_size=FloatSize(1, 1),
+        image_size=IntegerSize(400, 400),
+        viewport_u_vector=np.array([1, 0, 0], dtype=np.float32),
+        viewport_normal=np.array([0, 0, -1], dtype=np.float32),
+    )
+    return OpticsRayTracingEngine(
+        camera, [screen], lenses, ray_sampling_rate_for_3d_export=0, tile_size=tile_size
+    )
+
+
+def main():
+    for grid_side in GRID_SIDES:
+        reference = None
+        for tile_size in TILE_SIZES:
+            engine = build_engine(grid_side, tile_size)
+            start = time.perf_counter()
+            image = np.asarray(engine.render())
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference = image
+            fraction = (
+                engine.tile_binning.candidate_fraction if engine.tile_binning else 1.0
+            )
+            print(
+                f"lenses={grid_side * grid_side:4d}  tile={str(tile_size):>4}  "
+                f"{elapsed:6.3f}s  tested pairs {fraction:6.1%}  "
+                f"same image {np.array_equal(image, reference)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
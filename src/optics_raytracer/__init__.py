@@ -6,25 +6,35 @@ from optics_raytracer.core.ray import (
     get_ray_points_array_at_t_array,
     build_rays,
 )
+from optics_raytracer.core.ray_batch import RayBatch
+from optics_raytracer.core.compact_rays import compact_ray_dtype, CompactRays
+from optics_raytracer.core.workspace import Workspace
 from optics_raytracer.core.surface import surface_dtype, get_surface_hit_ts, get_surface_hit_ts_mask
 from optics_raytracer.geometry.rectangle import rectangle_dtype, Rectangle
 from optics_raytracer.geometry.circle import circle_dtype, Circle
 from optics_raytracer.optics.lens import lens_dtype, Lens
+from optics_raytracer.optics.lens_array import lens_array_dtype, LensArray
 from optics_raytracer.camera.camera import (
     simple_camera_viewport_dtype,
     Camera,
     SimpleCamera,
+    OrthographicCamera,
     EyeCamera,
     eye_camera_viewport_dtype,
+    orthographic_camera_viewport_dtype,
 )
 from optics_raytracer.cli import main, parse_config
 from optics_raytracer.rendering.color_tracer import ColorTracer
 from optics_raytracer.optics.colored_object import ColoredObject
+from optics_raytracer.optics.object_registry import register_object_type
 from optics_raytracer.rendering.engine import OpticsRayTracingEngine
 from optics_raytracer.rendering.export_3d import Exporter3D
 from optics_raytracer.rendering.gif_builder import GifBuilder
 from optics_raytracer.rendering.image_saver import ImageSaver
+from optics_raytracer.rendering.light_splatter import LightSplatter
 from optics_raytracer.objects.inserted_image import InsertedImage
+from optics_raytracer.objects.aperture_stop import ApertureStop
+from optics_raytracer.objects.baffle import Baffle
 from optics_raytracer.camera.pixelated_viewport import (
     build_pixelated_viewport,
     pixelated_viewport_dtype,
@@ -40,6 +50,10 @@ __all__ = [
     "get_ray_point_at_t",
     "get_ray_points_array_at_t_array",
     "build_rays",
+    "RayBatch",
+    "compact_ray_dtype",
+    "CompactRays",
+    "Workspace",
     "surface_dtype",
     "get_surface_hit_ts",
     "get_surface_hit_ts_mask",
@@ -49,20 +63,28 @@ __all__ = [
     "Circle",
     "lens_dtype",
     "Lens",
+    "lens_array_dtype",
+    "LensArray",
     "simple_camera_viewport_dtype",
     "eye_camera_viewport_dtype",
+    "orthographic_camera_viewport_dtype",
     "Camera",
     "SimpleCamera",
+    "OrthographicCamera",
     "EyeCamera",
     "main",
     "parse_config",
     "ColorTracer",
     "ColoredObject",
+    "register_object_type",
     "OpticsRayTracingEngine",
     "Exporter3D",
     "GifBuilder",
     "ImageSaver",
+    "LightSplatter",
     "InsertedImage",
+    "ApertureStop",
+    "Baffle",
     "build_pixelated_viewport",
     "pixelated_viewport_dtype",
     "get_pixel_points",
@@ -7,7 +7,9 @@ from optics_raytracer.optics.lens import Lens
 from optics_raytracer.core.surface import get_surface_hit_ts, get_surface_hit_ts_mask
 
 from optics_raytracer.camera.pixelated_viewport import get_pixel_points, pixelated_viewport_dtype
+from optics_raytracer.core.compact_rays import CompactRays
 from optics_raytracer.core.primitives import vector_dtype
+from optics_raytracer.core.ray_batch import RayBatch
 from optics_raytracer.utils.size import FloatSize, IntegerSize
 from optics_raytracer.core.ray import build_rays, get_ray_points_array_at_t_array
 
@@ -21,6 +23,15 @@ class Camera(ABC):
     def get_rays(self, exporter: Exporter3D, ray_sampling_rate_for_3d_export: float):
         pass
 
+    @abstractmethod
+    def get_compact_rays(
+        self,
+        exporter: Exporter3D,
+        ray_sampling_rate_for_3d_export: float,
+        block_size: int,
+    ) -> CompactRays:
+        pass
+
     @abstractmethod
     def convert_ray_colors_to_pixel_colors(self, colors):
         pass
@@ -120,7 +131,7 @@ class SimpleCamera(Camera):
             ray_sampling_rate_for_3d_export: Fraction of rays to include in visualization
 
         Returns:
-            Array of rays (ray_dtype)
+            RayBatch of the rays, sharing the camera center as their origin
         """
         # Get pixel points and directions
         pixel_points = get_pixel_points(self.array)
@@ -128,7 +139,185 @@ class SimpleCamera(Camera):
         directions = directions / np.linalg.norm(directions, axis=1, keepdims=True)
 
         # Build rays
-        rays = build_rays(np.full_like(directions, self.camera_center), directions)
+        rays = RayBatch(self.camera_center, directions)
+
+        # Add viewport rectangle to 3D visualization
+        exporter.add_rectangle(self.array)
+
+        return rays
+
+    def get_compact_rays(
+        self,
+        exporter: Exporter3D,
+        ray_sampling_rate_for_3d_export: float,
+        block_size: int,
+    ) -> CompactRays:
+        """
+        Generate the rays of get_rays in compact storage.
+
+        Every ray starts at the camera center, so only the directions take space.
+
+        Args:
+            exporter: 3D exporter instance
+            ray_sampling_rate_for_3d_export: Fraction of rays to include in visualization
+            block_size: Upper bound for the rays generated at once
+
+        Returns:
+            CompactRays instance, in the order of get_rays
+        """
+        pixel_points = get_pixel_points(self.array).reshape(-1, 3)
+        rays = CompactRays.build(len(pixel_points), self.camera_center)
+        for start in range(0, len(pixel_points), block_size):
+            directions = pixel_points[start : start + block_size] - self.camera_center
+            directions = directions / np.linalg.norm(directions, axis=1, keepdims=True)
+            rays.encode(start, RayBatch(self.camera_center, directions))
+
+        # Add viewport rectangle to 3D visualization
+        exporter.add_rectangle(self.array)
+
+        return rays
+
+    def convert_ray_colors_to_pixel_colors(self, colors):
+        # Returning as is, as one ray is for one pixel here
+        return colors
+
+    def get_image_size(self):
+        return IntegerSize(self.array["pixel_columns"], self.array["pixel_rows"])
+
+
+orthographic_camera_viewport_dtype = np.dtype(pixelated_viewport_dtype.descr)
+
+
+class OrthographicCamera(Camera):
+    """
+    Wrapper class for orthographic_camera_viewport_dtype numpy arrays with helper methods.
+
+    Every pixel casts one ray from its center on the viewport along the viewport
+    normal, so the image keeps the sizes of the scene whatever its depth.
+    """
+
+    def __init__(self, camera_array: np.ndarray):
+        if camera_array.dtype != orthographic_camera_viewport_dtype:
+            raise ValueError(
+                f"Input array must have dtype {orthographic_camera_viewport_dtype}"
+            )
+        self.array = camera_array
+
+    @property
+    def pixel_columns(self) -> int:
+        return self.array["pixel_columns"]
+
+    @property
+    def pixel_rows(self) -> int:
+        return self.array["pixel_rows"]
+
+    @property
+    def normal(self) -> np.ndarray:
+        return self.array["normal"]
+
+    @staticmethod
+    def build(
+        viewport_center: np.ndarray,
+        viewport_size: FloatSize,
+        image_size: IntegerSize,
+        viewport_u_vector: np.ndarray,
+        viewport_normal: np.ndarray,
+    ) -> "OrthographicCamera":
+        """
+        Create a new OrthographicCamera instance.
+
+        Args:
+            viewport_center: Center point of the viewport, where the rays start
+            viewport_size: Size of the viewport, which is also the size of the view
+            image_size: Size of the output image
+            viewport_u_vector: U vector defining the viewport's horizontal axis
+            viewport_normal: Normal vector of the viewport plane, the direction of
+                every ray
+
+        Returns:
+            New OrthographicCamera instance
+        """
+        viewport_normal = viewport_normal / np.linalg.norm(viewport_normal)
+        camera_array = np.array(
+            (
+                viewport_center,
+                viewport_normal,
+                viewport_size.width,
+                viewport_size.height,
+                viewport_u_vector,
+                image_size.width,
+                image_size.height,
+            ),
+            dtype=orthographic_camera_viewport_dtype,
+        )
+        return OrthographicCamera(camera_array)
+
+    def get_output_image_initial_colors(self):
+        """
+        Get the initial colors for the output image.
+
+        Returns:
+            Array of colors (Nx3)
+        """
+        return np.zeros((self.pixel_rows * self.pixel_columns, 3))
+
+    def get_rays(self, exporter: Exporter3D, ray_sampling_rate_for_3d_export: float):
+        """
+        Generate parallel rays from each pixel and visualize in 3D.
+
+        Args:
+            exporter: 3D exporter instance
+            ray_sampling_rate_for_3d_export: Fraction of rays to include in visualization
+
+        Returns:
+            RayBatch of the rays, sharing the viewport normal as their direction
+        """
+        pixel_points = get_pixel_points(self.array).reshape(-1, 3)
+        rays = RayBatch(pixel_points, self.normal)
+
+        # Add viewport rectangle to 3D visualization
+        exporter.add_rectangle(self.array)
+
+        return rays
+
+    def get_compact_rays(
+        self,
+        exporter: Exporter3D,
+        ray_sampling_rate_for_3d_export: float,
+        block_size: int,
+    ) -> CompactRays:
+        """
+        Generate the rays of get_rays in compact storage.
+
+        The viewport is the reference disc of the compact origins.
+
+        Args:
+            exporter: 3D exporter instance
+            ray_sampling_rate_for_3d_export: Fraction of rays to include in visualization
+            block_size: Upper bound for the rays generated at once
+
+        Returns:
+            CompactRays instance, in the order of get_rays
+        """
+        pixel_points = get_pixel_points(self.array).reshape(-1, 3)
+        u = self.array["u_vector"]
+        v = np.cross(self.normal, u)
+        # The pixel steps follow the axes with their length
+        rays = CompactRays.build(
+            len(pixel_points),
+            self.array["middle_point"],
+            u,
+            v,
+            max(
+                self.array["width"] * np.linalg.norm(u),
+                self.array["height"] * np.linalg.norm(v),
+            )
+            / 2,
+        )
+        for start in range(0, len(pixel_points), block_size):
+            rays.encode(
+                start, RayBatch(pixel_points[start : start + block_size], self.normal)
+            )
 
         # Add viewport rectangle to 3D visualization
         exporter.add_rectangle(self.array)
@@ -324,6 +513,67 @@ class EyeCamera(Camera):
         pixel_points = get_pixel_points(self.array)
         pixel_points = pixel_points.reshape(-1, 3)
 
+        return self._get_rays_through_lens(
+            pixel_points, self._get_lens_points(), exporter, ray_sampling_rate_for_3d_export
+        )
+
+    def get_compact_rays(
+        self,
+        exporter: Exporter3D,
+        ray_sampling_rate_for_3d_export: float,
+        block_size: int,
+    ) -> CompactRays:
+        """
+        Generate the rays of get_rays in compact storage, a block of pixels at a time.
+
+        The refracted rays start on the lens, which is the reference disc of the
+        compact origins, so the full precision rays only ever exist for one block.
+
+        Args:
+            exporter: 3D exporter instance
+            ray_sampling_rate_for_3d_export: Fraction of rays to include in visualization
+            block_size: Upper bound for the rays generated at once
+
+        Returns:
+            CompactRays instance, in the order of get_rays
+        """
+        exporter.add_rectangle(self.array)
+        exporter.add_circle(self.lens.array)
+        pixel_points = get_pixel_points(self.array)
+        pixel_points = pixel_points.reshape(-1, 3)
+        lens_points = self._get_lens_points()
+
+        u = self.array["u_vector"]
+        v = np.cross(self.array["normal"], u)
+        # The lens circles follow the axes with their length
+        rays = CompactRays.build(
+            len(pixel_points) * len(lens_points),
+            self.lens.center,
+            u,
+            v,
+            self.array["lens_radius"] * max(np.linalg.norm(u), np.linalg.norm(v)),
+        )
+        pixels_per_block = max(1, block_size // len(lens_points))
+        position = 0
+        for start in range(0, len(pixel_points), pixels_per_block):
+            position = rays.encode(
+                position,
+                self._get_rays_through_lens(
+                    pixel_points[start : start + pixels_per_block],
+                    lens_points,
+                    exporter,
+                    ray_sampling_rate_for_3d_export,
+                ),
+            )
+        return rays
+
+    def _get_lens_points(self) -> np.ndarray:
+        """
+        Get the virtual points on the circles of the lens, circle after circle.
+
+        Returns:
+            Array of points (Mx3) where M is number_of_circles * rays_per_circle
+        """
         # Calculate lens center position
         lens_center = (
             self.viewport_center + self.array["lens_distance"] * self.array["normal"]
@@ -355,8 +605,27 @@ class EyeCamera(Camera):
             all_lens_points.append(circle_points)
 
         # Flatten all lens points
-        all_lens_points = np.concatenate(all_lens_points)
+        return np.concatenate(all_lens_points)
+
+    def _get_rays_through_lens(
+        self,
+        pixel_points: np.ndarray,
+        all_lens_points: np.ndarray,
+        exporter: Exporter3D,
+        ray_sampling_rate_for_3d_export: float,
+    ) -> np.ndarray:
+        """
+        Get the rays from every pixel point to every lens point, refracted by the lens.
 
+        Args:
+            pixel_points: Array of pixel points on the viewport (Px3)
+            all_lens_points: Array of virtual points on the lens (Mx3)
+            exporter: 3D exporter instance
+            ray_sampling_rate_for_3d_export: Fraction of rays to include in visualization
+
+        Returns:
+            Array of P * M rays (ray_dtype) leaving the lens, pixel after pixel
+        """
         # Create rays from each pixel to each lens point
         origins = np.repeat(pixel_points, len(all_lens_points), axis=0)
         directions = np.tile(all_lens_points, (len(pixel_points), 1)) - origins
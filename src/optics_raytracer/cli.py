@@ -1,19 +1,23 @@
 import json
 import sys
 from pathlib import Path
-from typing import Dict, Any
-from optics_raytracer.rendering.engine import OpticsRayTracingEngine
-from optics_raytracer.camera.camera import EyeCamera, SimpleCamera
+from typing import Dict, Any, List
+from optics_raytracer.rendering.engine import COMPACT_BLOCK_SIZE, OpticsRayTracingEngine
+from optics_raytracer.rendering.light_splatter import LightSplatter
+from optics_raytracer.geometry.rectangle import Rectangle
+from optics_raytracer.camera.camera import EyeCamera, OrthographicCamera, SimpleCamera
 from optics_raytracer.utils.size import FloatSize, IntegerSize
 from optics_raytracer.optics.lens import Lens
+from optics_raytracer.optics.lens_array import LensArray
 from optics_raytracer.objects.inserted_image import InsertedImage
+from optics_raytracer.objects.aperture_stop import ApertureStop
+from optics_raytracer.objects.baffle import Baffle
+from optics_raytracer.optics.colored_object import ColoredObject
 import numpy as np
 
 
-def parse_config(config: Dict[str, Any]) -> OpticsRayTracingEngine:
-    """Parse JSON config into OpticsRayTracingEngine instance"""
-    # Parse camera
-    cam_cfg = config["camera"]
+def _parse_camera(cam_cfg: Dict[str, Any]):
+    """Parse the camera section of a JSON config"""
     camera_type = cam_cfg.get("type", "simple")  # Default to simple camera for backward compatibility
 
     if camera_type == "eye":
@@ -50,6 +54,16 @@ def parse_config(config: Dict[str, Any]) -> OpticsRayTracingEngine:
                 viewport_normal=np.array(cam_cfg["viewport_normal"], dtype=np.float32),
                 lens_focal_distance=cam_cfg["lens_focal_distance"],
             )
+    elif camera_type == "orthographic":
+        camera = OrthographicCamera.build(
+            viewport_center=np.array(cam_cfg["center"], dtype=np.float32),
+            viewport_size=FloatSize.from_width_and_aspect_ratio(
+                cam_cfg["viewport_width"], IntegerSize(*cam_cfg["image_size"]).aspect_ratio
+            ),
+            image_size=IntegerSize(*cam_cfg["image_size"]),
+            viewport_u_vector=np.array(cam_cfg["u_vector"], dtype=np.float32),
+            viewport_normal=np.array(cam_cfg["viewport_normal"], dtype=np.float32),
+        )
     else:
         # Default to simple camera for backward compatibility
         camera = SimpleCamera.build(
@@ -62,7 +76,14 @@ def parse_config(config: Dict[str, Any]) -> OpticsRayTracingEngine:
             viewport_u_vector=np.array(cam_cfg["u_vector"], dtype=np.float32),
             viewport_normal=np.array(cam_cfg["viewport_normal"], dtype=np.float32),
         )
+    return camera
 
+
+def parse_config(config: Dict[str, Any]):
+    """
+    Parse JSON config into OpticsRayTracingEngine instance, or into LightSplatter
+    instance for a projector config with a screen section
+    """
     # Parse objects
     objects = []
     lenses = []
@@ -76,6 +97,7 @@ def parse_config(config: Dict[str, Any]) -> OpticsRayTracingEngine:
                         radius=obj["radius"],
                         normal=np.array(obj["normal"], dtype=np.float32),
                         magnification=obj["magnification"],
+                        abbe_number=obj.get("abbe_number", 0.0),
                     )
                 )
             else:
@@ -86,8 +108,23 @@ def parse_config(config: Dict[str, Any]) -> OpticsRayTracingEngine:
                         radius=obj["radius"],
                         normal=np.array(obj["normal"], dtype=np.float32),
                         focal_distance=obj["focal_distance"],
+                        abbe_number=obj.get("abbe_number", 0.0),
                     )
                 )
+        elif obj["type"] == "lens_array":
+            columns = obj["columns"]
+            lenses.append(
+                LensArray.build(
+                    middle_point=np.array(obj["center"], dtype=np.float32),
+                    normal=np.array(obj["normal"], dtype=np.float32),
+                    u_vector=np.array(obj["u_vector"], dtype=np.float32),
+                    pitch=obj["pitch"],
+                    cell_radius=obj.get("cell_radius", obj["pitch"] / 2),
+                    columns=columns,
+                    rows=obj.get("rows", columns),  # Default to square if rows not specified
+                    focal_distances=np.array(obj["focal_distance"], dtype=np.float32),
+                )
+            )
         elif obj["type"] == "image":
             image_path = Path(obj["image_path"])
             if not image_path.exists():
@@ -105,14 +142,88 @@ def parse_config(config: Dict[str, Any]) -> OpticsRayTracingEngine:
                     u_vector=np.array(obj["u_vector"], dtype=np.float32),
                 )
             )
+        elif obj["type"] == "aperture_stop":
+            objects.append(
+                ApertureStop(
+                    center=np.array(obj["center"], dtype=np.float32),
+                    normal=np.array(obj["normal"], dtype=np.float32),
+                    outer_radius=obj["outer_radius"],
+                    inner_radius=obj["inner_radius"],
+                    color=np.array(obj.get("color", [0, 0, 0]), dtype=np.float32),
+                )
+            )
+        elif obj["type"] == "baffle":
+            objects.append(
+                Baffle(
+                    middle_point=np.array(obj["center"], dtype=np.float32),
+                    normal=np.array(obj["normal"], dtype=np.float32),
+                    u_vector=np.array(obj["u_vector"], dtype=np.float32),
+                    width=obj["width"],
+                    height=obj.get(
+                        "height", obj["width"]
+                    ),  # Default to square if height not specified
+                    hole_radius=obj.get("hole_radius", 0.0),
+                    color=np.array(obj.get("color", [0, 0, 0]), dtype=np.float32),
+                )
+            )
+
+    if "screen" in config:
+        return _parse_projector(config, objects, lenses)
 
     return OpticsRayTracingEngine(
-        camera=camera,
+        camera=_parse_camera(config["camera"]),
         objects=objects,
         lenses=lenses,
         ray_sampling_rate_for_3d_export=config.get("ray_sampling_rate", 0.01),
         compare_with_without_lenses=config.get("compare_with_without_lenses", False),
         include_missed_rays=config.get("include_missed_rays", False),
+        tracing_mode=config.get("tracing_mode", "general"),
+        report_paraxial_deviation=config.get("report_paraxial_deviation", False),
+        tile_size=config.get("tile_size"),
+        lens_visibility=config.get("lens_visibility", False),
+        cull_escaping_rays=config.get("cull_escaping_rays", False),
+        reorder_rays=config.get("reorder_rays", False),
+        max_depth=config.get("max_depth"),
+        detect_cycles=config.get("detect_cycles", False),
+        ray_budget=config.get("ray_budget"),
+        terminated_color=np.array(config["terminated_color"], dtype=np.float32)
+        if "terminated_color" in config
+        else None,
+        precision=config.get("precision", "float32"),
+        compact_rays=config.get("compact_rays", False),
+        compact_block_size=config.get("compact_block_size", COMPACT_BLOCK_SIZE),
+        spectral_samples=config.get("spectral_samples"),
+    )
+
+
+def _parse_projector(
+    config: Dict[str, Any], objects: List[ColoredObject], lenses: List[Lens]
+) -> LightSplatter:
+    """Parse a projector config, its single image being the light source"""
+    sources = [obj for obj in objects if isinstance(obj, InsertedImage)]
+    if len(sources) != 1:
+        raise ValueError("A projector config needs exactly one image as its source")
+    screen_cfg = config["screen"]
+    image_size = IntegerSize(*screen_cfg["image_size"])
+    screen_size = FloatSize.from_width_and_aspect_ratio(
+        screen_cfg["width"], image_size.aspect_ratio
+    )
+    return LightSplatter(
+        source=sources[0],
+        lenses=lenses,
+        screen=Rectangle.build(
+            middle_point=np.array(screen_cfg["center"], dtype=np.float32),
+            normal=np.array(screen_cfg["normal"], dtype=np.float32),
+            width=screen_size.width,
+            height=screen_size.height,
+            u_vector=np.array(screen_cfg["u_vector"], dtype=np.float32),
+        ),
+        image_size=image_size,
+        rays_per_texel=config.get("rays_per_texel", 4),
+        emission_angle=config.get("emission_angle", 20.0),
+        max_depth=config.get("max_depth", 16),
+        dtype=np.dtype(config.get("precision", "float32")),
+        stops=[obj for obj in objects if not isinstance(obj, InsertedImage)],
     )
 
 
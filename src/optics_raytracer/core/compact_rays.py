@@ -0,0 +1,213 @@
+import numpy as np
+
+from optics_raytracer.core.primitives import vector_dtype
+from optics_raytracer.core.ray_batch import RayBatch
+
+# Largest code of the 16-bit quantized coordinates
+CODE_SCALE = 65535
+
+# Scale of the 16-bit ray colors, 1.0 maps to it
+COLOR_SCALE = 65535
+
+compact_ray_dtype = np.dtype(
+    [
+        ("origin", np.uint16, (2,)),  # Origin on the reference disc, in u and v
+        ("direction", np.uint16, (2,)),  # Octahedral code of the unit direction
+    ]
+)
+
+compact_ray_frame_dtype = np.dtype(
+    [
+        ("middle_point", *vector_dtype),  # Center of the reference disc of the origins
+        ("u_vector", *vector_dtype),  # First in-plane axis of the disc
+        ("v_vector", *vector_dtype),  # Second in-plane axis of the disc
+        ("extent", np.float32),  # Largest offset of an origin along either axis
+    ]
+)
+
+
+def encode_coordinates(values: np.ndarray) -> np.ndarray:
+    """
+    Quantize coordinates between -1 and 1 to 16-bit codes.
+    """
+    codes = np.clip(values, -1, 1)
+    codes += 1
+    codes *= CODE_SCALE / 2
+    np.rint(codes, out=codes)
+    return codes.astype(np.uint16)
+
+
+def decode_coordinates(codes: np.ndarray, dtype=np.float32) -> np.ndarray:
+    """
+    Map 16-bit codes back to coordinates between -1 and 1.
+    """
+    values = codes.astype(dtype)
+    values *= np.asarray(2 / CODE_SCALE, dtype=dtype)
+    values -= 1
+    return values
+
+
+def encode_octahedral_directions(directions: np.ndarray) -> np.ndarray:
+    """
+    Encode unit directions as two 16-bit codes each.
+
+    The unit sphere is projected on the octahedron |x| + |y| + |z| = 1 and the
+    lower half is folded over the upper one, so the (x, y) of the projection cover
+    the square [-1, 1]^2 with an angular error below 1e-4 radians.
+
+    Args:
+        directions: Array of unit directions (Nx3)
+
+    Returns:
+        Array of direction codes (Nx2 uint16)
+    """
+    directions = np.asarray(directions)
+    points = directions[:, :2] / np.abs(directions).sum(axis=1)[:, np.newaxis]
+    # Fold the lower half, where z is negative
+    folded = np.abs(points[:, ::-1])
+    np.subtract(1, folded, out=folded)
+    np.copysign(folded, points, out=folded)
+    np.copyto(points, folded, where=directions[:, 2:] < 0)
+    return encode_coordinates(points)
+
+
+def decode_octahedral_directions(codes: np.ndarray, dtype=np.float32) -> np.ndarray:
+    """
+    Decode the directions encoded by encode_octahedral_directions.
+
+    Args:
+        codes: Array of direction codes (Nx2 uint16)
+        dtype: Dtype of the decoded directions
+
+    Returns:
+        Array of unit directions (Nx3)
+    """
+    directions = np.empty((len(codes), 3), dtype=dtype)
+    directions[:, :2] = decode_coordinates(codes, dtype)
+    directions[:, 2] = 1 - np.abs(directions[:, :2]).sum(axis=1)
+    # Unfold the lower half, where z is negative
+    folds = np.maximum(-directions[:, 2], 0)[:, np.newaxis]
+    directions[:, :2] -= np.copysign(folds, directions[:, :2])
+    directions /= np.sqrt(np.einsum("ij,ij->i", directions, directions))[
+        :, np.newaxis
+    ]
+    return directions
+
+
+class CompactRays:
+    """
+    Wrapper class for compact_ray_dtype numpy arrays with helper methods.
+
+    Compact storage of the camera rays: 8 bytes per ray instead of the 24 of
+    ray_dtype. Every origin lies on a shared reference disc (the lens of an eye
+    camera, or a single point) and is stored as two 16-bit coordinates on it, and
+    every direction as two 16-bit octahedral codes. Blocks of rays are decoded to
+    full precision RayBatch instances right before tracing.
+    """
+
+    def __init__(self, ray_array: np.ndarray, frame_array: np.ndarray):
+        if ray_array.dtype != compact_ray_dtype:
+            raise ValueError(f"Input array must have dtype {compact_ray_dtype}")
+        if frame_array.dtype != compact_ray_frame_dtype:
+            raise ValueError(f"Frame array must have dtype {compact_ray_frame_dtype}")
+        self.array = ray_array
+        self.frame = frame_array
+
+    @staticmethod
+    def build(
+        count: int,
+        middle_point: np.ndarray,
+        u_vector: np.ndarray = np.array([1, 0, 0], dtype=np.float32),
+        v_vector: np.ndarray = np.array([0, 1, 0], dtype=np.float32),
+        extent: float = 0.0,
+    ) -> "CompactRays":
+        """
+        Create storage for a number of compact rays, to be filled with encode.
+
+        Args:
+            count: Number of rays
+            middle_point: Center of the reference disc of the ray origins
+            u_vector: First in-plane axis of the disc, normalized here
+            v_vector: Second in-plane axis of the disc, normalized here
+            extent: Largest offset of an origin from the center along either axis,
+                0 when every ray starts at the center
+
+        Returns:
+            New CompactRays instance
+        """
+        # Origins are encoded as coordinates along the axes, which needs unit axes
+        u_vector = u_vector / np.linalg.norm(u_vector)
+        v_vector = v_vector / np.linalg.norm(v_vector)
+        frame_array = np.array(
+            (middle_point, u_vector, v_vector, extent), dtype=compact_ray_frame_dtype
+        )
+        return CompactRays(np.empty(count, dtype=compact_ray_dtype), frame_array)
+
+    def encode(self, start: int, rays) -> int:
+        """
+        Store rays from the given position on.
+
+        Args:
+            start: Index of the first stored ray
+            rays: Rays to store (ray_dtype or RayBatch), starting on the reference disc
+
+        Returns:
+            Index after the last stored ray
+        """
+        stop = start + len(rays)
+        block = self.array[start:stop]
+        extent = float(self.frame["extent"])
+        if extent > 0:
+            offsets = rays["origin"] - self.frame["middle_point"]
+            axes = np.column_stack([self.frame["u_vector"], self.frame["v_vector"]])
+            coordinates = offsets @ (axes / np.asarray(extent, dtype=axes.dtype))
+            block["origin"] = encode_coordinates(coordinates)
+        else:
+            block["origin"] = CODE_SCALE // 2
+        block["direction"] = encode_octahedral_directions(rays["direction"])
+        return stop
+
+    def decode(self, start: int, stop: int, dtype=np.float32) -> RayBatch:
+        """
+        Decode a block of the rays to full precision.
+
+        Args:
+            start: Index of the first ray of the block
+            stop: Index after the last ray of the block
+            dtype: Compute dtype of the decoded batch
+
+        Returns:
+            RayBatch of the block
+        """
+        block = self.array[start:stop]
+        origins = np.empty((len(block), 3), dtype=dtype)
+        origins[:] = self.frame["middle_point"]
+        extent = float(self.frame["extent"])
+        if extent > 0:
+            coordinates = decode_coordinates(block["origin"], dtype)
+            coordinates *= np.asarray(extent, dtype=dtype)
+            origins += coordinates[:, :1] * self.frame["u_vector"].astype(dtype)
+            origins += coordinates[:, 1:] * self.frame["v_vector"].astype(dtype)
+        directions = decode_octahedral_directions(block["direction"], dtype)
+        return RayBatch(origins, directions, dtype=dtype)
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+
+def encode_colors(colors: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    Quantize colors between 0 and 1 to 16-bit values.
+
+    Args:
+        colors: Array of colors (Nx3)
+        out: Optional result buffer (Nx3 uint16)
+
+    Returns:
+        Array of colors (Nx3 uint16), COLOR_SCALE standing for 1
+    """
+    scaled = np.clip(colors, 0, 1) * COLOR_SCALE
+    if out is None:
+        out = np.empty(scaled.shape, dtype=np.uint16)
+    np.rint(scaled, out=out, casting="unsafe")
+    return out
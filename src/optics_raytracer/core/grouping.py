@@ -0,0 +1,47 @@
+import numpy as np
+
+# Every byte value with its bit b moved to position 2b
+_MORTON_SPREAD = np.array(
+    [sum(((value >> bit) & 1) << (2 * bit) for bit in range(8)) for value in range(256)],
+    dtype=np.uint16,
+)
+
+
+def group_by_index(indices: np.ndarray, group_count: int):
+    """
+    Group positions by an index value with a stable sort.
+
+    Args:
+        indices: Group index for every position, in the range [0, group_count)
+        group_count: Number of groups
+
+    Returns:
+        Tuple of the order that makes every group contiguous and the group offsets,
+        where group g occupies order[offsets[g]:offsets[g + 1]]
+    """
+    # Stable sorts of 16-bit keys are radix sorts, linear in the number of positions
+    keys = indices.astype(np.uint16) if group_count <= 1 << 16 else indices
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(group_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=group_count), out=offsets[1:])
+    return order, offsets
+
+
+def get_morton_codes(coordinates: np.ndarray, bits: int = 8) -> np.ndarray:
+    """
+    Interleave the bits of 2D coordinates into Morton (Z-order) codes.
+
+    Args:
+        coordinates: Coordinates (Nx2) in the range [0, 1], clipped to it otherwise
+        bits: Bits kept per coordinate, at most 8
+
+    Returns:
+        Morton code of every point (N,), close points getting close codes
+    """
+    cells = np.multiply(coordinates, 1 << bits, dtype=np.float32)
+    np.clip(cells, 0, (1 << bits) - 1, out=cells)
+    cells = cells.astype(np.uint8)
+    codes = np.take(_MORTON_SPREAD, cells[:, 1])
+    codes <<= 1
+    codes |= np.take(_MORTON_SPREAD, cells[:, 0])
+    return codes
@@ -3,3 +3,6 @@ import numpy as np
 vector_dtype = (np.float32, (3,))
 color_dtype = vector_dtype
 point_dtype = vector_dtype
+
+# Compute precisions of the tracer, float32 for throughput and float64 for reference
+PRECISIONS = ("float32", "float64")
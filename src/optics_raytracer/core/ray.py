@@ -13,8 +13,14 @@ def get_ray_point_at_t(ray, t):
     return ray["origin"] + t * ray["direction"]
 
 
-def get_ray_points_array_at_t_array(rays, t_array):
-    return rays["origin"] + t_array[:, np.newaxis] * rays["direction"]
+def get_ray_points_array_at_t_array(rays, t_array, out=None):
+    """
+    Get the points of the rays at the given t values.
+    out - optional (Nx3) result buffer, must not share memory with the ray origins
+    """
+    points = np.multiply(t_array[:, np.newaxis], rays["direction"], out=out)
+    points += rays["origin"]
+    return points
 
 
 def build_rays(origins, directions):
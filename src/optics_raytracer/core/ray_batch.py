@@ -0,0 +1,211 @@
+from typing import List
+
+import numpy as np
+
+from optics_raytracer.core.ray import build_rays
+from optics_raytracer.core.workspace import Workspace, get_buffer
+
+
+class RayBatch:
+    """
+    Structure-of-arrays container for the rays on the tracing hot path.
+
+    Origins and directions are kept in separate contiguous arrays of the compute
+    dtype (float32 unless a float64 reference is traced) instead of the interleaved
+    float32 records of ray_dtype. The "origin" and "direction" keys of ray_dtype are
+    supported, so the ray and surface helpers accept either form.
+
+    Either the origins or the directions may be a single vector shared by every ray,
+    like the center of a pinhole camera or the axis of an orthographic one. The keys
+    then return a read-only broadcast view, while the kernels reading the stored
+    arrays through get_ray_arrays compute the terms of the shared vector only once.
+
+    Like the pixel indices, the optional source surfaces, the scene index of the lens
+    every ray left, follow the rays through compaction.
+    """
+
+    def __init__(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        pixel_indices: np.ndarray = None,
+        dtype=np.float32,
+        source_surfaces: np.ndarray = None,
+    ):
+        """
+        Create a new RayBatch.
+
+        The batch takes ownership of the arrays: those already contiguous in the
+        compute dtype are stored without a copy, and compact writes the kept rays
+        back into them. Pass copies of the arrays the caller still needs.
+
+        Args:
+            origins: Ray origins (Nx3), or one origin (3,) shared by every ray
+            directions: Ray directions (Nx3), or one direction (3,) shared by every ray
+            pixel_indices: Optional index of the originating pixel for each ray
+            dtype: Compute dtype of the batch
+            source_surfaces: Optional scene index of the lens every ray left
+        """
+        origins = np.ascontiguousarray(origins, dtype=dtype)
+        directions = np.ascontiguousarray(directions, dtype=dtype)
+        if origins.ndim == 1 and directions.ndim == 1:
+            raise ValueError("Only one of origins and directions can be shared.")
+        if origins.ndim == directions.ndim and origins.shape != directions.shape:
+            raise ValueError("Origins and directions arrays must have the same shape.")
+        self.origins = origins
+        self.directions = directions
+        self.pixel_indices = pixel_indices
+        self.source_surfaces = source_surfaces
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.origins.dtype
+
+    @property
+    def shared_origin(self) -> bool:
+        return self.origins.ndim == 1
+
+    @property
+    def shared_direction(self) -> bool:
+        return self.directions.ndim == 1
+
+    @staticmethod
+    def from_rays(
+        rays: np.ndarray, pixel_indices: np.ndarray = None, dtype=np.float32
+    ) -> "RayBatch":
+        """
+        Create a RayBatch from a ray_dtype array.
+
+        Args:
+            rays: Array of rays (ray_dtype)
+            pixel_indices: Optional index of the originating pixel for each ray
+            dtype: Compute dtype of the batch
+
+        Returns:
+            New RayBatch instance
+        """
+        return RayBatch(rays["origin"], rays["direction"], pixel_indices, dtype)
+
+    def to_rays(self) -> np.ndarray:
+        """
+        Convert the batch back to a ray_dtype array.
+
+        Returns:
+            Array of rays (ray_dtype)
+        """
+        return build_rays(self["origin"], self["direction"])
+
+    @staticmethod
+    def concatenate(batches: List["RayBatch"]) -> "RayBatch":
+        """
+        Join several batches into one. Pixel indices are kept only if every batch has them.
+        """
+        pixel_indices = None
+        if all(batch.pixel_indices is not None for batch in batches):
+            pixel_indices = np.concatenate([batch.pixel_indices for batch in batches])
+        return RayBatch(
+            np.concatenate([batch["origin"] for batch in batches]),
+            np.concatenate([batch["direction"] for batch in batches]),
+            pixel_indices,
+            np.result_type(*(batch.dtype for batch in batches)),
+        )
+
+    def compact(self, selection, workspace: Workspace = None) -> "RayBatch":
+        """
+        Keep only the selected rays, in selection order, reusing the existing storage,
+        the arrays the batch was created with. A shared origin or direction stays
+        shared.
+
+        Args:
+            selection: Boolean mask, index array or slice of the rays to keep
+            workspace: Optional arena for the gather temporaries of index selections
+
+        Returns:
+            The same batch, shrunk to the selected rays
+        """
+        # A shared origin or direction holds for every ray, whichever are kept
+        arrays = [
+            (name, values)
+            for name, values, shared in (
+                ("compact_origins", self.origins, self.shared_origin),
+                ("compact_directions", self.directions, self.shared_direction),
+                ("compact_pixel_indices", self.pixel_indices, False),
+                ("compact_source_surfaces", self.source_surfaces, False),
+            )
+            if values is not None and not shared
+        ]
+        if workspace is not None and not isinstance(selection, slice):
+            if selection.dtype == bool:
+                selection = np.flatnonzero(selection)
+            count = len(selection)
+            for name, values in arrays:
+                gathered = workspace.get(name, (count, *values.shape[1:]), values.dtype)
+                np.take(values, selection, axis=0, out=gathered)
+                values[:count] = gathered
+        else:
+            for _, values in arrays:
+                selected = values[selection]
+                count = len(selected)
+                values[:count] = selected
+        if not self.shared_origin:
+            self.origins = self.origins[:count]
+        if not self.shared_direction:
+            self.directions = self.directions[:count]
+        if self.pixel_indices is not None:
+            self.pixel_indices = self.pixel_indices[:count]
+        if self.source_surfaces is not None:
+            self.source_surfaces = self.source_surfaces[:count]
+        return self
+
+    def expand_directions(self, workspace: Workspace = None) -> "RayBatch":
+        """
+        Give every ray its own copy of a shared direction, so it can be refracted.
+
+        Args:
+            workspace: Optional arena for the expanded directions
+
+        Returns:
+            The same batch, with one direction per ray
+        """
+        if self.shared_direction:
+            directions = get_buffer(
+                workspace, "expanded_directions", (len(self), 3), self.dtype
+            )
+            directions[:] = self.directions
+            self.directions = directions
+        return self
+
+    def __len__(self) -> int:
+        return len(self.directions if self.shared_origin else self.origins)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key == "origin":
+                values = self.origins
+            elif key == "direction":
+                values = self.directions
+            else:
+                raise KeyError(key)
+            return np.broadcast_to(values, (len(self), 3)) if values.ndim == 1 else values
+        return RayBatch(
+            self.origins if self.shared_origin else self.origins[key],
+            self.directions if self.shared_direction else self.directions[key],
+            None if self.pixel_indices is None else self.pixel_indices[key],
+            self.dtype,
+            None if self.source_surfaces is None else self.source_surfaces[key],
+        )
+
+
+def get_ray_arrays(rays):
+    """
+    Get the origins and directions of rays as stored, a shared one as a single vector.
+
+    Args:
+        rays: Rays (ray_dtype or RayBatch)
+
+    Returns:
+        Tuple of the origins (Nx3 or 3) and the directions (Nx3 or 3)
+    """
+    if isinstance(rays, RayBatch):
+        return rays.origins, rays.directions
+    return rays["origin"], rays["direction"]
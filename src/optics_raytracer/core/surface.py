@@ -1,5 +1,6 @@
 import numpy as np
 from optics_raytracer.core.primitives import vector_dtype
+from optics_raytracer.core.ray_batch import get_ray_arrays
 
 surface_dtype = np.dtype(
     [
@@ -9,19 +10,30 @@ surface_dtype = np.dtype(
 )
 
 
-def get_surface_hit_ts(rays, surface_point, surface_normal, t_max=100000) -> np.ndarray:
+def get_surface_hit_ts(
+    rays, surface_point, surface_normal, t_max=100000, out=None
+) -> np.ndarray:
     """
     Get the t of intersection of rays with a surface.
     surface_point - vec3
     surface_normal - vec3
+    out - optional (N,) result buffer
+    A shared origin or direction of a RayBatch gives its term once, broadcast over the rays.
+    A normal along a world axis only reads that component of the rays.
     """
     P0 = surface_point
     n = surface_normal
-    d_array = rays["direction"]
-    O = rays["origin"]
-    divisor = np.matvec(d_array, n)
-    divisor[divisor == 0] = 1e-10
-    t_array = np.matvec(P0 - O, n) / divisor
+    O, d_array = get_ray_arrays(rays)
+    axes = np.flatnonzero(n)
+    if len(axes) == 1:
+        axis = axes[0]
+        divisor = np.atleast_1d(d_array[..., axis] * n[axis])
+        divisor[divisor == 0] = 1e-10
+        t_array = np.divide((P0[axis] - O[..., axis]) * n[axis], divisor, out=out)
+    else:
+        divisor = np.atleast_1d(np.matvec(d_array, n))
+        divisor[divisor == 0] = 1e-10
+        t_array = np.divide(np.matvec(P0 - O, n), divisor, out=out)
     t_array[t_array < 1e-6] = np.inf  # Negatives or at the beginning
     t_array[t_array > t_max] = np.inf
     return t_array
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class Workspace:
+    """
+    Arena of reusable scratch buffers for the tracer's per-depth temporaries.
+
+    Buffers are keyed by name and only reallocated when a larger one is requested,
+    so after the largest wave has been traced no further allocations happen.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+        self.allocation_count = 0
+        self.allocated_bytes = 0
+
+    def get(self, name: str, shape, dtype=np.float32) -> np.ndarray:
+        """
+        Get a buffer of the given shape and dtype, reusing the storage of the name.
+
+        Args:
+            name: Key of the buffer, one per distinct temporary
+            shape: Shape of the requested buffer
+            dtype: Data type of the requested buffer
+
+        Returns:
+            Uninitialized array view over the reused storage
+        """
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.dtype != dtype or buffer.size < size:
+            buffer = np.empty(size, dtype=dtype)
+            self.buffers[name] = buffer
+            self.allocation_count += 1
+            self.allocated_bytes += buffer.nbytes
+        return buffer[:size].reshape(shape)
+
+
+def get_buffer(workspace: Workspace, name: str, shape, dtype=np.float32) -> np.ndarray:
+    """
+    Get a buffer from the workspace, or a fresh array when there is no workspace.
+    """
+    if workspace is None:
+        return np.empty(shape, dtype=dtype)
+    return workspace.get(name, shape, dtype)
@@ -1,6 +1,7 @@
 import numpy as np
 
 from optics_raytracer.optics.colored_object import ColoredObject
+from optics_raytracer.optics.object_registry import register_object_type
 from optics_raytracer.core.primitives import vector_dtype
 
 circle_dtype = np.dtype(
@@ -65,14 +66,16 @@ class Circle:
         # Vector from center to each point
         center_to_point = points_array - circle_array["center"]
 
-        # Then check if points are within radius
+        # Then check if points are within radius, comparing squared distances
         within_radius = (
-            np.linalg.norm(center_to_point, axis=1) <= circle_array["radius"]
+            np.einsum("ij,ij->i", center_to_point, center_to_point)
+            <= circle_array["radius"] ** 2
         )
 
         return within_radius
 
 
+@register_object_type
 class ColoredCircle(ColoredObject):
     """
     A circle that can return colors for points that hit its surface.
@@ -89,6 +92,9 @@ class ColoredCircle(ColoredObject):
         self.circle = circle
         self.color = color
 
+    def get_surface(self) -> Circle:
+        return self.circle
+
     def get_colors(self, points: np.ndarray) -> np.ndarray:
         """
         Get colors for an array of points on its surface.
@@ -110,3 +116,40 @@ class ColoredCircle(ColoredObject):
         colors[hits_mask] = self.color
 
         return colors
+
+    def get_colors_at_uv(self, uvs: np.ndarray) -> np.ndarray:
+        """
+        Get colors for an array of local surface coordinates.
+
+        Args:
+            uvs: Array of (u, v) coordinates (Nx2) relative to the circle center
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+            Coordinates outside the circle will have color [0,0,0]
+        """
+        colors = np.zeros((len(uvs), 3), dtype=uvs.dtype)
+        hits_mask = np.einsum("ij,ij->i", uvs, uvs) <= self.circle.radius**2
+        colors[hits_mask] = self.color
+        return colors
+
+    @classmethod
+    def shade(cls, objects, uvs: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """
+        Get the colors of hits on colored circles with one gather from their colors.
+
+        Args:
+            objects: Colored circles
+            uvs: Array of (u, v) coordinates (Nx2) of the hits relative to their circle center
+            ids: Index in objects of the circle hit by each ray (N,)
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+            Coordinates outside their circle will have color [0,0,0]
+        """
+        colors = np.array([obj.color for obj in objects], dtype=uvs.dtype)
+        radii = np.array([obj.circle.radius for obj in objects])
+        colors = colors.reshape(-1, 3)[ids]
+        outside = np.einsum("ij,ij->i", uvs, uvs) > radii[ids] ** 2
+        colors[outside] = 0
+        return colors
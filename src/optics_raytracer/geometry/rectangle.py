@@ -1,6 +1,7 @@
 import numpy as np
 
 from optics_raytracer.optics.colored_object import ColoredObject
+from optics_raytracer.optics.object_registry import register_object_type
 from optics_raytracer.core.primitives import vector_dtype
 
 rectangle_dtype = np.dtype(
@@ -93,6 +94,15 @@ class Rectangle:
         v = np.cross(rectangle_array["normal"], rectangle_array["u_vector"])[
             :, np.newaxis
         ]
+        u_axes, v_axes = np.flatnonzero(u), np.flatnonzero(v)
+        if len(u_axes) == 1 and len(v_axes) == 1:
+            # Axis-aligned, the projections are single components of the vectors
+            return np.logical_and(
+                np.abs(middle_to_point_vector_array[:, u_axes[0]])
+                <= rectangle_array["width"] / 2,
+                np.abs(middle_to_point_vector_array[:, v_axes[0]])
+                <= rectangle_array["height"] / 2,
+            )
         u_projection_vectors = np.matmul(
             np.matmul(u, u.T) / np.matmul(u.T, u), middle_to_point_vector_array.T
         ).T
@@ -108,6 +118,7 @@ class Rectangle:
         )
 
 
+@register_object_type
 class ColoredRectangle(ColoredObject):
     """
     A rectangle that can return colors for points that hit its surface.
@@ -124,6 +135,9 @@ class ColoredRectangle(ColoredObject):
         self.rectangle = rectangle
         self.color = color
 
+    def get_surface(self) -> Rectangle:
+        return self.rectangle
+
     def get_colors(self, points: np.ndarray) -> np.ndarray:
         """
         Get colors for an array of points on its surface.
@@ -142,3 +156,31 @@ class ColoredRectangle(ColoredObject):
         colors[:] = self.color
 
         return colors
+
+    def get_colors_at_uv(self, uvs: np.ndarray) -> np.ndarray:
+        """
+        Get colors for an array of local surface coordinates.
+
+        Args:
+            uvs: Array of (u, v) coordinates (Nx2) relative to the rectangle center
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        return np.tile(np.asarray(self.color, dtype=uvs.dtype), (len(uvs), 1))
+
+    @classmethod
+    def shade(cls, objects, uvs: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """
+        Get the colors of hits on colored rectangles with one gather from their colors.
+
+        Args:
+            objects: Colored rectangles
+            uvs: Array of (u, v) coordinates (Nx2) of the hits on their rectangle
+            ids: Index in objects of the rectangle hit by each ray (N,)
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        colors = np.array([obj.color for obj in objects], dtype=uvs.dtype)
+        return colors.reshape(-1, 3)[ids]
@@ -0,0 +1,45 @@
+import numpy as np
+from optics_raytracer.objects.opaque_object import OpaqueObject
+from optics_raytracer.optics.object_registry import register_object_type
+from optics_raytracer.geometry.circle import Circle
+
+
+@register_object_type
+class ApertureStop(OpaqueObject):
+    """
+    An opaque annulus, like an aperture or field stop, letting rays through its hole.
+    """
+
+    def __init__(
+        self,
+        center: np.ndarray,
+        normal: np.ndarray,
+        outer_radius: float,
+        inner_radius: float,
+        color: np.ndarray = np.zeros(3),
+    ):
+        """
+        Create a new ApertureStop.
+
+        Args:
+            center: Center point of the stop in 3D space
+            normal: Normal vector of the stop plane
+            outer_radius: Radius of the outer edge of the ring
+            inner_radius: Radius of the hole at the center
+            color: RGB color (3-element array) of the rays stopped by the ring, with
+                values between 0 and 1
+        """
+        if not 0 <= inner_radius < outer_radius:
+            raise ValueError(
+                f"Inner radius must be in [0, {outer_radius}), got {inner_radius}"
+            )
+        self.inner_radius = inner_radius
+        super().__init__(color)
+
+        self.circle = Circle.build(center=center, radius=outer_radius, normal=normal)
+
+    def get_surface(self) -> Circle:
+        return self.circle
+
+    def get_hole_radius(self) -> float:
+        return self.inner_radius
@@ -0,0 +1,54 @@
+import numpy as np
+from optics_raytracer.objects.opaque_object import OpaqueObject
+from optics_raytracer.optics.object_registry import register_object_type
+from optics_raytracer.geometry.rectangle import Rectangle
+
+
+@register_object_type
+class Baffle(OpaqueObject):
+    """
+    An opaque rectangular plate with a round hole at its center, like a baffle or
+    the wall of a lens barrel.
+    """
+
+    def __init__(
+        self,
+        middle_point: np.ndarray,
+        normal: np.ndarray,
+        u_vector: np.ndarray,
+        width: float,
+        height: float,
+        hole_radius: float,
+        color: np.ndarray = np.zeros(3),
+    ):
+        """
+        Create a new Baffle.
+
+        Args:
+            middle_point: Center point of the plate and of its hole in 3D space
+            normal: Normal vector of the plate
+            u_vector: Vector defining the horizontal axis of the plate
+            width: Width of the plate
+            height: Height of the plate
+            hole_radius: Radius of the hole, 0 for a solid plate
+            color: RGB color (3-element array) of the rays stopped by the plate, with
+                values between 0 and 1
+        """
+        if hole_radius < 0:
+            raise ValueError(f"Hole radius must be non-negative, got {hole_radius}")
+        self.hole_radius = hole_radius
+        super().__init__(color)
+
+        self.rectangle = Rectangle.build(
+            middle_point=middle_point,
+            normal=normal,
+            width=width,
+            height=height,
+            u_vector=u_vector,
+        )
+
+    def get_surface(self) -> Rectangle:
+        return self.rectangle
+
+    def get_hole_radius(self) -> float:
+        return self.hole_radius
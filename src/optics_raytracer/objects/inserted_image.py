@@ -1,9 +1,11 @@
 import numpy as np
 from PIL import Image
 from optics_raytracer.optics.colored_object import ColoredObject
+from optics_raytracer.optics.object_registry import register_object_type
 from optics_raytracer.geometry.rectangle import Rectangle
 
 
+@register_object_type
 class InsertedImage(ColoredObject):
     """
     A rectangular image that can be inserted into the scene and return colors for points that hit its surface.
@@ -31,6 +33,7 @@ class InsertedImage(ColoredObject):
         """
         # Load and convert image to RGB
         self.image = Image.open(image_path).convert("RGB")
+        self.pixels = np.asarray(self.image, dtype=np.float32) / np.float32(255)
         self.width = width
         self.height = height
 
@@ -43,6 +46,9 @@ class InsertedImage(ColoredObject):
             u_vector=u_vector,
         )
 
+    def get_surface(self) -> Rectangle:
+        return self.rectangle
+
     def get_colors(self, points: np.ndarray) -> np.ndarray:
         """
         Get colors for an array of points on its surface (assumes they are on the surface).
@@ -52,33 +58,40 @@ class InsertedImage(ColoredObject):
 
         Returns:
             Array of colors (Nx3) in RGB format with values between 0 and 1
-            Points that don't hit the image will have color [0,0,0]
         """
-        # Create empty array of black colors
-        colors = np.zeros_like(points)
-
         # Get vectors from center to points
         center_to_points = points - self.rectangle.middle_point
 
         # Get u and v components
         u = self.rectangle.u_vector
-        # Making negative, as y in image is supposed to be pointing "down"
-        v = -np.cross(self.rectangle.normal, u)
+        v = np.cross(self.rectangle.normal, u)
 
         u = u / np.linalg.norm(u)
         v = v / np.linalg.norm(v)
 
+        return self.get_colors_at_uv(
+            np.column_stack([np.dot(center_to_points, u), np.dot(center_to_points, v)])
+        )
+
+    def get_colors_at_uv(self, uvs: np.ndarray) -> np.ndarray:
+        """
+        Get colors for an array of local surface coordinates.
+
+        Args:
+            uvs: Array of (u, v) coordinates (Nx2) relative to the image center
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
         # Calculate image coordinates (0-1 range)
-        u_coords = np.dot(center_to_points, u) / self.width + 0.5
-        v_coords = np.dot(center_to_points, v) / self.height + 0.5
+        # Making v negative, as y in image is supposed to be pointing "down"
+        u_coords = uvs[:, 0] / self.width + 0.5
+        v_coords = -uvs[:, 1] / self.height + 0.5
 
         # Convert to pixel coordinates
-        img_width, img_height = self.image.size
+        img_height, img_width = self.pixels.shape[:2]
         x = np.clip((u_coords * img_width).astype(int), 0, img_width - 1)
         y = np.clip((v_coords * img_height).astype(int), 0, img_height - 1)
 
-        # Get colors from image
-        for i, (xi, yi) in enumerate(zip(x, y)):
-            colors[i] = np.array(self.image.getpixel((xi, yi))) / 255.0
-
-        return colors
+        # Texels hold 8-bit values, float32 stores them exactly for either precision
+        return self.pixels[y, x].astype(uvs.dtype, copy=False)
@@ -0,0 +1,64 @@
+import numpy as np
+from optics_raytracer.optics.colored_object import ColoredObject
+
+
+class OpaqueObject(ColoredObject):
+    """
+    Base class for opaque objects of one flat color, like stops and baffles.
+
+    Rays hitting the object end there with its color, so the light it blocks is not
+    traced through the lenses behind it. Subclasses only build the full surface and
+    give the radius of its hole, which is cut out when intersecting, and are
+    registered with register_object_type themselves.
+    """
+
+    def __init__(self, color: np.ndarray):
+        """
+        Create a new OpaqueObject.
+
+        Args:
+            color: RGB color (3-element array) of the rays stopped by the object, with
+                values between 0 and 1
+        """
+        self.color = color
+
+    def get_colors(self, points: np.ndarray) -> np.ndarray:
+        """
+        Get colors for an array of points on the object (assumes they are on it).
+
+        Args:
+            points: Array of points (Nx3)
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        return np.tile(np.asarray(self.color, dtype=points.dtype), (len(points), 1))
+
+    def get_colors_at_uv(self, uvs: np.ndarray) -> np.ndarray:
+        """
+        Get colors for an array of local surface coordinates.
+
+        Args:
+            uvs: Array of (u, v) coordinates (Nx2) relative to the surface center
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        return np.tile(np.asarray(self.color, dtype=uvs.dtype), (len(uvs), 1))
+
+    @classmethod
+    def shade(cls, objects, uvs: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """
+        Get the colors of hits on objects of this type with one gather from their
+        colors.
+
+        Args:
+            objects: Objects of this type
+            uvs: Array of (u, v) coordinates (Nx2) of the hits on their object
+            ids: Index in objects of the object hit by each ray (N,)
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        colors = np.array([obj.color for obj in objects], dtype=uvs.dtype)
+        return colors.reshape(-1, 3)[ids]
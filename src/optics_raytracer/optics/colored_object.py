@@ -1,10 +1,19 @@
 from abc import ABC, abstractmethod
+from typing import List
 import numpy as np
 
+from optics_raytracer.core.grouping import group_by_index
+
 
 class ColoredObject(ABC):
     """
     Abstract base class for objects that can return colors for given points.
+
+    The tracers handle objects by type: every concrete type is registered with
+    register_object_type, and the objects of one type are shaded in one batched
+    shade call, whatever their number. Every object is intersected through the
+    Rectangle or Circle returned by get_surface, packed with the other surfaces of
+    the scene.
     """
 
     @abstractmethod
@@ -19,3 +28,63 @@ class ColoredObject(ABC):
             Array of colors (Nx3) in RGB format with values between 0 and 1
         """
         pass
+
+    @abstractmethod
+    def get_colors_at_uv(self, uvs: np.ndarray) -> np.ndarray:
+        """
+        Get colors for an array of local surface coordinates.
+
+        Args:
+            uvs: Array of (u, v) coordinates (Nx2) along the surface axes, relative to its center
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        pass
+
+    @abstractmethod
+    def get_surface(self):
+        """
+        Get the planar surface the object lies on.
+
+        Returns:
+            Rectangle or Circle geometry, packed into the scene for intersection
+        """
+        pass
+
+    def get_hole_radius(self) -> float:
+        """
+        Get the radius of the round hole cut at the center of the surface.
+
+        Rays going through the hole miss the object and carry on, like rays
+        passing outside of it.
+
+        Returns:
+            Radius of the hole, 0 for a solid surface
+        """
+        return 0.0
+
+    @classmethod
+    def shade(
+        cls, objects: List["ColoredObject"], uvs: np.ndarray, ids: np.ndarray
+    ) -> np.ndarray:
+        """
+        Get the colors of hits on objects of this type in one batched call.
+
+        Types whose color follows from a table of per-object values override this
+        with a single gather; the default shades the hits object by object.
+
+        Args:
+            objects: Objects of this type
+            uvs: Array of (u, v) coordinates (Nx2) of the hits on their object
+            ids: Index in objects of the object hit by each ray (N,)
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        colors = np.empty((len(uvs), 3), dtype=uvs.dtype)
+        order, offsets = group_by_index(ids, len(objects))
+        for index in np.flatnonzero(np.diff(offsets)):
+            group = order[offsets[index] : offsets[index + 1]]
+            colors[group] = objects[index].get_colors_at_uv(uvs[group])
+        return colors
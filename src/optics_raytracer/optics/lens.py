@@ -2,11 +2,13 @@ import numpy as np
 
 from optics_raytracer.core.ray import build_rays
 from optics_raytracer.geometry.circle import circle_dtype
+from optics_raytracer.optics.spectrum import get_power_scales
 
 lens_dtype = np.dtype(
     [
         *circle_dtype.descr,  # Inherit circle fields
-        ("focal_distance", np.float32),  # Focal distance of the lens
+        ("focal_distance", np.float32),  # Focal distance of the lens at the d line
+        ("abbe_number", np.float32),  # Dispersion of the glass, 0 for none
     ]
 )
 
@@ -33,9 +35,17 @@ class Lens:
     def focal_distance(self) -> float:
         return self.array["focal_distance"]
 
+    @property
+    def abbe_number(self) -> float:
+        return self.array["abbe_number"]
+
     @staticmethod
     def build(
-        center: np.ndarray, radius: float, normal: np.ndarray, focal_distance: float
+        center: np.ndarray,
+        radius: float,
+        normal: np.ndarray,
+        focal_distance: float,
+        abbe_number: float = 0.0,
     ) -> "Lens":
         """
         Create a new Lens instance.
@@ -44,19 +54,29 @@ class Lens:
             center: 3D center point of the lens
             radius: Radius of the lens
             normal: Normal vector of the lens surface
-            focal_distance: Focal distance of the lens (in decimeters)
+            focal_distance: Focal distance of the lens (in decimeters) at the d line
+            abbe_number: Abbe number of the glass, lower values disperse more
+                (crown glass is around 60, flint glass around 30), 0 for none
 
         Returns:
             New Lens instance
         """
+        if abbe_number < 0:
+            raise ValueError(f"Abbe number cannot be negative, got {abbe_number}")
         normal = normal / np.linalg.norm(normal)  # Normalize
         return Lens(
-            np.array((center, normal, radius, focal_distance), dtype=lens_dtype)
+            np.array(
+                (center, normal, radius, focal_distance, abbe_number), dtype=lens_dtype
+            )
         )
         
     @staticmethod
     def build_from_magnification(
-        center: np.ndarray, radius: float, normal: np.ndarray, magnification: float
+        center: np.ndarray,
+        radius: float,
+        normal: np.ndarray,
+        magnification: float,
+        abbe_number: float = 0.0,
     ) -> "Lens":
         """
         Create a new Lens instance using magnification power.
@@ -66,11 +86,11 @@ class Lens:
             radius: Radius of the lens
             normal: Normal vector of the lens surface
             magnification: Magnifying power of the lens (M = 1 + 2.5/f, where f is focal distance in decimeters)
+            abbe_number: Abbe number of the glass, 0 for no dispersion
 
         Returns:
             New Lens instance
         """
-        normal = normal / np.linalg.norm(normal)  # Normalize
         
         # Convert magnification to focal distance using M = 1 + 2.5/f
         # Therefore f = 2.5 / (M - 1)
@@ -79,9 +99,19 @@ class Lens:
         
         focal_distance = 2.5 / (magnification - 1)
         
-        return Lens(
-            np.array((center, normal, radius, focal_distance), dtype=lens_dtype)
-        )
+        return Lens.build(center, radius, normal, focal_distance, abbe_number)
+
+    def get_power_scales(self, wavelengths: np.ndarray) -> np.ndarray:
+        """
+        Get the optical power of the lens at each wavelength, relative to the d line.
+
+        Args:
+            wavelengths: Array of wavelengths in nanometers
+
+        Returns:
+            Array of power ratios, one per wavelength
+        """
+        return get_power_scales(float(self.abbe_number), wavelengths)
 
     def get_new_rays(
         self, hitting_rays: np.ndarray, hit_points: np.ndarray
@@ -96,6 +126,30 @@ class Lens:
         Returns:
             Array of refracted rays (ray_dtype)
         """
+        return build_rays(
+            hit_points, self.get_new_directions(hitting_rays["direction"], hit_points)
+        )
+
+    def get_new_directions(
+        self,
+        directions: np.ndarray,
+        hit_points: np.ndarray,
+        out: np.ndarray = None,
+        power_scales: np.ndarray = None,
+    ) -> np.ndarray:
+        """
+        Calculate the ray directions after refraction through the lens.
+
+        Args:
+            directions: Directions of the incoming rays (Nx3)
+            hit_points: Array of hit points on lens surface (Nx3)
+            out: Optional result buffer (Nx3), may be the directions array itself
+            power_scales: Optional optical power of every ray (N,) relative to the
+                lens power, from get_power_scales at the wavelength of the ray
+
+        Returns:
+            Array of refracted directions (Nx3)
+        """
         # Working based on this idea:
         # - parallel rays meet at the focal distance
         # - the ray passing through the center of the lens doesn't change direction
@@ -104,16 +158,25 @@ class Lens:
         # - the rest is just getting the vector from hit_point to the point where the original ray would hit the focal plane, adding the self.center - hit_point vector, and we have the new direction
         # - then we need to normalize it
         # - we also swap for cases when the normal is in the direction of the ray origin
-        normal_away_from_origin = np.matvec(hitting_rays["direction"], self.normal) > 0
-        scale = self.focal_distance / np.matvec(hitting_rays["direction"], self.normal)
-        new_directions = hitting_rays["direction"] * scale[:, np.newaxis] + (
-            self.center - hit_points
+        directions_along_normal = np.matvec(directions, self.normal)
+        normal_away_from_origin = directions_along_normal > 0
+        focal_distances = self.focal_distance
+        if power_scales is not None:
+            focal_distances = focal_distances / power_scales
+        scale = np.divide(
+            focal_distances, directions_along_normal, out=directions_along_normal
         )
+        new_directions = np.multiply(directions, scale[:, np.newaxis], out=out)
+        new_directions += self.center
+        new_directions -= hit_points
         # The issue arises here
-        new_directions = new_directions / np.linalg.norm(
-            new_directions, axis=1, keepdims=True
+        norms = np.einsum("ij,ij->i", new_directions, new_directions, out=scale)
+        new_directions /= np.sqrt(norms, out=norms)[:, np.newaxis]
+        np.negative(
+            new_directions,
+            out=new_directions,
+            where=~normal_away_from_origin[:, np.newaxis],
         )
-        new_directions[~normal_away_from_origin] *= -1
         if self.focal_distance < 0:
             new_directions *= -1
-        return build_rays(hit_points, new_directions)
+        return new_directions
@@ -0,0 +1,216 @@
+import numpy as np
+
+from optics_raytracer.core.primitives import vector_dtype
+from optics_raytracer.geometry.rectangle import Rectangle
+
+lens_array_dtype = np.dtype(
+    [
+        ("middle_point", *vector_dtype),  # Center of the array
+        ("normal", *vector_dtype),  # Normal vector of the array plane
+        ("u_vector", *vector_dtype),  # Direction of the rows of cells
+        ("pitch", np.float32),  # Distance between neighbouring cell centers
+        ("cell_radius", np.float32),  # Radius of the lens of every cell
+        ("columns", np.int32),  # Number of cells along the u vector
+        ("rows", np.int32),  # Number of cells along the v vector
+    ]
+)
+
+
+class LensArray:
+    """
+    Wrapper class for lens_array_dtype numpy arrays with helper methods.
+
+    A planar grid of thin lenses sharing one plane, with a focal distance per cell.
+    The whole grid is a single rectangular surface of the scene: a ray hitting it
+    finds its cell by integer division of its plane coordinates, and every ray is
+    refracted by the lens of its own cell in one vectorized pass. Rays hitting the
+    plane between the cell lenses go on unchanged.
+    """
+
+    def __init__(self, grid_array: np.ndarray, focal_distances: np.ndarray):
+        if grid_array.dtype != lens_array_dtype:
+            raise ValueError(f"Input array must have dtype {lens_array_dtype}")
+        if focal_distances.shape != (grid_array["rows"], grid_array["columns"]):
+            raise ValueError("Focal distances must have one value per cell (rows x columns)")
+        self.array = grid_array
+        self.focal_distances = focal_distances
+
+    @property
+    def middle_point(self) -> np.ndarray:
+        return self.array["middle_point"]
+
+    @property
+    def normal(self) -> np.ndarray:
+        return self.array["normal"]
+
+    @property
+    def u_vector(self) -> np.ndarray:
+        return self.array["u_vector"]
+
+    @property
+    def v_vector(self) -> np.ndarray:
+        return np.cross(self.normal, self.u_vector)
+
+    @property
+    def pitch(self) -> float:
+        return self.array["pitch"]
+
+    @property
+    def cell_radius(self) -> float:
+        return self.array["cell_radius"]
+
+    @property
+    def columns(self) -> int:
+        return int(self.array["columns"])
+
+    @property
+    def rows(self) -> int:
+        return int(self.array["rows"])
+
+    @property
+    def rectangle(self) -> Rectangle:
+        """
+        Rectangle covering every cell of the array.
+        """
+        return Rectangle.build(
+            middle_point=self.middle_point,
+            normal=self.normal,
+            width=self.columns * self.pitch,
+            height=self.rows * self.pitch,
+            u_vector=self.u_vector,
+        )
+
+    @staticmethod
+    def build(
+        middle_point: np.ndarray,
+        normal: np.ndarray,
+        u_vector: np.ndarray,
+        pitch: float,
+        cell_radius: float,
+        columns: int,
+        rows: int,
+        focal_distances,
+    ) -> "LensArray":
+        """
+        Create a new LensArray instance.
+
+        Args:
+            middle_point: Center point of the array
+            normal: Normal vector of the array plane
+            u_vector: Direction of the rows of cells, in the array plane
+            pitch: Distance between neighbouring cell centers
+            cell_radius: Radius of the lens of every cell, at most half the pitch
+            columns: Number of cells along the u vector
+            rows: Number of cells along the v vector
+            focal_distances: Focal distance of every cell (in decimeters), either one
+                value for all of them or an array of rows x columns values
+
+        Returns:
+            New LensArray instance
+        """
+        normal = normal / np.linalg.norm(normal)  # Normalize
+        u_vector = u_vector - np.dot(u_vector, normal) * normal
+        u_vector = u_vector / np.linalg.norm(u_vector)
+        if cell_radius > pitch / 2:
+            raise ValueError("Cell radius cannot exceed half the pitch")
+        focal_distances = np.array(
+            np.broadcast_to(focal_distances, (rows, columns)), dtype=np.float32
+        )
+        return LensArray(
+            np.array(
+                (middle_point, normal, u_vector, pitch, cell_radius, columns, rows),
+                dtype=lens_array_dtype,
+            ),
+            focal_distances,
+        )
+
+    def get_cells(self, hit_points: np.ndarray):
+        """
+        Find the cell under each hit point of the array plane.
+
+        Args:
+            hit_points: Array of hit points on the array plane (Nx3)
+
+        Returns:
+            Tuple of the flat cell indices (row * columns + column), the offsets of
+            the points from their cell centers along the u and v vectors (Nx2) and
+            the mask of the points lying on a cell lens
+        """
+        offsets = hit_points - self.middle_point
+        cell_offsets = np.column_stack(
+            [np.matvec(offsets, self.u_vector), np.matvec(offsets, self.v_vector)]
+        )
+        cell_offsets /= self.pitch
+        cell_offsets += np.array(
+            [self.columns / 2, self.rows / 2], dtype=cell_offsets.dtype
+        )
+        cells = np.floor(cell_offsets)
+        np.clip(cells[:, 0], 0, self.columns - 1, out=cells[:, 0])
+        np.clip(cells[:, 1], 0, self.rows - 1, out=cells[:, 1])
+        cell_offsets -= cells
+        cell_offsets -= 0.5
+        cell_offsets *= self.pitch
+
+        cells = cells.astype(np.int64)
+        cell_indices = cells[:, 1] * self.columns + cells[:, 0]
+        inside = np.einsum("ij,ij->i", cell_offsets, cell_offsets) <= self.cell_radius**2
+        return cell_indices, cell_offsets, inside
+
+    def get_power_scales(self, wavelengths: np.ndarray) -> np.ndarray:
+        """
+        Get the optical power of the cells at each wavelength, relative to their power.
+        The cells of an array don't disperse light.
+
+        Args:
+            wavelengths: Array of wavelengths in nanometers
+
+        Returns:
+            Array of ones, one per wavelength
+        """
+        return np.ones(len(wavelengths))
+
+    def get_new_directions(
+        self,
+        directions: np.ndarray,
+        hit_points: np.ndarray,
+        out: np.ndarray = None,
+        power_scales: np.ndarray = None,
+    ) -> np.ndarray:
+        """
+        Calculate the ray directions after refraction through the cells of the array.
+
+        Every ray is refracted like by a Lens at the center of its cell, with the
+        focal distance of that cell. Rays between the cell lenses keep their direction.
+
+        Args:
+            directions: Directions of the incoming rays (Nx3)
+            hit_points: Array of hit points on the array plane (Nx3)
+            out: Optional result buffer (Nx3), may be the directions array itself
+            power_scales: Optional optical power of every ray (N,) relative to the
+                power of its cell
+
+        Returns:
+            Array of refracted directions (Nx3)
+        """
+        cell_indices, cell_offsets, inside = self.get_cells(hit_points)
+        focal_distances = self.focal_distances.reshape(-1)[cell_indices]
+        if power_scales is not None:
+            focal_distances = focal_distances / power_scales
+
+        # Same construction as Lens.get_new_directions, where the cell center minus
+        # the hit point is the negated in-plane offset
+        directions_along_normal = np.matvec(directions, self.normal)
+        flipped = (directions_along_normal <= 0) ^ (focal_distances < 0)
+        new_directions = directions * (focal_distances / directions_along_normal)[
+            :, np.newaxis
+        ]
+        new_directions -= cell_offsets[:, :1] * self.u_vector
+        new_directions -= cell_offsets[:, 1:] * self.v_vector
+        new_directions /= np.linalg.norm(new_directions, axis=1)[:, np.newaxis]
+        np.negative(new_directions, out=new_directions, where=flipped[:, np.newaxis])
+
+        if out is None:
+            out = np.empty_like(directions)
+        np.copyto(out, directions, where=~inside[:, np.newaxis])
+        np.copyto(out, new_directions, where=inside[:, np.newaxis])
+        return out
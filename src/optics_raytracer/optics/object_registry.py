@@ -0,0 +1,59 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from optics_raytracer.optics.colored_object import ColoredObject
+
+# Colored object types the tracers accept, in registration order
+OBJECT_TYPES: List[type] = []
+
+
+def register_object_type(object_type: type) -> type:
+    """
+    Class decorator registering a colored object type with the tracers.
+
+    A registered type promises that its shade class method handles any list of its
+    own instances, so the tracers call it once per type.
+
+    Args:
+        object_type: ColoredObject subclass
+
+    Returns:
+        The same class
+    """
+    if not issubclass(object_type, ColoredObject):
+        raise TypeError(f"{object_type.__name__} is not a ColoredObject")
+    if object_type not in OBJECT_TYPES:
+        OBJECT_TYPES.append(object_type)
+    return object_type
+
+
+def group_objects_by_type(
+    objects: List[ColoredObject],
+) -> List[Tuple[type, np.ndarray]]:
+    """
+    Split the colored objects into groups of one registered type.
+
+    Objects are grouped by their exact type: a subclass shades through its own
+    shade method, so it has to be registered itself.
+
+    Args:
+        objects: List of colored objects
+
+    Returns:
+        List of the object types with the indices of their objects, in order of
+        first appearance
+    """
+    indices = {}
+    for index, obj in enumerate(objects):
+        object_type = type(obj)
+        if object_type not in OBJECT_TYPES:
+            raise TypeError(
+                f"Unregistered colored object type {object_type.__name__}, "
+                "decorate it with register_object_type"
+            )
+        indices.setdefault(object_type, []).append(index)
+    return [
+        (object_type, np.array(type_indices, dtype=np.int64))
+        for object_type, type_indices in indices.items()
+    ]
@@ -0,0 +1,131 @@
+from typing import List
+
+import numpy as np
+
+from optics_raytracer.optics.lens import Lens, lens_dtype
+from optics_raytracer.optics.lens_array import LensArray
+
+
+class PackedLenses:
+    """
+    Table of the lenses of a scene for refracting rays of any lens at once.
+
+    The lenses are packed in a lens_dtype array, with contiguous copies of their
+    centers, normals and focal distances. Every ray gathers the row of its own lens,
+    so all the rays hitting lenses at one depth are refracted in a single vectorized
+    pass, whatever the lens count. The dot products of rays with a normal shared by
+    every lens, as in coaxial trains, skip the gather. Lens arrays find their cell
+    from the hit point and keep their own refraction, one call per array.
+    """
+
+    def __init__(self, lenses: List[Lens], array: np.ndarray, lens_rows: np.ndarray):
+        if array.dtype != lens_dtype:
+            raise ValueError(f"Input array must have dtype {lens_dtype}")
+        self.lenses = lenses
+        self.array = array
+        self.lens_rows = lens_rows
+        self.centers = np.ascontiguousarray(array["center"])
+        self.normals = np.ascontiguousarray(array["normal"])
+        self.focal_distances = np.ascontiguousarray(array["focal_distance"])
+        # Coaxial lenses share their normal, its dot products need no gather
+        self.shared_normal = (
+            self.normals[0]
+            if len(self.normals) and np.all(self.normals == self.normals[0])
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.lenses)
+
+    @staticmethod
+    def build(lenses: List[Lens]) -> "PackedLenses":
+        """
+        Pack the lenses of a scene.
+
+        Args:
+            lenses: List of lenses and lens arrays in the scene
+
+        Returns:
+            New PackedLenses instance
+        """
+        # Row of every lens in the table, -1 for the lens arrays
+        lens_rows = np.full(len(lenses), -1, dtype=np.int64)
+        rows = []
+        for lens_index, lens in enumerate(lenses):
+            if not isinstance(lens, LensArray):
+                lens_rows[lens_index] = len(rows)
+                rows.append(lens.array)
+        array = np.array(rows, dtype=lens_dtype).reshape(-1)
+        return PackedLenses(lenses, array, lens_rows)
+
+    def get_new_directions(
+        self,
+        directions: np.ndarray,
+        hit_points: np.ndarray,
+        lens_indices: np.ndarray,
+        out: np.ndarray = None,
+        power_scales: np.ndarray = None,
+    ) -> np.ndarray:
+        """
+        Calculate the ray directions after refraction through the lens each ray hit.
+
+        Args:
+            directions: Directions of the incoming rays (Nx3)
+            hit_points: Array of hit points on the lens surfaces (Nx3)
+            lens_indices: Index of the lens hit by every ray (N,)
+            out: Optional result buffer (Nx3), may be the directions array itself
+            power_scales: Optional optical power of every ray (N,) relative to the
+                power of its lens
+
+        Returns:
+            Array of refracted directions (Nx3)
+        """
+        if out is None:
+            out = np.empty_like(directions)
+        rows = self.lens_rows[lens_indices]
+        on_lenses = rows >= 0
+        if on_lenses.all():
+            return self._refract(directions, hit_points, rows, out, power_scales)
+
+        for lens_index in np.unique(lens_indices[~on_lenses]):
+            hits = lens_indices == lens_index
+            out[hits] = self.lenses[lens_index].get_new_directions(
+                directions[hits],
+                hit_points[hits],
+                power_scales=None if power_scales is None else power_scales[hits],
+            )
+        if on_lenses.any():
+            out[on_lenses] = self._refract(
+                directions[on_lenses],
+                hit_points[on_lenses],
+                rows[on_lenses],
+                None,
+                None if power_scales is None else power_scales[on_lenses],
+            )
+        return out
+
+    def _refract(self, directions, hit_points, rows, out, power_scales):
+        # Lens.get_new_directions with the center, normal and focal distance of
+        # every ray gathered from its row
+        if self.shared_normal is not None:
+            directions_along_normal = np.matvec(directions, self.shared_normal)
+        else:
+            directions_along_normal = np.einsum(
+                "ij,ij->i", directions, np.take(self.normals, rows, axis=0)
+            )
+        focal_distances = np.take(self.focal_distances, rows)
+        flipped = ~(directions_along_normal > 0) ^ (focal_distances < 0)
+        if power_scales is not None:
+            focal_distances = focal_distances / power_scales
+        scale = np.divide(
+            focal_distances, directions_along_normal, out=directions_along_normal
+        )
+        new_directions = np.multiply(directions, scale[:, np.newaxis], out=out)
+        new_directions += np.take(self.centers, rows, axis=0)
+        new_directions -= hit_points
+        norms = np.einsum("ij,ij->i", new_directions, new_directions, out=scale)
+        np.sqrt(norms, out=norms)
+        # Dividing by the negated norm flips the direction in the same pass
+        np.negative(norms, out=norms, where=flipped)
+        new_directions /= norms[:, np.newaxis]
+        return new_directions
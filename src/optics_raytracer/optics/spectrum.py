@@ -0,0 +1,67 @@
+import numpy as np
+
+# Wavelengths (in nanometers) of the Fraunhofer d, F and C lines Abbe numbers refer to
+D_LINE_WAVELENGTH = 587.6
+F_LINE_WAVELENGTH = 486.1
+C_LINE_WAVELENGTH = 656.3
+
+# Visible range (in nanometers) sampled by the spectral tracing
+VISIBLE_RANGE = (420.0, 680.0)
+
+# Peak wavelengths (in nanometers) of the red, green and blue channel responses
+CHANNEL_PEAKS = np.array([600.0, 550.0, 460.0])
+
+# Standard deviation (in nanometers) of the gaussian channel responses
+CHANNEL_WIDTH = 40.0
+
+
+def get_power_scales(abbe_number: float, wavelengths: np.ndarray) -> np.ndarray:
+    """
+    Get the optical power of a thin lens at each wavelength, relative to the d line.
+
+    The glass follows the Cauchy dispersion n = A + B / wavelength^2, whose B is set
+    by the Abbe number (n_d - 1) / (n_F - n_C). The power of a thin lens scales with
+    n - 1, so the ratio only depends on the Abbe number.
+
+    Args:
+        abbe_number: Abbe number of the glass, 0 for no dispersion
+        wavelengths: Array of wavelengths in nanometers
+
+    Returns:
+        Array of power ratios, one per wavelength, the focal distance divides by them
+    """
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    if abbe_number == 0:
+        return np.ones(len(wavelengths))
+    line_spread = F_LINE_WAVELENGTH**-2.0 - C_LINE_WAVELENGTH**-2.0
+    return 1 + (wavelengths**-2.0 - D_LINE_WAVELENGTH**-2.0) / (
+        abbe_number * line_spread
+    )
+
+
+def get_spectral_samples(count: int):
+    """
+    Sample the visible range evenly, with the weights that combine the samples to RGB.
+
+    Every channel responds to the wavelengths with a gaussian around its peak, and
+    the weights of every channel sum to 1 over the samples, so a color seen the same
+    at every wavelength combines back to itself.
+
+    Args:
+        count: Number of wavelength samples
+
+    Returns:
+        Tuple of the wavelengths in nanometers (count,) and the RGB weights of every
+        sample (count x 3)
+    """
+    if count < 1:
+        raise ValueError(f"Spectral tracing needs at least 1 sample, got {count}")
+    if count == 1:
+        wavelengths = np.array([D_LINE_WAVELENGTH])
+    else:
+        wavelengths = np.linspace(*VISIBLE_RANGE, count)
+    weights = np.exp(
+        -0.5 * ((wavelengths[:, np.newaxis] - CHANNEL_PEAKS) / CHANNEL_WIDTH) ** 2
+    )
+    weights /= weights.sum(axis=0)
+    return wavelengths, weights
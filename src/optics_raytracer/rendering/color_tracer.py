@@ -1,15 +1,36 @@
 import numpy as np
 from typing import List
 
-from optics_raytracer.geometry.circle import Circle, ColoredCircle
-from optics_raytracer.objects.inserted_image import InsertedImage
+from optics_raytracer.geometry.circle import Circle
 from optics_raytracer.utils.group_namer import GroupNamer
-from optics_raytracer.geometry.rectangle import ColoredRectangle
+from optics_raytracer.core.grouping import get_morton_codes, group_by_index
 from optics_raytracer.core.ray import get_ray_points_array_at_t_array
+from optics_raytracer.core.ray_batch import RayBatch, get_ray_arrays
+from optics_raytracer.core.workspace import Workspace, get_buffer
 from optics_raytracer.optics.colored_object import ColoredObject
 from optics_raytracer.optics.lens import Lens
-from optics_raytracer.core.surface import get_surface_hit_ts, get_surface_hit_ts_mask
+from optics_raytracer.optics.lens_array import LensArray
+from optics_raytracer.optics.object_registry import group_objects_by_type
+from optics_raytracer.optics.packed_lenses import PackedLenses
+from optics_raytracer.optics.spectrum import get_spectral_samples
 from optics_raytracer.rendering.export_3d import Exporter3D
+from optics_raytracer.scene.bvh import BVH_SURFACE_THRESHOLD, BoundingVolumeHierarchy
+from optics_raytracer.scene.lens_acceptance import LensAcceptance
+from optics_raytracer.scene.lens_visibility import LensVisibility
+from optics_raytracer.scene.packed_scene import PackedScene
+from optics_raytracer.scene.tile_binning import TileBinning
+
+# Bits per coordinate of the Z-curve cells of every surface when reordering rays
+COHERENCE_BITS = 6
+
+# Reasons for terminating rays before they leave the scene
+TERMINATION_REASONS = ("max_depth", "cycle", "ray_budget")
+
+# Previous depths whose ray states are compared when detecting cycles
+CYCLE_HISTORY = 4
+
+# Largest difference of the origin and direction components of a repeated state
+CYCLE_TOLERANCE = 1e-6
 
 
 class ColorTracer:
@@ -22,9 +43,19 @@ class ColorTracer:
         exporter: Exporter3D,
         colored_objects: List[ColoredObject],
         lenses: List[Lens],
-        default_color: np.ndarray = np.array([0, 0, 0], dtype=np.float16),
+        default_color: np.ndarray = np.array([0, 0, 0], dtype=np.float32),
         ray_sampling_rate_for_3d_export: np.float32 = np.float32(0.01),
         include_missed_rays: bool = False,
+        bvh_surface_threshold: int = BVH_SURFACE_THRESHOLD,
+        workspace: Workspace = None,
+        cull_escaping_rays: bool = False,
+        reorder_rays: bool = False,
+        max_depth: int = None,
+        detect_cycles: bool = False,
+        ray_budget: int = None,
+        terminated_color: np.ndarray = None,
+        spectral_samples: int = None,
+        dtype=np.float32,
     ):
         """
         Initialize the color tracer.
@@ -32,209 +63,519 @@ class ColorTracer:
         Args:
             exporter: 3D exporter for visualization
             colored_objects: List of colored objects in the scene
-            lenses: List of lenses in the scene
+            lenses: List of lenses and lens arrays in the scene
             default_color: Default color for rays that don't hit anything
+            bvh_surface_threshold: Surface count from which nearest hits go through a BVH
+            workspace: Optional arena reused for the per-depth temporaries
+            cull_escaping_rays: If True, rays leaving a lens in a direction that can't
+                reach any other surface are terminated right after refraction
+            reorder_rays: If True, the rays hitting each surface are also sorted along
+                a Z curve of their hit (u, v), so texture gathers and the next wave
+                visit neighbouring rays together
+            max_depth: If set, rays still going after hitting this many lenses and
+                objects are terminated
+            detect_cycles: If True, rays leaving a lens with the same origin and
+                direction as at one of the CYCLE_HISTORY previous depths are terminated
+            ray_budget: If set, at most this many ray segments are traced per
+                get_colors call, the rays over it are terminated
+            terminated_color: Color of the terminated rays, default_color if not set
+            spectral_samples: If set, rays hitting a lens are traced at this many
+                wavelengths of the visible range from there on, each refracted with
+                the dispersion of the lenses, and their colors combined to RGB
+            dtype: Compute dtype of the rays, the scene tables, the hits and the colors
         """
+        if max_depth is not None and max_depth < 1:
+            raise ValueError(f"Maximum depth must be at least 1, got {max_depth}")
         self.exporter = exporter
         self.colored_objects = colored_objects
         self.lenses = lenses
-        self.default_color = default_color
+        self.dtype = np.dtype(dtype)
+        self.default_color = np.asarray(default_color, dtype=self.dtype)
         self.ray_sampling_rate_for_3d_export = ray_sampling_rate_for_3d_export
         self.include_missed_rays = include_missed_rays
+        self.workspace = workspace
+        self.reorder_rays = reorder_rays
+        self.max_depth = max_depth
+        self.detect_cycles = detect_cycles
+        self.ray_budget = ray_budget
+        self.terminated_color = (
+            self.default_color
+            if terminated_color is None
+            else np.asarray(terminated_color, dtype=self.dtype)
+        )
+        self.scene = PackedScene.build(colored_objects, lenses, self.dtype)
+        self.packed_lenses = PackedLenses.build(lenses)
+        # Objects of one type are shaded in one call, through their type index and
+        # their index within the type
+        self.object_groups = []
+        self.object_type_indices = np.empty(len(colored_objects), dtype=np.int64)
+        self.object_type_ids = np.empty(len(colored_objects), dtype=np.int64)
+        for type_index, (object_type, indices) in enumerate(
+            group_objects_by_type(colored_objects)
+        ):
+            self.object_groups.append(
+                (object_type, [colored_objects[index] for index in indices])
+            )
+            self.object_type_indices[indices] = type_index
+            self.object_type_ids[indices] = np.arange(len(indices))
+        # Maps the hit (u, v) of every surface to [0, 1] for the Z-curve keys
+        self.coherence_scales = 0.5 / np.maximum(self.scene.extents, 1e-30)
+        self.accelerator = (
+            BoundingVolumeHierarchy.build(self.scene)
+            if len(self.scene) >= bvh_surface_threshold
+            else self.scene
+        )
+        self.lens_acceptance = (
+            LensAcceptance.build(self.scene) if cull_escaping_rays else None
+        )
+        # Per lens, the rays refracted and the ones culled by the last get_colors call
+        self.refracted_ray_counts = np.zeros(len(lenses), dtype=np.int64)
+        self.culled_ray_counts = np.zeros(len(lenses), dtype=np.int64)
+        # Per reason, the rays terminated by the last get_colors call
+        self.terminated_ray_counts = dict.fromkeys(TERMINATION_REASONS, 0)
+        # Optical power of every lens at every wavelength sample, relative to its
+        # own, and the RGB weights of the samples. Without a dispersive lens every
+        # wavelength follows the same path, so the rays are traced once
+        self.power_scales = None
+        self.wavelength_weights = None
+        if spectral_samples is not None:
+            wavelengths, weights = get_spectral_samples(spectral_samples)
+            power_scales = np.array(
+                [lens.get_power_scales(wavelengths) for lens in lenses],
+                dtype=self.dtype,
+            ).reshape(len(lenses), spectral_samples)
+            if np.any(power_scales != 1):
+                self.power_scales = power_scales
+                self.wavelength_weights = weights.astype(self.dtype)
 
         for obj in colored_objects:
-            if isinstance(obj, ColoredCircle):
-                self.exporter.add_circle(obj.circle.array, 50)
-            elif isinstance(obj, ColoredRectangle):
-                self.exporter.add_rectangle(obj.rectangle.array)
-            elif isinstance(obj, InsertedImage):
-                self.exporter.add_rectangle(obj.rectangle.array)
+            surface = obj.get_surface()
+            if isinstance(surface, Circle):
+                self.exporter.add_circle(surface.array, 50)
             else:
-                print(f"Unknown object type: {type(obj)}")
+                self.exporter.add_rectangle(surface.array)
 
         for lens in lenses:
-            self.exporter.add_circle(lens.array, 50)
+            if isinstance(lens, LensArray):
+                self.exporter.add_rectangle(lens.rectangle.array)
+            else:
+                self.exporter.add_circle(lens.array, 50)
 
-    def get_colors(self, rays: np.ndarray, depth=None) -> np.ndarray:
+    def get_colors(
+        self,
+        rays: np.ndarray,
+        tile_binning: TileBinning = None,
+        lens_visibility: LensVisibility = None,
+    ) -> np.ndarray:
         """
         Get colors for an array of rays by tracing them through the scene.
 
+        The rays are traced as wavefronts: each depth is a single batch holding every
+        ray that left a lens at the previous depth, and the resulting colors are
+        scattered back to the positions of the original rays.
+
+        The depth, cycle and ray budget limits give terminated rays the terminated
+        color and count them in terminated_ray_counts.
+
+        In spectral tracing the primary rays are shared by every wavelength, and
+        the ones hitting a lens are copied once per wavelength sample before being
+        refracted. A copy keeps its wavelength in its pixel index, sample * N plus
+        the index of its original ray, so the colors have one row per ray and
+        sample until they are combined to RGB.
+
+        With a workspace, the returned colors live in one of its buffers and are
+        only valid until the next call.
+
         Args:
-            rays: Array of rays to trace (ray_dtype)
+            rays: Array of rays to trace (ray_dtype or RayBatch, possibly with a
+                shared origin or direction)
+            tile_binning: Optional screen-space binning built for these rays, limiting
+                the primary rays to the candidate surfaces of their tiles
+            lens_visibility: Optional visibility of the lenses built for these rays,
+                limiting the rays leaving a lens to the surfaces they can reach
 
         Returns:
             Array of colors (Nx3) in RGB format with values between 0 and 1
         """
-        # Initialize output colors with default
-        colors = np.tile(self.default_color, (len(rays), 1))
-
-        # Find closest hits for all objects
-        closest_hit_ts = np.full(len(rays), np.inf, dtype=np.float32)
-        any_object_hit_mask = np.zeros(len(rays), dtype=bool)
-        ray_hits_any_lens_mask = np.zeros(len(rays), dtype=bool)
-        ray_hitting_object_indices_array = np.full(len(rays), -1)
-        hit_lens_indices_by_rays_order = np.full(len(rays), -1)
-
-        # Check colored objects
-        for obj_index, lens in enumerate(self.colored_objects):
-            if isinstance(lens, ColoredRectangle) or isinstance(lens, InsertedImage):
-                surface_point = lens.rectangle.middle_point
-                surface_normal = lens.rectangle.normal
-
-                # Get hit times and mask
-                obj_ts = get_surface_hit_ts(rays, surface_point, surface_normal)
-                obj_points = get_ray_points_array_at_t_array(rays, obj_ts)
-                obj_mask = get_surface_hit_ts_mask(obj_ts)
-                obj_mask &= lens.rectangle.get_hits_mask(
-                    lens.rectangle.array, obj_points
+        samples = 1 if self.wavelength_weights is None else len(self.wavelength_weights)
+        colors = get_buffer(
+            self.workspace, "colors", (samples * len(rays), 3), self.dtype
+        )
+        colors[:] = self.default_color
+        if samples > 1:
+            fanned = get_buffer(self.workspace, "fanned", len(rays), bool)
+            fanned[:] = False
+        wave_arrays = []
+        for name, values in zip(
+            ("wave_origins", "wave_directions"), get_ray_arrays(rays)
+        ):
+            if values.ndim == 1:
+                # Shared by every primary ray, the kernels broadcast it
+                wave_arrays.append(values.astype(self.dtype))
+                continue
+            wave_values = get_buffer(self.workspace, name, (len(rays), 3), self.dtype)
+            wave_values[:] = values
+            wave_arrays.append(wave_values)
+        origins, directions = wave_arrays
+        pixel_indices = get_buffer(self.workspace, "pixel_indices", len(rays), np.int64)
+        pixel_indices[:] = np.arange(len(rays))
+        self.refracted_ray_counts.fill(0)
+        self.culled_ray_counts.fill(0)
+        self.terminated_ray_counts = dict.fromkeys(TERMINATION_REASONS, 0)
+        wave = RayBatch(origins, directions, pixel_indices, self.dtype)
+        depth = None
+        traced_ray_count = 0
+        # Origin and direction of every ray as it left its last lenses, by depth
+        state_history = (
+            np.full((len(colors), CYCLE_HISTORY, 6), np.nan, dtype=self.dtype)
+            if self.detect_cycles
+            else None
+        )
+
+        while len(wave):
+            if self.ray_budget is not None:
+                remaining = max(self.ray_budget - traced_ray_count, 0)
+                if len(wave) > remaining:
+                    self._terminate_rays(
+                        wave, colors, slice(remaining, None), "ray_budget"
+                    )
+                    wave.compact(slice(0, remaining))
+                    if not len(wave):
+                        break
+            traced_ray_count += len(wave)
+            if depth is None and samples > 1:
+                wave = self._trace_wave(
+                    wave, colors, depth, tile_binning, lens_visibility, fanned
                 )
+            else:
+                wave = self._trace_wave(
+                    wave, colors, depth, tile_binning, lens_visibility
+                )
+            depth = 1 if depth is None else depth + 1
 
-            elif isinstance(lens, ColoredCircle):
-                surface_point = lens.circle.center
-                surface_normal = lens.circle.normal
+            if self.max_depth is not None and depth >= self.max_depth:
+                self._terminate_rays(wave, colors, slice(None), "max_depth")
+                break
+            if state_history is not None and len(wave):
+                wave = self._terminate_cycles(wave, colors, depth, state_history)
 
-                # Get hit times and mask
-                obj_ts = get_surface_hit_ts(rays, surface_point, surface_normal)
-                obj_points = get_ray_points_array_at_t_array(rays, obj_ts)
-                obj_mask = get_surface_hit_ts_mask(obj_ts)
-                obj_mask &= lens.circle.get_hits_mask(lens.circle.array, obj_points)
-            else:
-                print(f"Unknown object type: {type(lens)}")
-                continue
+        if samples > 1:
+            return self._combine_spectral_colors(colors, fanned)
+        return colors
 
-            # Update closest hits
-            closer_mask = obj_ts < closest_hit_ts
-            update_mask = obj_mask & closer_mask
-            closest_hit_ts[update_mask] = obj_ts[update_mask]
-            any_object_hit_mask[update_mask] = True
-            ray_hitting_object_indices_array[update_mask] = obj_index
-
-        # Check lenses
-        for lens_index, lens in enumerate(self.lenses):
-            lens_ts = get_surface_hit_ts(rays, lens.center, lens.normal)
-            current_lens_hit_mask = get_surface_hit_ts_mask(lens_ts)
-            current_lens_hit_mask[current_lens_hit_mask] &= Circle.get_hits_mask(
-                lens.array,
-                get_ray_points_array_at_t_array(
-                    rays[current_lens_hit_mask], lens_ts[current_lens_hit_mask]
-                ),
-            )
+    def _combine_spectral_colors(self, colors, fanned) -> np.ndarray:
+        """
+        Combine the colors of the wavelength samples of every ray to RGB.
+
+        Args:
+            colors: Colors of every ray and sample (samples * N x 3), sample major
+            fanned: Mask of the rays copied per wavelength (N,), the others only have
+                their first row written
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        spectral_colors = colors.reshape(len(self.wavelength_weights), len(fanned), 3)
+        combined = get_buffer(
+            self.workspace, "spectral_colors", (len(fanned), 3), self.dtype
+        )
+        combined[:] = spectral_colors[0]
+        fanned_indices = np.flatnonzero(fanned)
+        combined[fanned_indices] = np.einsum(
+            "sc,snc->nc", self.wavelength_weights, spectral_colors[:, fanned_indices]
+        )
+        return combined
+
+    def _terminate_rays(self, rays: RayBatch, colors, selection, reason: str):
+        """
+        Give the selected rays of a wave the terminated color and count them.
 
-            ray_hits_any_lens_mask[current_lens_hit_mask] = True
+        Args:
+            rays: Rays of the current wave
+            colors: Output colors of the original rays, updated in place
+            selection: Boolean mask, index array or slice of the rays to terminate
+            reason: One of TERMINATION_REASONS
+        """
+        pixel_indices = rays.pixel_indices[selection]
+        colors[pixel_indices] = self.terminated_color
+        self.terminated_ray_counts[reason] += len(pixel_indices)
 
-            # Only process rays that hit this lens first
-            first_hit_mask = lens_ts < closest_hit_ts
-            update_mask = ray_hits_any_lens_mask & first_hit_mask
+    def _terminate_cycles(
+        self, rays: RayBatch, colors, depth: int, state_history: np.ndarray
+    ) -> RayBatch:
+        """
+        Terminate the rays whose state repeats one of their previous depths.
 
-            closest_hit_ts[update_mask] = lens_ts[update_mask]
-            any_object_hit_mask[update_mask] = False
-            ray_hitting_object_indices_array[update_mask] = -1
-            hit_lens_indices_by_rays_order[update_mask] = lens_index
-            ray_hits_any_lens_mask[update_mask] = True
+        Refraction only depends on where a ray hits and in which direction, so a ray
+        leaving a lens in a state it already had will go around the same loop forever.
+
+        Args:
+            rays: Rays leaving the lenses at this depth
+            colors: Output colors of the original rays, updated in place
+            depth: Depth the rays left the lenses at
+            state_history: Last CYCLE_HISTORY states of every original ray, updated
 
-        # Getting lens hit colors
-        if np.any(ray_hits_any_lens_mask):
-            # ray_hits_any_lens_mask has shape of (len(rays), )
-            # So lens_hit_points is as big as np.where(ray_hits_any_lens_mask)
-            lens_hit_points = get_ray_points_array_at_t_array(
-                rays[ray_hits_any_lens_mask], closest_hit_ts[ray_hits_any_lens_mask]
+        Returns:
+            The rays that are not in a cycle, compacted in place
+        """
+        states = np.concatenate([rays.origins, rays.directions], axis=1)
+        differences = np.abs(state_history[rays.pixel_indices] - states[:, np.newaxis])
+        cycling = np.any(np.all(differences <= CYCLE_TOLERANCE, axis=2), axis=1)
+        state_history[rays.pixel_indices, depth % CYCLE_HISTORY] = states
+        if not np.any(cycling):
+            return rays
+        self._terminate_rays(rays, colors, cycling, "cycle")
+        return rays.compact(~cycling, workspace=self.workspace)
+
+    def _trace_wave(
+        self,
+        rays: RayBatch,
+        colors,
+        depth,
+        tile_binning: TileBinning = None,
+        lens_visibility: LensVisibility = None,
+        fanned: np.ndarray = None,
+    ) -> RayBatch:
+        """
+        Trace one wave of rays, writing the colors of the rays that hit objects.
+
+        Args:
+            rays: Rays of the current wave, with the original ray indices as pixel indices
+            colors: Output colors of the original rays, updated in place
+            depth: Ray trace depth (None for the primary rays)
+            tile_binning: Optional binning of the primary rays
+            lens_visibility: Optional visibility of the lenses, for the rays leaving
+                them, which then carry the lens surface they left as source surfaces
+            fanned: Mask of the original rays copied per wavelength, given to copy the
+                lens hits of the primary rays and mark them in it
+
+        Returns:
+            The rays leaving the lenses, compacted in place into the next wave
+        """
+        if depth is None and tile_binning is not None:
+            surface_indices, hit_ts, hit_uvs = tile_binning.nearest_hit(
+                rays, rays.pixel_indices, workspace=self.workspace
+            )
+        elif depth is not None and lens_visibility is not None:
+            surface_indices, hit_ts, hit_uvs = lens_visibility.nearest_hit(
+                rays, rays.source_surfaces, workspace=self.workspace
+            )
+        else:
+            surface_indices, hit_ts, hit_uvs = self.accelerator.nearest_hit(
+                rays, workspace=self.workspace
             )
 
-            # Get the the possible lens indices
-            lens_indices = np.arange(len(self.lenses))
+        # Sort the wave by hit surface, misses first, so every surface owns a slice.
+        # The pixel indices travel with the rays, so colors still land in place
+        surface_indices += 1
+        # Primary rays come in pixel order, which is already coherent
+        if self.reorder_rays and depth is not None and len(self.scene):
+            order, offsets = self._get_coherent_order(surface_indices, hit_uvs)
+        else:
+            order, offsets = group_by_index(surface_indices, len(self.scene) + 1)
+        rays.compact(order, workspace=self.workspace)
+        hit_ts = np.take(
+            hit_ts,
+            order,
+            out=get_buffer(self.workspace, "sorted_hit_ts", len(order), self.dtype),
+        )
+        hit_uvs = np.take(
+            hit_uvs,
+            order,
+            axis=0,
+            out=get_buffer(
+                self.workspace, "sorted_hit_uvs", (len(order), 2), self.dtype
+            ),
+        )
 
-            # Create a dictionary of masks, where each mask shows the positions of the corresponding value.
-            # Each mask has shape of ray_hitting_lens_indices_array, which has shape of (len(rays), )
-            masks_by_lens_index = {
-                current_lens_index: (
-                    hit_lens_indices_by_rays_order == current_lens_index
+        # Save visualization of missed rays if enabled
+        if offsets[1] and self.include_missed_rays:
+            self._save_missed_rays(rays[: offsets[1]])
+
+        # The object hits follow the misses, shaded with one call per object type
+        object_hits = slice(offsets[1], offsets[self.scene.object_count + 1])
+        object_indices = np.repeat(
+            self.scene.ids[: self.scene.object_count],
+            np.diff(offsets[1 : self.scene.object_count + 2]),
+        )
+        colors[rays.pixel_indices[object_hits]] = self.shade_objects(
+            object_indices, hit_uvs[object_hits]
+        )
+        for surface in np.flatnonzero(np.diff(offsets[1:])):
+            group = slice(offsets[surface + 1], offsets[surface + 2])
+            if surface < self.scene.object_count:
+                object_index = self.scene.ids[surface]
+                self._save_hit_rays(
+                    rays[group],
+                    hit_ts[group],
+                    depth=depth,
+                    hit_object_type="object",
+                    hit_object_index=object_index,
                 )
-                for current_lens_index in lens_indices
-            }
-
-            for (
-                current_lens_index,
-                current_lens_hitting_rays_mask,
-            ) in masks_by_lens_index.items():
-                if np.any(current_lens_hitting_rays_mask):
-                    lens = self.lenses[current_lens_index]
-                    new_rays = lens.get_new_rays(
-                        rays[current_lens_hitting_rays_mask],
-                        lens_hit_points[
-                            current_lens_hitting_rays_mask[ray_hits_any_lens_mask]
-                        ],
-                    )
-                    # TODO: Optimization opportunity, collect all rays together and call get_colors once
-                    colors[current_lens_hitting_rays_mask] = self.get_colors(
-                        new_rays, depth=depth + 1 if depth else 1
-                    )
 
-            # Save visualization of hit rays
-            for lens_idx, lens in enumerate(self.lenses):
-                lens_mask = (
-                    hit_lens_indices_by_rays_order[ray_hits_any_lens_mask] == lens_idx
+        # The lens hits are the tail of the sorted wave and become the next wave
+        lens_hits_start = offsets[self.scene.object_count + 1]
+        rays.compact(slice(lens_hits_start, None))
+        hit_ts = hit_ts[lens_hits_start:]
+        lens_offsets = offsets[self.scene.object_count + 1 :] - lens_hits_start
+        if fanned is not None:
+            rays, hit_ts = self._fan_out_wavelengths(rays, hit_ts, fanned)
+            lens_offsets *= len(self.wavelength_weights)
+        # Hit points become the next origins, so consecutive depths alternate buffers
+        hit_points_name = f"hit_points_{(depth or 0) % 2}"
+        lens_hit_points = get_ray_points_array_at_t_array(
+            rays,
+            hit_ts,
+            out=get_buffer(
+                self.workspace, hit_points_name, (len(rays), 3), self.dtype
+            ),
+        )
+        # Every lens bends the rays its own way, all lenses in one gathered pass
+        rays.expand_directions(self.workspace)
+        lens_surfaces = np.flatnonzero(np.diff(lens_offsets))
+        if self.ray_sampling_rate_for_3d_export > 0:
+            for lens_surface in lens_surfaces:
+                group = slice(lens_offsets[lens_surface], lens_offsets[lens_surface + 1])
+                self._save_hit_rays(
+                    rays[group],
+                    hit_ts[group],
+                    depth=depth,
+                    hit_object_type="lens",
+                    hit_object_index=self.scene.ids[
+                        self.scene.object_count + lens_surface
+                    ],
                 )
-                if np.any(lens_mask):
-                    self._save_hit_rays(
-                        rays[ray_hits_any_lens_mask][lens_mask],
-                        lens_hit_points[lens_mask],
-                        depth=depth,
-                        hit_object_type="lens",
-                        hit_object_index=lens_idx,
-                    )
-
-        # Get colors for non-lens hits
-        if np.any(any_object_hit_mask):
-            lens_hit_points = get_ray_points_array_at_t_array(
-                rays[any_object_hit_mask], closest_hit_ts[any_object_hit_mask]
+        lens_indices = np.repeat(
+            self.scene.ids[self.scene.object_count :], np.diff(lens_offsets)
+        )
+        power_scales = None
+        if self.power_scales is not None:
+            # The wavelength sample of a ray is the row block of its pixel index
+            ray_count = len(colors) // len(self.wavelength_weights)
+            power_scales = self.power_scales[
+                lens_indices, rays.pixel_indices // ray_count
+            ]
+        self.packed_lenses.get_new_directions(
+            rays.directions,
+            lens_hit_points,
+            lens_indices,
+            out=rays.directions,
+            power_scales=power_scales,
+        )
+        self.refracted_ray_counts += np.bincount(
+            lens_indices, minlength=len(self.lenses)
+        )
+        if self.lens_acceptance is not None:
+            accepted = get_buffer(self.workspace, "accepted", len(rays), bool)
+            for lens_surface in lens_surfaces:
+                group = slice(lens_offsets[lens_surface], lens_offsets[lens_surface + 1])
+                accepted[group] = self.lens_acceptance.accepts(
+                    lens_surface, lens_hit_points[group], rays.directions[group]
+                )
+            self.culled_ray_counts += np.bincount(
+                lens_indices[~accepted], minlength=len(self.lenses)
             )
 
-            # Get the unique values.
-            lens_indices = np.arange(len(self.colored_objects))
+        rays.origins = lens_hit_points
+        if lens_visibility is not None:
+            rays.source_surfaces = np.repeat(
+                np.arange(self.scene.object_count, len(self.scene)),
+                np.diff(lens_offsets),
+            )
+        if self.lens_acceptance is not None and not np.all(accepted):
+            # Escaping rays would miss everything at the next depth
+            if self.include_missed_rays:
+                self._save_missed_rays(rays[~accepted])
+            rays.compact(accepted, workspace=self.workspace)
+        return rays
+
+    def _fan_out_wavelengths(self, rays: RayBatch, hit_ts, fanned):
+        """
+        Copy the primary rays hitting lenses once per wavelength sample.
 
-            # Create a dictionary of masks, where each mask shows the positions of the corresponding value.
-            masks_by_lens_index = {
-                val: (ray_hitting_object_indices_array == val) for val in lens_indices
-            }
+        The copies of a ray follow each other, so the rays of every lens stay
+        contiguous, and copy s of original ray i gets the pixel index s * N + i.
 
-            for hit_object_index, hit_object_mask in masks_by_lens_index.items():
-                if np.any(hit_object_mask):
-                    # Get colors from objects
-                    lens = self.colored_objects[hit_object_index]
-                    colors[hit_object_mask] = lens.get_colors(
-                        lens_hit_points[hit_object_mask[any_object_hit_mask]]
-                    )
+        Args:
+            rays: Primary rays hitting lenses, sorted by lens
+            hit_ts: Array of hit t values of the rays
+            fanned: Mask of the original rays copied per wavelength (N,), updated
 
-            # Save visualization of hit rays
-            for obj_idx in range(len(self.colored_objects)):
-                obj_mask = (
-                    ray_hitting_object_indices_array[any_object_hit_mask] == obj_idx
-                )
-                if np.any(obj_mask):
-                    self._save_hit_rays(
-                        rays[any_object_hit_mask][obj_mask],
-                        lens_hit_points[obj_mask],
-                        depth=depth,
-                        hit_object_type="object",
-                        hit_object_index=obj_idx,
-                    )
+        Returns:
+            Tuple of the copied rays and their hit t values
+        """
+        samples = len(self.wavelength_weights)
+        origins, directions = (
+            values if values.ndim == 1 else np.repeat(values, samples, axis=0)
+            for values in get_ray_arrays(rays)
+        )
+        pixel_indices = np.repeat(rays.pixel_indices, samples)
+        pixel_indices += np.tile(np.arange(samples) * len(fanned), len(rays))
+        fanned[rays.pixel_indices] = True
+        return (
+            RayBatch(origins, directions, pixel_indices, self.dtype),
+            np.repeat(hit_ts, samples),
+        )
+
+    def shade_objects(self, object_indices: np.ndarray, uvs: np.ndarray) -> np.ndarray:
+        """
+        Get the colors of hits on the colored objects, with one shade call per type.
 
-        # Save visualization of missed rays if enabled
-        missed_mask = ~(any_object_hit_mask | ray_hits_any_lens_mask)
-        if np.any(missed_mask) and self.include_missed_rays:
-            self._save_missed_rays(rays[missed_mask])
+        Args:
+            object_indices: Index of the colored object hit by each ray (N,)
+            uvs: Array of (u, v) coordinates (Nx2) of the hits on their object
 
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        if len(self.object_groups) == 1:
+            object_type, objects = self.object_groups[0]
+            return object_type.shade(objects, uvs, self.object_type_ids[object_indices])
+
+        colors = np.empty((len(uvs), 3), dtype=uvs.dtype)
+        order, offsets = group_by_index(
+            self.object_type_indices[object_indices], len(self.object_groups)
+        )
+        for type_index in np.flatnonzero(np.diff(offsets)):
+            group = order[offsets[type_index] : offsets[type_index + 1]]
+            object_type, objects = self.object_groups[type_index]
+            colors[group] = object_type.shade(
+                objects, uvs[group], self.object_type_ids[object_indices[group]]
+            )
         return colors
 
+    def _get_coherent_order(self, surface_indices, hit_uvs):
+        """
+        Group the rays by hit surface like group_by_index, ordering every group along
+        a Z curve of the hit (u, v) coordinates over the surface.
+
+        Args:
+            surface_indices: Hit surface index of every ray plus one, 0 for misses
+            hit_uvs: Local (u, v) coordinates of the hits (Nx2)
+
+        Returns:
+            Tuple of the order and the group offsets, as returned by group_by_index
+        """
+        # Misses wrap around to the last surface, their order doesn't matter
+        coordinates = np.multiply(hit_uvs, self.coherence_scales[surface_indices - 1])
+        coordinates += 0.5
+        codes = get_morton_codes(coordinates, COHERENCE_BITS)
+        # Two stable radix passes, rays keep their order within a Z-curve cell
+        order = np.argsort(codes, kind="stable")
+        surface_order, offsets = group_by_index(
+            surface_indices[order], len(self.scene) + 1
+        )
+        return order[surface_order], offsets
+
     def _save_hit_rays(
-        self, rays, points, depth=None, hit_object_type=None, hit_object_index=None
+        self, rays, hit_ts, depth=None, hit_object_type=None, hit_object_index=None
     ):
         """
         Save visualization of rays that hit objects.
 
         Args:
-            rays: Array of rays that hit objects (ray_dtype)
-            points: Array of hit points (Nx3)
+            rays: Rays that hit objects (ray_dtype or RayBatch)
+            hit_ts: Array of hit t values, hit points are only built for the sampled rays
             depth: Ray trace depth (optional)
             hit_object_type: Type of object hit ("lens" or "object")
             hit_object_index: Index of the hit object
@@ -253,7 +594,9 @@ class ColorTracer:
         if hit_object_type is not None and hit_object_index is not None:
             rays_group += f"/{hit_object_type}_{hit_object_index}"
 
-        for ray, point in zip(rays[tracing_mask], points[tracing_mask]):
+        origins = rays["origin"][tracing_mask]
+        points = origins + hit_ts[tracing_mask, np.newaxis] * rays["direction"][tracing_mask]
+        for origin, point in zip(origins, points):
             ray_group = GroupNamer.get_ray_group_name(
                 depth, hit_object_type, hit_object_index
             )
@@ -261,7 +604,7 @@ class ColorTracer:
                 hit_object_type, hit_object_index
             )
 
-            self.exporter.add_line(ray["origin"], point, group=ray_group)
+            self.exporter.add_line(origin, point, group=ray_group)
             self.exporter.add_point(point, group=hit_group)
 
     def _save_missed_rays(self, rays, missed_rays_length=5):
@@ -269,15 +612,17 @@ class ColorTracer:
         Save visualization of rays that missed all objects.
 
         Args:
-            rays: Array of rays that missed (ray_dtype)
+            rays: Rays that missed (ray_dtype or RayBatch)
             max_length: Length to draw missed rays
         """
         # Save visualization of hit rays
         tracing_mask = self._get_random_tracing_mask(len(rays))
-        for ray in rays[tracing_mask]:
-            end_point = ray["origin"] + ray["direction"] * missed_rays_length
+        for origin, direction in zip(
+            rays["origin"][tracing_mask], rays["direction"][tracing_mask]
+        ):
+            end_point = origin + direction * missed_rays_length
             # Use consistent naming scheme
-            self.exporter.add_line(ray["origin"], end_point, group=GroupNamer.get_missed_rays())
+            self.exporter.add_line(origin, end_point, group=GroupNamer.get_missed_rays())
 
     def _get_random_tracing_mask(self, l):
         return np.random.rand(l) <= self.ray_sampling_rate_for_3d_export
@@ -1,10 +1,29 @@
 from typing import List
+import numpy as np
 from optics_raytracer.camera.camera import Camera
+from optics_raytracer.core.compact_rays import COLOR_SCALE, encode_colors
+from optics_raytracer.core.primitives import PRECISIONS
+from optics_raytracer.core.workspace import Workspace
 from optics_raytracer.optics.colored_object import ColoredObject
 from optics_raytracer.optics.lens import Lens
 from optics_raytracer.rendering.color_tracer import ColorTracer
 from optics_raytracer.rendering.export_3d import Exporter3D
 from optics_raytracer.rendering.image_saver import ImageSaver
+from optics_raytracer.rendering.paraxial_tracer import ParaxialColorTracer
+from optics_raytracer.rendering.sequential_tracer import SequentialColorTracer
+from optics_raytracer.rendering.warp_tracer import WarpColorTracer
+from optics_raytracer.scene.bvh import BVH_SURFACE_THRESHOLD
+from optics_raytracer.scene.lens_visibility import LensVisibility
+from optics_raytracer.scene.tile_binning import TileBinning
+
+# "general" searches every surface at every depth, "sequential" follows an ordered
+# optical train, "paraxial" maps a coaxial train with one ray-transfer matrix, and
+# "auto" warps pinhole views in closed form or else traces sequentially wherever the
+# scene allows it
+TRACING_MODES = ("general", "sequential", "paraxial", "auto")
+
+# Rays decoded from compact storage and traced at once
+COMPACT_BLOCK_SIZE = 1 << 20
 
 
 class OpticsRayTracingEngine:
@@ -21,6 +40,22 @@ class OpticsRayTracingEngine:
         ray_sampling_rate_for_3d_export: float = 0.01,
         compare_with_without_lenses: bool = False,
         include_missed_rays: bool = False,
+        bvh_surface_threshold: int = BVH_SURFACE_THRESHOLD,
+        use_workspace: bool = False,
+        tracing_mode: str = "general",
+        report_paraxial_deviation: bool = False,
+        tile_size: int = None,
+        lens_visibility: bool = False,
+        cull_escaping_rays: bool = False,
+        reorder_rays: bool = False,
+        max_depth: int = None,
+        detect_cycles: bool = False,
+        ray_budget: int = None,
+        terminated_color: np.ndarray = None,
+        precision: str = "float32",
+        compact_rays: bool = False,
+        compact_block_size: int = COMPACT_BLOCK_SIZE,
+        spectral_samples: int = None,
     ):
         """
         Initialize the ray tracing engine.
@@ -31,13 +66,115 @@ class OpticsRayTracingEngine:
             lenses: List of lenses in the scene
             ray_sampling_rate_for_3d_export: Fraction of rays to include in 3D export
             compare_with_without_lenses: If True, render scene with and without lenses side by side
+            bvh_surface_threshold: Surface count from which nearest hits go through a BVH
+            use_workspace: If True, reuse one scratch-buffer arena across depths and renders
+            tracing_mode: One of TRACING_MODES
+            report_paraxial_deviation: If True, paraxial renders also run the full tracer
+                and print how far the paraxial colors deviate from it
+            tile_size: If set, the primary rays are binned into tiles of this many
+                pixels and only tested against the surfaces projecting onto their tile.
+                Only for the general tracing mode
+            lens_visibility: If True, the rays leaving a lens are only tested against
+                the surfaces its exit cones can reach given the camera rays. Only for
+                the general tracing mode
+            cull_escaping_rays: If True, rays leaving a lens towards no other surface
+                are terminated early, and the culled fraction of every lens is printed.
+                Only for the general tracing mode
+            reorder_rays: If True, the rays hitting each surface are sorted by where
+                they hit it before shading and before the next depth. Only for the
+                general tracing mode
+            max_depth: If set, rays still going after hitting this many lenses and
+                objects are terminated. Only for the general tracing mode
+            detect_cycles: If True, rays that come back to an earlier state are
+                terminated. Only for the general tracing mode
+            ray_budget: If set, at most this many ray segments are traced per render.
+                Only for the general tracing mode
+            terminated_color: Color of the terminated rays (black if not set), the
+                terminated counts are printed whenever a limit cuts some rays
+            precision: One of PRECISIONS, the dtype the rays are traced and shaded in.
+                float64 is only for the general tracing mode
+            compact_rays: If True, the camera rays are stored in 8 bytes each and
+                their colors in 16-bit values, and they are traced in blocks of
+                compact_block_size rays decoded to full precision
+            compact_block_size: Rays decoded and traced at once with compact rays
+            spectral_samples: If set, the rays leaving the camera are shared by every
+                wavelength and the ones hitting a lens are traced at this many
+                wavelengths, refracted with the dispersion of every lens, then
+                combined to RGB. Only for the general tracing mode
         """
+        if tracing_mode not in TRACING_MODES:
+            raise ValueError(
+                f"Unknown tracing mode: {tracing_mode}, expected one of {TRACING_MODES}"
+            )
+        if precision not in PRECISIONS:
+            raise ValueError(
+                f"Unknown precision: {precision}, expected one of {PRECISIONS}"
+            )
+        if compact_rays and (
+            tile_size or lens_visibility or report_paraxial_deviation or ray_budget
+        ):
+            raise ValueError(
+                "Compact rays are traced in blocks and cannot be combined with "
+                "tile_size, lens_visibility, report_paraxial_deviation or ray_budget"
+            )
+        if spectral_samples is not None and tracing_mode != "general":
+            raise ValueError("Spectral tracing needs the general tracing mode")
+        if precision != "float32" and tracing_mode != "general":
+            # The train tracers keep their frames and maps in float32, a float64
+            # render through them would not be a reference
+            raise ValueError(f"{precision} precision needs the general tracing mode")
+        # The train tracers cross the lenses without the wavefront loop these options
+        # act on, they would be silently ignored
+        general_options = [
+            name
+            for name, value in (
+                ("tile_size", tile_size),
+                ("cull_escaping_rays", cull_escaping_rays),
+                ("reorder_rays", reorder_rays),
+                ("lens_visibility", lens_visibility),
+            )
+            if value
+        ]
+        if tracing_mode != "general" and general_options:
+            raise ValueError(
+                f"{', '.join(general_options)} can only be used in the general "
+                "tracing mode"
+            )
+        if tracing_mode != "general" and (
+            max_depth is not None or detect_cycles or ray_budget is not None
+        ):
+            # The train tracers cross the lenses without the wavefront loop that
+            # counts depths and segments, the limits would be silently ignored
+            raise ValueError(
+                "max_depth, detect_cycles and ray_budget need the general tracing mode"
+            )
         self.camera = camera
         self.objects = objects
         self.lenses = lenses
         self.ray_sampling_rate = ray_sampling_rate_for_3d_export
         self.compare_with_without_lenses = compare_with_without_lenses
         self.include_missed_rays = include_missed_rays
+        self.bvh_surface_threshold = bvh_surface_threshold
+        self.workspace = Workspace() if use_workspace else None
+        self.tracing_mode = tracing_mode
+        self.report_paraxial_deviation = report_paraxial_deviation
+        self.paraxial_deviation = None
+        self.tile_size = tile_size
+        self.tile_binning = None
+        self.use_lens_visibility = lens_visibility
+        self.lens_visibility = None
+        self.cull_escaping_rays = cull_escaping_rays
+        self.culled_ray_fractions = None
+        self.reorder_rays = reorder_rays
+        self.max_depth = max_depth
+        self.detect_cycles = detect_cycles
+        self.ray_budget = ray_budget
+        self.terminated_color = terminated_color
+        self.terminated_ray_counts = None
+        self.precision = precision
+        self.compact_rays = compact_rays
+        self.compact_block_size = compact_block_size
+        self.spectral_samples = spectral_samples
         self.exporter = Exporter3D()
 
     def render(
@@ -94,24 +231,98 @@ class OpticsRayTracingEngine:
             PIL Image object of the rendered scene
         """
         # Initialize color tracer
-        color_tracer = ColorTracer(
-            self.exporter,
-            self.objects,
-            self.lenses,
+        tracer_arguments = dict(
             ray_sampling_rate_for_3d_export=self.ray_sampling_rate,
             include_missed_rays=self.include_missed_rays,
+            bvh_surface_threshold=self.bvh_surface_threshold,
+            workspace=self.workspace,
+            cull_escaping_rays=self.cull_escaping_rays,
+            reorder_rays=self.reorder_rays,
+            max_depth=self.max_depth,
+            detect_cycles=self.detect_cycles,
+            ray_budget=self.ray_budget,
+            terminated_color=self.terminated_color,
+            spectral_samples=self.spectral_samples,
+            dtype=np.dtype(self.precision),
         )
-
-        # Get rays from camera
-        rays = self.camera.get_rays(self.exporter, self.ray_sampling_rate)
+        if self.tracing_mode == "general":
+            color_tracer = ColorTracer(
+                self.exporter, self.objects, self.lenses, **tracer_arguments
+            )
+        elif self.tracing_mode == "paraxial":
+            color_tracer = ParaxialColorTracer(
+                self.exporter,
+                self.objects,
+                self.lenses,
+                fallback_to_general=False,
+                **tracer_arguments,
+            )
+        elif self.tracing_mode == "sequential":
+            color_tracer = SequentialColorTracer(
+                self.exporter,
+                self.objects,
+                self.lenses,
+                fallback_to_general=False,
+                **tracer_arguments,
+            )
+        else:
+            color_tracer = WarpColorTracer(
+                self.exporter, self.objects, self.lenses, **tracer_arguments
+            )
 
         # Create image saver
         image_size = self.camera.get_image_size()
         image_saver = ImageSaver(image_size.width, image_size.height)
 
-        # Trace colors for all rays
-        colors = color_tracer.get_colors(rays)
+        if self.compact_rays:
+            colors, refracted, culled, terminated = self._get_compact_colors(
+                color_tracer
+            )
+        else:
+            # Get rays from camera
+            rays = self.camera.get_rays(self.exporter, self.ray_sampling_rate)
+
+            if self.tracing_mode == "paraxial" and self.report_paraxial_deviation:
+                self.paraxial_deviation = color_tracer.get_deviation(rays)
+                print(f"Paraxial deviation: {self.paraxial_deviation}")
+
+            self.tile_binning = (
+                TileBinning.build(
+                    self.camera,
+                    color_tracer.scene,
+                    rays,
+                    self.tile_size,
+                    self.bvh_surface_threshold,
+                )
+                if self.tile_size
+                else None
+            )
+
+            self.lens_visibility = (
+                LensVisibility.build(
+                    color_tracer.scene,
+                    self.lenses,
+                    rays,
+                    color_tracer.power_scales,
+                    self.bvh_surface_threshold,
+                )
+                if self.use_lens_visibility
+                else None
+            )
+
+            # Trace colors for all rays
+            colors = color_tracer.get_colors(
+                rays, self.tile_binning, self.lens_visibility
+            )
+            refracted = color_tracer.refracted_ray_counts
+            culled = color_tracer.culled_ray_counts
+            terminated = color_tracer.terminated_ray_counts
+        if self.cull_escaping_rays:
+            self._report_culled_rays(refracted, culled)
+        self._report_terminated_rays(terminated)
         pixel_colors = self.camera.convert_ray_colors_to_pixel_colors(colors)
+        if self.compact_rays:
+            pixel_colors = pixel_colors / COLOR_SCALE
         pixel_colors *= 255  # Convert to 8-bit RGB values
         image_saver.write_pixels(
             pixel_colors.reshape(image_size.height, image_size.width, 3)
@@ -126,6 +337,75 @@ class OpticsRayTracingEngine:
 
         return image_saver.image
     
+    def _get_compact_colors(self, color_tracer: ColorTracer):
+        """
+        Trace the camera rays from compact storage, one decoded block at a time.
+
+        Args:
+            color_tracer: Color tracer of the render
+
+        Returns:
+            Tuple of the ray colors (Nx3 uint16, COLOR_SCALE standing for 1), the
+            refracted and culled ray counts of every lens and the terminated ray
+            counts of every reason, summed over the blocks
+        """
+        rays = self.camera.get_compact_rays(
+            self.exporter, self.ray_sampling_rate, self.compact_block_size
+        )
+        colors = np.empty((len(rays), 3), dtype=np.uint16)
+        refracted = np.zeros_like(color_tracer.refracted_ray_counts)
+        culled = np.zeros_like(color_tracer.culled_ray_counts)
+        terminated = dict.fromkeys(color_tracer.terminated_ray_counts, 0)
+        for start in range(0, len(rays), self.compact_block_size):
+            stop = min(start + self.compact_block_size, len(rays))
+            block = rays.decode(start, stop, np.dtype(self.precision))
+            # The sequential and warp paths only reset these when they fall back
+            color_tracer.refracted_ray_counts.fill(0)
+            color_tracer.culled_ray_counts.fill(0)
+            color_tracer.terminated_ray_counts = dict.fromkeys(terminated, 0)
+            encode_colors(color_tracer.get_colors(block), out=colors[start:stop])
+            refracted += color_tracer.refracted_ray_counts
+            culled += color_tracer.culled_ray_counts
+            for reason, count in color_tracer.terminated_ray_counts.items():
+                terminated[reason] += count
+        return colors, refracted, culled, terminated
+
+    def _report_culled_rays(self, refracted: np.ndarray, culled: np.ndarray):
+        """
+        Print the fraction of the rays refracted by every lens that were culled.
+
+        Args:
+            refracted: Rays refracted by every lens during the last render
+            culled: Rays culled after every lens during the last render
+        """
+        self.culled_ray_fractions = culled / np.maximum(refracted, 1)
+        if not np.any(refracted):
+            # The lenses were not traced through the general tracer
+            return
+        for lens_index, fraction in enumerate(self.culled_ray_fractions):
+            print(
+                f"Lens {lens_index}: culled {culled[lens_index]} of "
+                f"{refracted[lens_index]} refracted rays ({fraction:.1%})"
+            )
+
+    def _report_terminated_rays(self, terminated: dict):
+        """
+        Print how many rays every tracing limit terminated, if any.
+
+        Args:
+            terminated: Rays terminated by every reason during the last render
+        """
+        self.terminated_ray_counts = dict(terminated)
+        if not any(self.terminated_ray_counts.values()):
+            return
+        print(
+            "Terminated rays: "
+            + ", ".join(
+                f"{count} by {reason.replace('_', ' ')}"
+                for reason, count in self.terminated_ray_counts.items()
+            )
+        )
+
     def _combine_images_side_by_side(self, image1, image2):
         """
         Combine two images side by side.
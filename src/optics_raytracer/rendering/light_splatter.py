@@ -0,0 +1,287 @@
+import numpy as np
+from typing import List
+
+from optics_raytracer.core.grouping import group_by_index
+from optics_raytracer.core.ray import get_ray_points_array_at_t_array
+from optics_raytracer.core.ray_batch import RayBatch
+from optics_raytracer.geometry.circle import Circle
+from optics_raytracer.geometry.rectangle import ColoredRectangle, Rectangle
+from optics_raytracer.objects.inserted_image import InsertedImage
+from optics_raytracer.optics.colored_object import ColoredObject
+from optics_raytracer.optics.lens import Lens
+from optics_raytracer.optics.lens_array import LensArray
+from optics_raytracer.optics.packed_lenses import PackedLenses
+from optics_raytracer.rendering.export_3d import Exporter3D
+from optics_raytracer.rendering.image_saver import ImageSaver
+from optics_raytracer.scene.bvh import BVH_SURFACE_THRESHOLD, BoundingVolumeHierarchy
+from optics_raytracer.scene.packed_scene import PackedScene
+from optics_raytracer.utils.size import IntegerSize
+
+# Rays emitted and traced at once
+SPLAT_BLOCK_SIZE = 1 << 20
+
+
+class LightSplatter:
+    """
+    Forward tracer for projector setups.
+
+    Rays leave the texels of a source image, go through the lenses and are
+    accumulated where they hit a screen rectangle, in a framebuffer of the power
+    landing on every screen pixel. Every texel emits its color, split evenly over
+    its rays, into a cone around the source normal. Rays hitting an aperture stop or
+    a baffle are dropped. Where backward tracing needs
+    many rays per screen pixel to find the few paths back to the source, every
+    forward ray that reaches the screen counts.
+    """
+
+    def __init__(
+        self,
+        source: InsertedImage,
+        lenses: List[Lens],
+        screen: Rectangle,
+        image_size: IntegerSize,
+        rays_per_texel=4,
+        emission_angle: float = 20.0,
+        max_depth: int = 16,
+        block_size: int = SPLAT_BLOCK_SIZE,
+        bvh_surface_threshold: int = BVH_SURFACE_THRESHOLD,
+        seed: int = 0,
+        dtype=np.float32,
+        stops: List[ColoredObject] = None,
+    ):
+        """
+        Initialize the light splatter.
+
+        Args:
+            source: Image emitting the light along its normal
+            lenses: List of lenses and lens arrays between the source and the screen
+            screen: Rectangle receiving the light
+            image_size: Resolution of the screen framebuffer in pixels
+            rays_per_texel: Rays emitted by every texel, either one count for all of
+                them or an array of counts per texel (image height x width). Black
+                texels emit no rays
+            emission_angle: Half angle in degrees of the emission cone of every texel
+            max_depth: Lenses a ray may go through before it is dropped
+            block_size: Rays emitted and traced at once
+            bvh_surface_threshold: Surface count from which nearest hits go through
+                a BVH
+            seed: Seed of the emission positions and directions
+            dtype: Compute dtype of the rays and the scene tables
+            stops: Optional opaque objects, like aperture stops and baffles, blocking
+                the light between the source and the screen
+        """
+        if not 0 < emission_angle <= 90:
+            raise ValueError(
+                f"Emission angle must be in (0, 90] degrees, got {emission_angle}"
+            )
+        self.source = source
+        self.lenses = lenses
+        self.screen = screen
+        self.image_size = image_size
+        self.emission_angle = emission_angle
+        self.max_depth = max_depth
+        self.block_size = block_size
+        self.seed = seed
+        self.dtype = np.dtype(dtype)
+        texel_shape = source.pixels.shape[:2]
+        self.ray_counts = np.array(
+            np.broadcast_to(rays_per_texel, texel_shape), dtype=np.int64
+        )
+        self.ray_counts[~np.any(source.pixels > 0, axis=2)] = 0
+        # Power carried by every ray of every texel (texels x 3)
+        self.texel_powers = source.pixels.reshape(-1, 3) / np.maximum(
+            self.ray_counts.reshape(-1, 1), 1
+        ).astype(np.float32)
+        self.stops = [] if stops is None else stops
+        # The screen is the first object, followed by the stops and the lenses
+        self.scene = PackedScene.build(
+            [ColoredRectangle(screen, np.ones(3))] + self.stops, lenses, self.dtype
+        )
+        self.packed_lenses = PackedLenses.build(lenses)
+        self.accelerator = (
+            BoundingVolumeHierarchy.build(self.scene)
+            if len(self.scene) >= bvh_surface_threshold
+            else self.scene
+        )
+        # Power and rays landing on every screen pixel during the last splat
+        self.irradiance = None
+        self.hit_counts = None
+        self.exporter = Exporter3D()
+        self.exporter.add_rectangle(source.rectangle.array)
+        self.exporter.add_rectangle(screen.array)
+        for stop in self.stops:
+            surface = stop.get_surface()
+            if isinstance(surface, Circle):
+                self.exporter.add_circle(surface.array, 50)
+            else:
+                self.exporter.add_rectangle(surface.array)
+        for lens in lenses:
+            if isinstance(lens, LensArray):
+                self.exporter.add_rectangle(lens.rectangle.array)
+            else:
+                self.exporter.add_circle(lens.array, 50)
+
+    def splat(self) -> np.ndarray:
+        """
+        Emit the rays of every texel and accumulate the power reaching the screen.
+
+        Returns:
+            Array of the power landing on every screen pixel (height x width x 3),
+            also kept with the ray counts per pixel in irradiance and hit_counts
+        """
+        width, height = self.image_size.width, self.image_size.height
+        irradiance = np.zeros((3, height * width))
+        hit_counts = np.zeros(height * width, dtype=np.int64)
+        rng = np.random.default_rng(self.seed)
+        texel_counts = self.ray_counts.reshape(-1)
+        ray_ends = np.cumsum(texel_counts)
+        texel_start = 0
+        while texel_start < len(texel_counts):
+            # Whole texels per block, at least one
+            first_ray = ray_ends[texel_start] - texel_counts[texel_start]
+            texel_stop = max(
+                np.searchsorted(ray_ends, first_ray + self.block_size, side="right"),
+                texel_start + 1,
+            )
+            texels = np.repeat(
+                np.arange(texel_start, texel_stop), texel_counts[texel_start:texel_stop]
+            )
+            texel_start = texel_stop
+            if not len(texels):
+                continue
+            rays, powers = self._emit(texels, rng)
+            for pixels, pixel_powers in self._trace(rays, powers):
+                hit_counts += np.bincount(pixels, minlength=width * height)
+                for channel in range(3):
+                    irradiance[channel] += np.bincount(
+                        pixels, weights=pixel_powers[:, channel], minlength=width * height
+                    )
+        self.irradiance = irradiance.T.reshape(height, width, 3)
+        self.hit_counts = hit_counts.reshape(height, width)
+        return self.irradiance
+
+    def render(
+        self,
+        output_image_path: str = None,
+        output_3d_path: str = None,
+        output_mtl_path: str = None,
+    ):
+        """
+        Splat the source onto the screen and optionally save outputs.
+
+        The brightest pixel channel of the framebuffer maps to 255.
+
+        Args:
+            output_image_path: Path to save the screen image (optional)
+            output_3d_path: Path to save 3D scene visualization (optional)
+            output_mtl_path: Path to save material definition (optional)
+
+        Returns:
+            PIL Image object of the screen
+        """
+        irradiance = self.splat()
+        image_saver = ImageSaver(self.image_size.width, self.image_size.height)
+        image_saver.write_pixels(irradiance * (255 / max(irradiance.max(), 1e-30)))
+        if output_image_path:
+            image_saver.save(output_image_path)
+        if output_3d_path:
+            self.exporter.save_to_obj(output_3d_path, output_mtl_path)
+        return image_saver.image
+
+    def _emit(self, texels: np.ndarray, rng: np.random.Generator):
+        """
+        Build the rays leaving the given texels, uniform in position over the texel
+        and in solid angle over the emission cone.
+
+        Args:
+            texels: Flat index of the emitting texel of every ray
+            rng: Random generator of the positions and directions
+
+        Returns:
+            Tuple of the rays (RayBatch) and their power (Nx3)
+        """
+        source = self.source
+        texel_height, texel_width = source.pixels.shape[:2]
+        texel_rows, texel_columns = np.divmod(texels, texel_width)
+        samples = rng.random((4, len(texels)), dtype=self.dtype)
+        rectangle = source.rectangle
+        u_vector = rectangle.u_vector / np.linalg.norm(rectangle.u_vector)
+        basis = np.array(
+            [u_vector, np.cross(rectangle.normal, u_vector), rectangle.normal],
+            dtype=self.dtype,
+        )
+
+        # Positions in the texels, along the u and v axes of the source
+        coordinates = np.empty((len(texels), 2), dtype=self.dtype)
+        np.add(texel_columns, samples[0], out=coordinates[:, 0])
+        np.add(texel_rows, samples[1], out=coordinates[:, 1])
+        coordinates *= np.array(
+            [source.width / texel_width, -source.height / texel_height], dtype=self.dtype
+        )
+        coordinates += np.array(
+            [-source.width / 2, source.height / 2], dtype=self.dtype
+        )
+        origins = coordinates @ basis[:2]
+        origins += rectangle.middle_point
+
+        # Directions in the cone, in the (u, v, normal) frame of the source
+        local_directions = np.empty((len(texels), 3), dtype=self.dtype)
+        cos_thetas = local_directions[:, 2]
+        cone_depth = 1 - np.cos(np.radians(self.emission_angle))
+        np.multiply(samples[2], cone_depth, out=cos_thetas)
+        np.subtract(1, cos_thetas, out=cos_thetas)
+        sin_thetas = np.sqrt(1 - cos_thetas**2)
+        phis = np.multiply(samples[3], 2 * np.pi, out=samples[3])
+        np.multiply(np.cos(phis), sin_thetas, out=local_directions[:, 0])
+        np.multiply(np.sin(phis), sin_thetas, out=local_directions[:, 1])
+        directions = local_directions @ basis
+
+        powers = self.texel_powers[texels]
+        return RayBatch(origins, directions, dtype=self.dtype), powers
+
+    def _trace(self, rays: RayBatch, powers: np.ndarray):
+        """
+        Trace the rays through the lenses until they reach the screen, a stop or escape.
+
+        Args:
+            rays: Emitted rays
+            powers: Power carried by every ray (Nx3)
+
+        Yields:
+            Tuples of the flat screen pixel index and the power of the rays hitting
+            the screen at every depth
+        """
+        for _ in range(self.max_depth + 1):
+            if not len(rays):
+                return
+            surface_indices, hit_ts, hit_uvs = self.accelerator.nearest_hit(rays)
+            # Misses first, then the screen (surface 0), the stops and the lenses
+            surface_indices += 1
+            order, offsets = group_by_index(surface_indices, len(self.scene) + 1)
+            screen_hits = order[offsets[1] : offsets[2]]
+            yield self._get_pixels(hit_uvs[screen_hits]), powers[screen_hits]
+
+            first_lens = self.scene.object_count
+            lens_hits = order[offsets[first_lens + 1] :]
+            rays.compact(lens_hits)
+            powers = powers[lens_hits]
+            hit_points = get_ray_points_array_at_t_array(rays, hit_ts[lens_hits])
+            lens_indices = np.repeat(
+                self.scene.ids[first_lens:], np.diff(offsets[first_lens + 1 :])
+            )
+            self.packed_lenses.get_new_directions(
+                rays.directions, hit_points, lens_indices, out=rays.directions
+            )
+            rays.origins = hit_points
+
+    def _get_pixels(self, uvs: np.ndarray) -> np.ndarray:
+        """
+        Get the flat framebuffer index of the screen pixel under every (u, v),
+        with the rows going down the v axis like the rows of an image.
+        """
+        width, height = self.image_size.width, self.image_size.height
+        x = (uvs[:, 0] / self.screen.width + 0.5) * width
+        y = (0.5 - uvs[:, 1] / self.screen.height) * height
+        x = np.clip(x.astype(np.int64), 0, width - 1)
+        y = np.clip(y.astype(np.int64), 0, height - 1)
+        return y * width + x
@@ -0,0 +1,182 @@
+import time
+
+import numpy as np
+from typing import List
+
+from optics_raytracer.core.ray_batch import RayBatch
+from optics_raytracer.optics.colored_object import ColoredObject
+from optics_raytracer.optics.lens import Lens
+from optics_raytracer.rendering.color_tracer import ColorTracer
+from optics_raytracer.rendering.export_3d import Exporter3D
+from optics_raytracer.rendering.sequential_tracer import SequentialColorTracer
+from optics_raytracer.scene.lens_visibility import LensVisibility
+from optics_raytracer.scene.paraxial_train import ParaxialTrain
+from optics_raytracer.scene.tile_binning import TileBinning
+
+
+class ParaxialDeviation:
+    """
+    Difference between the paraxial and the full tracer for one set of rays.
+    """
+
+    def __init__(
+        self,
+        max_color_deviation: float,
+        mean_color_deviation: float,
+        deviating_ray_fraction: float,
+        clipped_ray_fraction: float,
+        paraxial_seconds: float,
+        full_seconds: float,
+    ):
+        self.max_color_deviation = max_color_deviation
+        self.mean_color_deviation = mean_color_deviation
+        self.deviating_ray_fraction = deviating_ray_fraction
+        self.clipped_ray_fraction = clipped_ray_fraction
+        self.paraxial_seconds = paraxial_seconds
+        self.full_seconds = full_seconds
+
+    def __str__(self):
+        return (
+            f"max color deviation {self.max_color_deviation:.4f}, "
+            f"mean {self.mean_color_deviation:.5f}, "
+            f"{self.deviating_ray_fraction:.2%} of rays deviating, "
+            f"{self.clipped_ray_fraction:.2%} clipped by apertures, "
+            f"paraxial {self.paraxial_seconds:.3f}s vs full {self.full_seconds:.3f}s"
+        )
+
+
+class ParaxialColorTracer(SequentialColorTracer):
+    """
+    Color tracer mapping camera rays through a coaxial lens train with one ABCD matrix.
+
+    Every ray is reduced to its (x, x', y, y') state on the first lens plane, and its
+    states at all lenses and behind the last one follow from the precomputed matrices.
+    Unlike the general tracer, where a ray passes beside a lens it misses, a ray
+    outside any aperture is clipped and keeps the default color.
+    """
+
+    def __init__(
+        self,
+        exporter: Exporter3D,
+        colored_objects: List[ColoredObject],
+        lenses: List[Lens],
+        **kwargs,
+    ):
+        """
+        Initialize the paraxial color tracer.
+
+        Args:
+            exporter: 3D exporter for visualization
+            colored_objects: List of colored objects in the scene
+            lenses: List of lenses in the scene
+            **kwargs: Remaining SequentialColorTracer arguments
+        """
+        super().__init__(exporter, colored_objects, lenses, **kwargs)
+        self.paraxial_train = (
+            ParaxialTrain.build(self.train) if self.train is not None else None
+        )
+        self.clipped_ray_count = 0
+
+    def get_colors(
+        self,
+        rays: np.ndarray,
+        tile_binning: TileBinning = None,
+        lens_visibility: LensVisibility = None,
+    ) -> np.ndarray:
+        """
+        Get colors for an array of rays by mapping them through the train matrices.
+
+        Args:
+            rays: Array of rays to trace (ray_dtype or RayBatch)
+            tile_binning: Optional screen-space binning of the rays, used wherever
+                they go through the general tracer
+            lens_visibility: Optional visibility of the lenses, used wherever the
+                rays go through the general tracer
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        if self.paraxial_train is None or not self.train.accepts(rays):
+            if not self.fallback_to_general:
+                raise ValueError(
+                    "Scene is not a coaxial optical train: lenses must be parallel "
+                    "single lenses, centered on one axis, at distinct positions along "
+                    "it, in front of the rays and of every object"
+                )
+            return ColorTracer.get_colors(self, rays, tile_binning, lens_visibility)
+        if len(self.paraxial_train) == 0:
+            # Without lenses there is nothing to map, just the object hits
+            return ColorTracer.get_colors(self, rays, tile_binning, lens_visibility)
+
+        colors = np.tile(self.default_color, (len(rays), 1))
+        origins = self.train.to_local(rays["origin"])
+        directions = self.train.to_local(rays["direction"])
+        states = self.paraxial_train.get_entry_states(origins, directions)
+        lens_states, exit_states, cleared = self.paraxial_train.trace(states)
+        self.clipped_ray_count = int(len(rays) - np.count_nonzero(cleared))
+
+        self._save_lens_hits(origins, lens_states, cleared)
+
+        origins, directions = self.paraxial_train.states_to_rays(
+            exit_states[cleared], self.train.positions[-1]
+        )
+
+        object_colors = colors[cleared]
+        self._shade_objects(
+            RayBatch(self.train.to_world(origins), self.train.to_world(directions)),
+            np.full(len(origins), len(self.paraxial_train)),
+            object_colors,
+        )
+        colors[cleared] = object_colors
+        return colors
+
+    def get_deviation(self, rays: np.ndarray) -> ParaxialDeviation:
+        """
+        Trace the rays with the paraxial and the full tracer and compare the colors.
+
+        Args:
+            rays: Array of rays to trace (ray_dtype or RayBatch)
+
+        Returns:
+            ParaxialDeviation of the paraxial colors from the full tracer
+        """
+        start = time.perf_counter()
+        paraxial_colors = np.array(self.get_colors(rays), dtype=np.float32)
+        paraxial_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        full_colors = np.array(ColorTracer.get_colors(self, rays), dtype=np.float32)
+        full_seconds = time.perf_counter() - start
+
+        deviations = np.abs(paraxial_colors - full_colors).max(axis=1)
+        return ParaxialDeviation(
+            max_color_deviation=float(deviations.max(initial=0)),
+            mean_color_deviation=float(deviations.mean()) if len(deviations) else 0.0,
+            deviating_ray_fraction=float(np.mean(deviations > 1 / 255))
+            if len(deviations)
+            else 0.0,
+            clipped_ray_fraction=self.clipped_ray_count / max(len(rays), 1),
+            paraxial_seconds=paraxial_seconds,
+            full_seconds=full_seconds,
+        )
+
+    def _save_lens_hits(self, origins, lens_states, cleared):
+        if self.ray_sampling_rate_for_3d_export <= 0:
+            return
+        origins = origins[cleared]
+        for index, lens_index in enumerate(self.train.lens_indices):
+            hit_points, _ = self.paraxial_train.states_to_rays(
+                lens_states[index][cleared], self.train.positions[index]
+            )
+            # The segment from the previous hit point, with t as the distance along it
+            segments = hit_points - origins
+            ts = np.linalg.norm(segments, axis=1)
+            directions = segments / ts[:, np.newaxis]
+            self._save_hit_rays_by_depth(
+                origins,
+                directions,
+                ts,
+                np.full(len(origins), index),
+                "lens",
+                lens_index,
+            )
+            origins = hit_points
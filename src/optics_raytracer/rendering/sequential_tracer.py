@@ -0,0 +1,174 @@
+import numpy as np
+from typing import List
+
+from optics_raytracer.core.grouping import group_by_index
+from optics_raytracer.core.ray_batch import RayBatch
+from optics_raytracer.optics.colored_object import ColoredObject
+from optics_raytracer.optics.lens import Lens
+from optics_raytracer.rendering.color_tracer import ColorTracer
+from optics_raytracer.rendering.export_3d import Exporter3D
+from optics_raytracer.scene.lens_visibility import LensVisibility
+from optics_raytracer.scene.optical_train import OpticalTrain
+from optics_raytracer.scene.tile_binning import TileBinning
+
+
+class SequentialColorTracer(ColorTracer):
+    """
+    Color tracer for optical trains, visiting the lenses one after another in axial order.
+
+    The rays are rotated into the frame of the optical axis once and crossed with each
+    lens plane in turn, so there is no nearest-hit search over the whole scene. Rays
+    outside a lens aperture leave that lens out and go on unrefracted, exactly as in
+    the general tracer, and the objects behind the last lens are hit once at the end.
+    """
+
+    def __init__(
+        self,
+        exporter: Exporter3D,
+        colored_objects: List[ColoredObject],
+        lenses: List[Lens],
+        fallback_to_general: bool = True,
+        **kwargs,
+    ):
+        """
+        Initialize the sequential color tracer.
+
+        Args:
+            exporter: 3D exporter for visualization
+            colored_objects: List of colored objects in the scene
+            lenses: List of lenses in the scene
+            fallback_to_general: If True, scenes or rays that don't form a sequential
+                train go through the general tracer, otherwise they raise ValueError
+            **kwargs: Remaining ColorTracer arguments
+        """
+        super().__init__(exporter, colored_objects, lenses, **kwargs)
+        self.fallback_to_general = fallback_to_general
+        self.train = OpticalTrain.build(colored_objects, lenses)
+
+    def get_colors(
+        self,
+        rays: np.ndarray,
+        tile_binning: TileBinning = None,
+        lens_visibility: LensVisibility = None,
+    ) -> np.ndarray:
+        """
+        Get colors for an array of rays by tracing them through the optical train.
+
+        Args:
+            rays: Array of rays to trace (ray_dtype or RayBatch)
+            tile_binning: Optional screen-space binning of the rays, used wherever
+                they go through the general tracer
+            lens_visibility: Optional visibility of the lenses, used wherever the
+                rays go through the general tracer
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        if self.train is None or not self.train.accepts(rays):
+            if not self.fallback_to_general:
+                raise ValueError(
+                    "Scene is not a sequential optical train: lenses must be parallel "
+                    "single lenses, at distinct positions along the axis, in front of "
+                    "the rays and of every object"
+                )
+            return super().get_colors(rays, tile_binning, lens_visibility)
+
+        colors = np.tile(self.default_color, (len(rays), 1))
+        origins = self.train.to_local(rays["origin"])
+        directions = self.train.to_local(rays["direction"])
+        hit_counts = np.zeros(len(rays), dtype=np.int64)
+
+        for position, lens_index, lens in zip(
+            self.train.positions, self.train.lens_indices, self.train.local_lenses
+        ):
+            ts = (position - origins[:, 2]) / directions[:, 2]
+            x = origins[:, 0] + ts * directions[:, 0]
+            y = origins[:, 1] + ts * directions[:, 1]
+            x -= lens.center[0]
+            y -= lens.center[1]
+            inside = x * x + y * y <= lens.array["radius"] ** 2
+            inside &= (ts >= 1e-6) & (ts <= 100000)
+            hits = np.flatnonzero(inside)
+            if len(hits) == 0:
+                continue
+
+            self._save_hit_rays_by_depth(
+                origins[hits],
+                directions[hits],
+                ts[hits],
+                hit_counts[hits],
+                "lens",
+                lens_index,
+            )
+            hit_points = np.column_stack(
+                [
+                    x[hits] + lens.center[0],
+                    y[hits] + lens.center[1],
+                    np.full(len(hits), position, dtype=np.float32),
+                ]
+            )
+            directions[hits] = lens.get_new_directions(directions[hits], hit_points)
+            origins[hits] = hit_points
+            hit_counts[hits] += 1
+
+        self._shade_objects(
+            RayBatch(self.train.to_world(origins), self.train.to_world(directions)),
+            hit_counts,
+            colors,
+        )
+        return colors
+
+    def _shade_objects(self, rays: RayBatch, hit_counts, colors):
+        object_scene = self.train.object_scene
+        surface_indices, hit_ts, hit_uvs = object_scene.nearest_hit(
+            rays, workspace=self.workspace
+        )
+        order, offsets = group_by_index(surface_indices + 1, len(object_scene) + 1)
+
+        if offsets[1] and self.include_missed_rays:
+            self._save_missed_rays(rays[order[: offsets[1]]])
+
+        hits = order[offsets[1] :]
+        colors[hits] = self.shade_objects(
+            object_scene.ids[surface_indices[hits]], hit_uvs[hits]
+        )
+        for surface in np.flatnonzero(np.diff(offsets[1:])):
+            group = order[offsets[surface + 1] : offsets[surface + 2]]
+            object_index = object_scene.ids[surface]
+            self._save_hit_rays_by_depth(
+                rays.origins[group],
+                rays.directions[group],
+                hit_ts[group],
+                hit_counts[group],
+                "object",
+                object_index,
+                local=False,
+            )
+
+    def _save_hit_rays_by_depth(
+        self,
+        origins,
+        directions,
+        hit_ts,
+        hit_counts,
+        hit_object_type,
+        hit_object_index,
+        local=True,
+    ):
+        """
+        Save visualization of hit rays, split by the number of lenses each ray went through.
+        """
+        if self.ray_sampling_rate_for_3d_export <= 0:
+            return
+        if local:
+            origins = self.train.to_world(origins)
+            directions = self.train.to_world(directions)
+        for hit_count in np.unique(hit_counts):
+            selection = hit_counts == hit_count
+            self._save_hit_rays(
+                RayBatch(origins[selection], directions[selection]),
+                hit_ts[selection],
+                depth=int(hit_count) or None,
+                hit_object_type=hit_object_type,
+                hit_object_index=hit_object_index,
+            )
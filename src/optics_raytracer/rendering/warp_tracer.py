@@ -0,0 +1,193 @@
+import numpy as np
+from typing import List
+
+from optics_raytracer.optics.colored_object import ColoredObject
+from optics_raytracer.optics.lens import Lens
+from optics_raytracer.rendering.export_3d import Exporter3D
+from optics_raytracer.rendering.sequential_tracer import SequentialColorTracer
+from optics_raytracer.scene.lens_visibility import LensVisibility
+from optics_raytracer.scene.packed_scene import PackedScene
+from optics_raytracer.scene.projective_warp import ProjectiveWarp
+from optics_raytracer.scene.tile_binning import TileBinning
+
+
+class WarpColorTracer(SequentialColorTracer):
+    """
+    Color tracer rendering pinhole views of planar scenes as projective warps.
+
+    When all rays share one origin, as with a SimpleCamera, their hits on the lenses
+    and objects of an optical train follow from the closed-form maps of ProjectiveWarp,
+    with no intersection search. One warp follows the rays through every lens and one
+    the rays passing beside all of them. Rays that don't fit either, or that have more
+    than one object under them, are traced by the sequential tracer instead, and so
+    are scenes that don't fit at all.
+    """
+
+    def __init__(
+        self,
+        exporter: Exporter3D,
+        colored_objects: List[ColoredObject],
+        lenses: List[Lens],
+        **kwargs,
+    ):
+        """
+        Initialize the warp color tracer.
+
+        Args:
+            exporter: 3D exporter for visualization
+            colored_objects: List of colored objects in the scene
+            lenses: List of lenses in the scene
+            **kwargs: Remaining SequentialColorTracer arguments
+        """
+        super().__init__(exporter, colored_objects, lenses, **kwargs)
+        self.warped_ray_count = 0
+
+    def get_colors(
+        self,
+        rays: np.ndarray,
+        tile_binning: TileBinning = None,
+        lens_visibility: LensVisibility = None,
+    ) -> np.ndarray:
+        """
+        Get colors for an array of rays, warping them wherever the closed form holds.
+
+        Args:
+            rays: Array of rays to trace (ray_dtype or RayBatch)
+            tile_binning: Optional screen-space binning of the rays, used wherever
+                they go through the general tracer
+            lens_visibility: Optional visibility of the lenses, used wherever the
+                rays go through the general tracer
+
+        Returns:
+            Array of colors (Nx3) in RGB format with values between 0 and 1
+        """
+        origins = rays["origin"]
+        self.warped_ray_count = 0
+        if (
+            self.train is None
+            or len(rays) == 0
+            or not np.all(origins == origins[0])
+            or not self.train.accepts(rays)
+        ):
+            return super().get_colors(rays, tile_binning, lens_visibility)
+
+        directions = np.ascontiguousarray(rays["direction"])
+        colors = np.tile(self.default_color, (len(rays), 1))
+        refracting_warp = ProjectiveWarp.build(self.train, origins[0])
+        straight_warp = ProjectiveWarp.build(self.train, origins[0], refract=False)
+
+        # Rays either pass through every lens or beside all of them, the rest mix both
+        through_lenses = np.ones(len(rays), dtype=bool)
+        beside_lenses = np.ones(len(rays), dtype=bool)
+        for index, lens in enumerate(self.train.local_lenses):
+            radius = lens.array["radius"]
+            through_lenses &= refracting_warp.get_aperture_mask(index, directions, radius)
+            beside_lenses &= ~straight_warp.get_aperture_mask(index, directions, radius)
+        traced = ~(through_lenses | beside_lenses)
+
+        for warp, selection in (
+            (refracting_warp, through_lenses),
+            (straight_warp, beside_lenses),
+        ):
+            if warp is straight_warp and not self.train.local_lenses:
+                continue
+            ray_indices = np.flatnonzero(selection)
+            self._shade_warped_rays(
+                warp, directions[ray_indices], ray_indices, colors, traced
+            )
+
+        self.warped_ray_count = int(len(rays) - np.count_nonzero(traced))
+        if np.any(traced):
+            colors[traced] = super().get_colors(
+                rays[traced], lens_visibility=lens_visibility
+            )
+        return colors
+
+    def _shade_warped_rays(self, warp, directions, ray_indices, colors, traced):
+        """
+        Shade the rays of one warp, marking the ones it can't resolve for the tracer.
+        """
+        object_hits = [
+            self._get_object_hit(warp, index, directions)
+            for index in range(len(self.train.object_scene))
+        ]
+
+        # Overlapping objects need the depth test of the tracer
+        coverage = np.zeros(len(directions), dtype=np.int64)
+        for inside, _ in object_hits:
+            coverage += inside
+        unresolved = coverage > 1
+        if self.include_missed_rays:
+            unresolved |= coverage == 0
+        traced[ray_indices[unresolved]] = True
+
+        if self.ray_sampling_rate_for_3d_export > 0:
+            self._save_warped_hits(warp, directions, object_hits, ~unresolved)
+        # Every resolved ray hits at most one object, shaded in one call per type
+        object_indices = np.full(len(directions), -1, dtype=np.int64)
+        hit_uvs = np.empty((len(directions), 2), dtype=self.dtype)
+        for index, (inside, uvs) in enumerate(object_hits):
+            hits = inside & ~unresolved
+            object_indices[hits] = self.train.object_scene.ids[index]
+            hit_uvs[hits] = uvs[hits]
+        hits = object_indices >= 0
+        colors[ray_indices[hits]] = self.shade_objects(
+            object_indices[hits], hit_uvs[hits]
+        )
+
+    def _get_object_hit(self, warp, index, directions):
+        scene = self.train.object_scene
+        uvs, distances = warp.get_object_coordinates(index, directions)
+        # Past the lenses the distance is axial, which only differs from t near t_max
+        with np.errstate(invalid="ignore"):
+            inside = PackedScene._get_inside_mask(
+                uvs[:, 0],
+                uvs[:, 1],
+                distances,
+                scene.kinds[index],
+                scene.extents[index],
+                100000,
+                hole_radii=scene.hole_radii[index],
+            )
+        return inside, uvs
+
+    def _save_warped_hits(self, warp, directions, object_hits, warped):
+        """
+        Save visualization of the warped rays, rebuilding their hit points.
+        """
+        directions = directions[warped]
+        start_points = np.broadcast_to(warp.origin, directions.shape)
+        hit_count = 0
+        if warp.refract:
+            for index, point_matrix in enumerate(warp.lens_point_matrices):
+                points = warp.get_points(point_matrix, directions)
+                lens_index = self.train.lens_indices[index]
+                self._save_segments(start_points, points, index, "lens", lens_index)
+                start_points = points
+                hit_count += 1
+
+        for index, (inside, _) in enumerate(object_hits):
+            hits = inside[warped]
+            points = warp.get_points(warp.object_point_matrices[index], directions[hits])
+            self._save_segments(
+                start_points[hits],
+                points,
+                hit_count,
+                "object",
+                self.train.object_scene.ids[index],
+            )
+
+    def _save_segments(
+        self, start_points, end_points, hit_count, hit_object_type, hit_object_index
+    ):
+        segments = end_points - start_points
+        ts = np.linalg.norm(segments, axis=1)
+        self._save_hit_rays_by_depth(
+            start_points,
+            segments / ts[:, np.newaxis],
+            ts,
+            np.full(len(ts), hit_count),
+            hit_object_type,
+            hit_object_index,
+            local=False,
+        )
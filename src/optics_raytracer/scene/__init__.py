@@ -0,0 +1,3 @@
+"""
+Compiled scene representations for fast ray queries.
+"""
@@ -0,0 +1,251 @@
+import numpy as np
+
+from optics_raytracer.core.ray_batch import get_ray_arrays
+from optics_raytracer.core.workspace import Workspace, get_buffer
+from optics_raytracer.scene.packed_scene import PackedScene
+
+# Below this surface count the brute-force pass of PackedScene is faster
+# (see experiments/2026/10/bvh_crossover_benchmark.py)
+BVH_SURFACE_THRESHOLD = 128
+
+
+def get_column_values(column: np.ndarray, ray_ids: np.ndarray) -> np.ndarray:
+    """
+    Gather the values of some rays from a per-axis column, which holds a single
+    value when it comes from a shared origin or direction.
+    """
+    return column if len(column) == 1 else column[ray_ids]
+
+
+class BoundingVolumeHierarchy:
+    """
+    Bounding volume hierarchy over the surfaces of a PackedScene.
+
+    Nodes are stored in flat arrays. Leaves reference a contiguous range of the
+    primitive order, and every internal node keeps the axis it was split on so the
+    traversal can visit the near child first.
+    """
+
+    def __init__(
+        self,
+        scene: PackedScene,
+        box_mins: np.ndarray,
+        box_maxs: np.ndarray,
+        left_children: np.ndarray,
+        right_children: np.ndarray,
+        split_axes: np.ndarray,
+        first_primitives: np.ndarray,
+        primitive_counts: np.ndarray,
+        primitive_order: np.ndarray,
+        depth: int,
+    ):
+        self.scene = scene
+        self.box_mins = box_mins
+        self.box_maxs = box_maxs
+        self.left_children = left_children
+        self.right_children = right_children
+        self.split_axes = split_axes
+        self.first_primitives = first_primitives
+        self.primitive_counts = primitive_counts
+        self.primitive_order = primitive_order
+        self.depth = depth
+        self.box_min_columns = np.ascontiguousarray(box_mins.T)
+        self.box_max_columns = np.ascontiguousarray(box_maxs.T)
+
+    def __len__(self) -> int:
+        return len(self.scene)
+
+    @staticmethod
+    def build(scene: PackedScene, leaf_size: int = 4) -> "BoundingVolumeHierarchy":
+        """
+        Build the hierarchy with median splits along the widest centroid axis.
+
+        Args:
+            scene: Packed scene to index
+            leaf_size: Maximum number of surfaces in a leaf
+
+        Returns:
+            New BoundingVolumeHierarchy instance
+        """
+        surface_mins, surface_maxs = scene.get_bounds()
+        # Planar surfaces are flat boxes, pad them to stay conservative in float32
+        padding = 1e-5 * (1 + np.maximum(np.abs(surface_mins), np.abs(surface_maxs)))
+        surface_mins = surface_mins - padding
+        surface_maxs = surface_maxs + padding
+        centroids = (surface_mins + surface_maxs) / 2
+
+        box_mins, box_maxs = [], []
+        left_children, right_children, split_axes = [], [], []
+        first_primitives, primitive_counts = [], []
+        primitive_order = []
+        depth = 0
+
+        stack = [(np.arange(len(scene)), None, 1)]
+        while stack:
+            indices, parent_slot, node_depth = stack.pop()
+            node = len(box_mins)
+            depth = max(depth, node_depth)
+            if parent_slot is not None:
+                children, parent = parent_slot
+                children[parent] = node
+
+            box_mins.append(surface_mins[indices].min(axis=0))
+            box_maxs.append(surface_maxs[indices].max(axis=0))
+            left_children.append(-1)
+            right_children.append(-1)
+
+            if len(indices) <= leaf_size:
+                split_axes.append(-1)
+                first_primitives.append(len(primitive_order))
+                primitive_counts.append(len(indices))
+                primitive_order.extend(indices)
+                continue
+
+            spread = np.ptp(centroids[indices], axis=0)
+            axis = int(np.argmax(spread))
+            indices = indices[np.argsort(centroids[indices, axis], kind="stable")]
+            middle = len(indices) // 2
+            split_axes.append(axis)
+            first_primitives.append(0)
+            primitive_counts.append(0)
+            stack.append((indices[middle:], (right_children, node), node_depth + 1))
+            stack.append((indices[:middle], (left_children, node), node_depth + 1))
+
+        return BoundingVolumeHierarchy(
+            scene=scene,
+            box_mins=np.array(box_mins, dtype=scene.dtype).reshape(-1, 3),
+            box_maxs=np.array(box_maxs, dtype=scene.dtype).reshape(-1, 3),
+            left_children=np.array(left_children, dtype=np.int64),
+            right_children=np.array(right_children, dtype=np.int64),
+            split_axes=np.array(split_axes, dtype=np.int64),
+            first_primitives=np.array(first_primitives, dtype=np.int64),
+            primitive_counts=np.array(primitive_counts, dtype=np.int64),
+            primitive_order=np.array(primitive_order, dtype=np.int64),
+            depth=depth,
+        )
+
+    def nearest_hit(self, rays, t_max: float = 100000, workspace: Workspace = None):
+        """
+        Find the nearest surface hit by each ray.
+
+        Every ray keeps its own node stack, and all rays pop one node per iteration,
+        so the Python loop runs once per visited node level rather than once per ray
+        or surface. Boxes further than the best hit so far are skipped.
+
+        Args:
+            rays: Rays to intersect (ray_dtype or RayBatch)
+            t_max: Hits further than this are ignored
+            workspace: Optional arena for the results and the traversal stack
+
+        Returns:
+            Tuple of the nearest surface index (-1 for misses), its t (inf for misses)
+            and the local (u, v) coordinates of the hit on that surface (Nx2)
+        """
+        origins, directions = get_ray_arrays(rays)
+        ray_count = len(rays)
+        surface_indices = get_buffer(workspace, "surface_indices", ray_count, np.int64)
+        hit_ts = get_buffer(workspace, "hit_ts", ray_count, self.scene.dtype)
+        hit_uvs = get_buffer(workspace, "hit_uvs", (ray_count, 2), self.scene.dtype)
+        surface_indices.fill(-1)
+        hit_ts.fill(np.inf)
+        hit_uvs.fill(0)
+        if len(self) == 0 or ray_count == 0:
+            return surface_indices, hit_ts, hit_uvs
+
+        # Per-axis columns keep the box tests on contiguous 1D arrays, a shared
+        # origin or direction gives columns of one value
+        origin_columns = np.ascontiguousarray(np.atleast_2d(origins).T)
+        safe_directions = np.where(directions == 0, 1e-12, directions)
+        inverse_direction_columns = np.ascontiguousarray(
+            (1 / np.atleast_2d(safe_directions)).T
+        )
+
+        # The near child is pushed last, so the stack holds at most one entry per level
+        stack = get_buffer(workspace, "bvh_stack", (ray_count, self.depth + 1), np.int64)
+        stack[:, 0] = 0
+        stack_sizes = get_buffer(workspace, "bvh_stack_sizes", ray_count, np.int64)
+        stack_sizes.fill(1)
+
+        active = np.arange(ray_count)
+        while len(active):
+            stack_sizes[active] -= 1
+            nodes = stack.reshape(-1)[active * stack.shape[1] + stack_sizes[active]]
+
+            near_ts, far_ts = self._get_box_hit_ts(
+                origin_columns, inverse_direction_columns, active, nodes
+            )
+            visited = (
+                (near_ts <= far_ts) & (far_ts >= 1e-6) & (near_ts < hit_ts[active])
+            )
+            rays_at_nodes = active[visited]
+            nodes = nodes[visited]
+
+            is_leaf = self.primitive_counts[nodes] > 0
+            self._intersect_leaves(
+                rays["origin"],
+                rays["direction"],
+                rays_at_nodes[is_leaf],
+                nodes[is_leaf],
+                surface_indices,
+                hit_ts,
+                hit_uvs,
+                t_max,
+            )
+            self._push_children(
+                directions, rays_at_nodes[~is_leaf], nodes[~is_leaf], stack, stack_sizes
+            )
+
+            active = active[stack_sizes[active] > 0]
+
+        return surface_indices, hit_ts, hit_uvs
+
+    def _get_box_hit_ts(self, origin_columns, inverse_direction_columns, ray_ids, nodes):
+        near_ts = None
+        for axis in range(3):
+            origins = get_column_values(origin_columns[axis], ray_ids)
+            inverse_directions = get_column_values(
+                inverse_direction_columns[axis], ray_ids
+            )
+            first_ts = (self.box_min_columns[axis][nodes] - origins) * inverse_directions
+            second_ts = (self.box_max_columns[axis][nodes] - origins) * inverse_directions
+            if near_ts is None:
+                near_ts = np.minimum(first_ts, second_ts)
+                far_ts = np.maximum(first_ts, second_ts)
+            else:
+                np.maximum(near_ts, np.minimum(first_ts, second_ts), out=near_ts)
+                np.minimum(far_ts, np.maximum(first_ts, second_ts), out=far_ts)
+        return near_ts, far_ts
+
+    def _intersect_leaves(
+        self, origins, directions, ray_ids, nodes, surface_indices, hit_ts, hit_uvs, t_max
+    ):
+        first_primitives = self.first_primitives[nodes]
+        counts = self.primitive_counts[nodes]
+        # One pass per leaf slot, so every ray appears at most once in each pass
+        for slot in range(counts.max(initial=0)):
+            in_slot = counts > slot
+            slot_rays = ray_ids[in_slot]
+            slot_surfaces = self.primitive_order[first_primitives[in_slot] + slot]
+            slot_ts, slot_uvs = self.scene.intersect_pairs(
+                origins[slot_rays], directions[slot_rays], slot_surfaces, t_max
+            )
+            closer = slot_ts < hit_ts[slot_rays]
+            hit_ts[slot_rays[closer]] = slot_ts[closer]
+            hit_uvs[slot_rays[closer]] = slot_uvs[closer]
+            surface_indices[slot_rays[closer]] = slot_surfaces[closer]
+
+    def _push_children(self, directions, ray_ids, nodes, stack, stack_sizes):
+        if len(ray_ids) == 0:
+            return
+        if directions.ndim == 1:
+            left_first = directions[self.split_axes[nodes]] >= 0
+        else:
+            left_first = directions.ravel()[ray_ids * 3 + self.split_axes[nodes]] >= 0
+        left_children = self.left_children[nodes]
+        right_children = self.right_children[nodes]
+
+        flat_stack = stack.reshape(-1)
+        slots = ray_ids * stack.shape[1] + stack_sizes[ray_ids]
+        flat_stack[slots] = np.where(left_first, right_children, left_children)
+        flat_stack[slots + 1] = np.where(left_first, left_children, right_children)
+        stack_sizes[ray_ids] += 2
@@ -0,0 +1,207 @@
+import numpy as np
+
+from optics_raytracer.scene.packed_scene import SURFACE_KIND_CIRCLE, PackedScene
+
+# Cells per side of the grid over each lens
+DEFAULT_POSITION_CELLS = 8
+
+# Cells per side of the grid of ray slopes on each side of a lens
+DEFAULT_SLOPE_CELLS = 32
+
+# Largest tabulated slope against the lens normal, steeper rays are always accepted
+MAX_SLOPE = 1.0
+
+# Patches per side of every target surface, each bounded by its own sphere
+TARGET_PATCHES = 4
+
+# Relative padding of the patch spheres, covering the float32 rounding of the rays
+REACH_MARGIN = 1e-4
+
+# Upper bound for the cell-patch pairs evaluated at once while building
+BUILD_BLOCK_ELEMENTS = 1 << 22
+
+
+def get_surface_patches(scene: PackedScene, patches: int):
+    """
+    Split every surface into a grid of patches and bound each by a sphere.
+
+    Args:
+        scene: Packed scene to split
+        patches: Patches per side of every surface
+
+    Returns:
+        Tuple of the patch centers (Mx3), their bounding radii (M,) and the index of
+        the surface each patch belongs to (M,), without the patches lying outside
+        of circles
+    """
+    steps = (np.arange(patches) + 0.5) / patches * 2 - 1
+    u_steps, v_steps = (grid.reshape(-1) for grid in np.meshgrid(steps, steps))
+    extents = scene.extents.astype(np.float64)
+    offsets = (
+        (u_steps * extents[:, :1])[..., np.newaxis] * scene.u_vectors[:, np.newaxis]
+        + (v_steps * extents[:, 1:])[..., np.newaxis] * scene.v_vectors[:, np.newaxis]
+    )
+    centers = scene.points[:, np.newaxis] + offsets
+    radii = np.repeat(np.hypot(*extents.T)[:, np.newaxis] / patches, patches**2, axis=1)
+    surfaces = np.repeat(np.arange(len(scene))[:, np.newaxis], patches**2, axis=1)
+    kept = (scene.kinds[:, np.newaxis] != SURFACE_KIND_CIRCLE) | (
+        np.linalg.norm(offsets, axis=2) - radii <= extents[:, :1]
+    )
+    return centers[kept], radii[kept], surfaces[kept]
+
+
+class LensAcceptance:
+    """
+    Precomputed exits of every lens that can still reach another surface.
+
+    A ray leaving a lens is described in the lens frame by its exit point (x, y) on
+    the lens, the side it leaves to and its slopes (dx/dz, dy/dz). Both the square
+    around the lens and the slopes are split into grids of cells. A box of exit
+    points and slopes crosses the plane at height z in the box of points
+    (x + z * dx/dz, y + z * dy/dz), so a cell is accepted when that box comes close
+    enough to a patch of another lens or object for a ray to hit its bounding
+    sphere. The x and y terms are independent, which keeps fine grids cheap to build.
+
+    Rays leaving a lens through a rejected cell provably miss the whole scene, so
+    they can be terminated right after refraction instead of going through one more
+    nearest-hit pass.
+    """
+
+    def __init__(
+        self,
+        scene: PackedScene,
+        tables: np.ndarray,
+        position_cells: int,
+        slope_cells: int,
+    ):
+        self.scene = scene
+        self.tables = tables
+        self.position_cells = position_cells
+        self.slope_cells = slope_cells
+
+    @staticmethod
+    def build(
+        scene: PackedScene,
+        position_cells: int = DEFAULT_POSITION_CELLS,
+        slope_cells: int = DEFAULT_SLOPE_CELLS,
+    ) -> "LensAcceptance":
+        """
+        Precompute the acceptance tables of every lens of a packed scene.
+
+        Args:
+            scene: Packed scene, with the lenses after the objects
+            position_cells: Cells per side of the grid over each lens
+            slope_cells: Cells per side of the grid of slopes on each side of a lens
+
+        Returns:
+            New LensAcceptance instance
+        """
+        patch_centers, patch_radii, patch_surfaces = get_surface_patches(
+            scene, TARGET_PATCHES
+        )
+        slope_edges = np.linspace(-MAX_SLOPE, MAX_SLOPE, slope_cells + 1)
+        slope_bounds = (slope_edges[:-1, np.newaxis], slope_edges[1:, np.newaxis])
+        largest_slopes = np.maximum(*np.abs(slope_bounds))
+
+        lens_count = len(scene) - scene.object_count
+        cell_shape = (position_cells, slope_cells, position_cells, slope_cells)
+        block_size = max(1, BUILD_BLOCK_ELEMENTS // int(np.prod(cell_shape)))
+        tables = np.zeros((lens_count, 2, *cell_shape), dtype=bool)
+        for lens_surface in range(lens_count):
+            surface = scene.object_count + lens_surface
+            targets = np.flatnonzero(patch_surfaces != surface)
+            lens_extent = scene.extents[surface].max()
+            frame = np.array(
+                [
+                    scene.u_vectors[surface],
+                    scene.v_vectors[surface],
+                    scene.normals[surface],
+                ],
+                dtype=np.float64,
+            )
+            position_edges = np.linspace(-lens_extent, lens_extent, position_cells + 1)
+            position_bounds = (
+                position_edges[:-1, np.newaxis, np.newaxis],
+                position_edges[1:, np.newaxis, np.newaxis],
+            )
+
+            for start in range(0, len(targets), block_size):
+                block = targets[start : start + block_size]
+                centers = (patch_centers[block] - scene.points[surface]) @ frame.T
+                reach = (patch_radii[block] + lens_extent * REACH_MARGIN) * (
+                    1 + REACH_MARGIN
+                )
+                for side, sign in enumerate((1, -1)):
+                    heights = sign * centers[:, 2]
+                    # A ray hitting a sphere at height h crosses the plane at that
+                    # height within reach * sqrt(1 + slope^2) of its center
+                    terms = []
+                    for axis in (0, 1):
+                        ends = [
+                            position + heights * slopes
+                            for position in position_bounds
+                            for slopes in slope_bounds
+                        ]
+                        gaps = np.maximum(
+                            np.min(ends, axis=0) - centers[:, axis],
+                            centers[:, axis] - np.max(ends, axis=0),
+                        )
+                        gaps = np.maximum(gaps, 0)
+                        terms.append(gaps**2 - (reach * largest_slopes) ** 2)
+                    accepted = (
+                        terms[0][:, :, np.newaxis, np.newaxis]
+                        + terms[1][np.newaxis, np.newaxis]
+                        <= reach**2
+                    )
+                    # Only patches reaching the side the rays leave to
+                    accepted &= heights + reach >= 0
+                    tables[lens_surface, side] |= np.any(accepted, axis=-1)
+
+        return LensAcceptance(scene, tables, position_cells, slope_cells)
+
+    def accepts(
+        self, lens_surface: int, hit_points: np.ndarray, directions: np.ndarray
+    ) -> np.ndarray:
+        """
+        Get the mask of the rays leaving a lens that may still hit another surface.
+
+        Args:
+            lens_surface: Index of the lens among the lens surfaces of the scene
+            hit_points: Points where the rays left the lens (Nx3)
+            directions: Directions of the rays after refraction (Nx3)
+
+        Returns:
+            Boolean mask, False for the rays that provably escape
+        """
+        surface = self.scene.object_count + lens_surface
+        lens_extent = self.scene.extents[surface].max()
+        u = self.scene.u_vectors[surface]
+        v = self.scene.v_vectors[surface]
+        offsets = hit_points - self.scene.points[surface]
+        heights = directions @ self.scene.normals[surface]
+        x_slopes = directions @ u
+        y_slopes = directions @ v
+        limits = np.abs(heights) * MAX_SLOPE
+        steep = (np.abs(x_slopes) >= limits) | (np.abs(y_slopes) >= limits)
+
+        indices = (heights < 0).astype(np.int64)
+        position_scale = self.position_cells / (2 * lens_extent)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope_scale = self.slope_cells / (2 * MAX_SLOPE) / np.abs(heights)
+            for coordinates, scale, count in (
+                (offsets @ u, position_scale, self.position_cells),
+                (x_slopes, slope_scale, self.slope_cells),
+                (offsets @ v, position_scale, self.position_cells),
+                (y_slopes, slope_scale, self.slope_cells),
+            ):
+                coordinates *= scale
+                coordinates += count / 2
+                cells = np.clip(coordinates, 0, count - 1).astype(np.int64)
+                indices *= count
+                indices += cells
+        # Rays along the lens plane get meaningless cells, they are steep anyway
+        accepted = np.take(
+            self.tables[lens_surface].reshape(-1), indices, mode="clip"
+        )
+        accepted |= steep
+        return accepted
@@ -0,0 +1,545 @@
+import numpy as np
+
+from optics_raytracer.core.grouping import group_by_index
+from optics_raytracer.core.ray_batch import RayBatch, get_ray_arrays
+from optics_raytracer.core.workspace import Workspace, get_buffer
+from optics_raytracer.optics.lens_array import LensArray
+from optics_raytracer.scene.bvh import BVH_SURFACE_THRESHOLD, BoundingVolumeHierarchy
+from optics_raytracer.scene.lens_acceptance import (
+    BUILD_BLOCK_ELEMENTS,
+    REACH_MARGIN,
+    TARGET_PATCHES,
+    get_surface_patches,
+)
+from optics_raytracer.scene.packed_scene import SURFACE_KIND_CIRCLE, PackedScene
+
+# Angle in radians added to every cone, covering the float32 rounding of the rays
+ANGLE_MARGIN = 1e-4
+
+# Largest cone half-angle, the rays of a side may go anywhere in front of it
+HALF_SPACE = np.pi / 2
+
+# Surfaces whose normal is this close to a lens axis are tested in its frame
+PARALLEL_TOLERANCE = 1e-12
+
+# Rays of a candidate set under which it is tested with the other small sets
+POOLED_SET_RAYS = 4096
+
+# Candidates of a set above which its rays go through the BVH of a large scene
+POOLED_SET_SURFACES = 32
+
+
+def get_cone_distances(
+    apexes: np.ndarray, axes: np.ndarray, angles: np.ndarray, points: np.ndarray
+) -> np.ndarray:
+    """
+    Get the distance from points to cones, every point against every cone.
+
+    Args:
+        apexes: Apexes of the cones (Cx3)
+        axes: Unit axes of the cones (Cx3)
+        angles: Half-angles of the cones in radians (C,), at most HALF_SPACE
+        points: Points to measure (Px3)
+
+    Returns:
+        Array of distances (CxP), 0 for the points inside a cone
+    """
+    offsets = points[np.newaxis] - apexes[:, np.newaxis]
+    lengths = np.linalg.norm(offsets, axis=2)
+    along = np.einsum("cpj,cj->cp", offsets, axes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        point_angles = np.arccos(np.clip(along / lengths, -1, 1))
+    # Outside the cone, the nearest point is on the closest ray of its surface,
+    # or the apex once the point is behind that ray
+    gaps = np.nan_to_num(point_angles, nan=0) - angles[:, np.newaxis]
+    return np.where(
+        gaps <= 0, 0, np.where(gaps < np.pi / 2, lengths * np.sin(gaps), lengths)
+    )
+
+
+class LensVisibility:
+    """
+    Surfaces reachable by the rays leaving each side of every lens.
+
+    A thin lens keeps the side a ray travels to and changes its slopes against the
+    lens normal by its offset from the center over the focal distance, so the rays
+    leaving a side stay within the cone of their incoming directions widened by the
+    aperture radius over the focal distance. The primary rays bound the directions
+    reaching every lens, and the exit cones of a lens bound the directions reaching
+    the lenses they touch, which are propagated until no cone grows.
+
+    Every exit keeps the surfaces within the aperture radius of its cone, without the
+    lens itself, and exits with the same candidates share one candidate set. The rays
+    leaving the lenses are only tested against the candidates of their exit, so a
+    relay or a sheet of lenses costs what the neighbourhood of each lens costs rather
+    than the whole scene. Sets with many rays get their own reduced scene, built on
+    first use, while the rays of the other sets are tested together, one candidate
+    slot at a time, which keeps thousands of small sets cheap. In a scene large
+    enough for a BVH, the rays of the sets with more than POOLED_SET_SURFACES
+    candidates go through the BVH of the whole scene instead.
+    """
+
+    def __init__(
+        self,
+        scene: PackedScene,
+        exit_angles: np.ndarray,
+        exit_candidates: np.ndarray,
+        bvh_surface_threshold: int = BVH_SURFACE_THRESHOLD,
+    ):
+        self.scene = scene
+        self.exit_angles = exit_angles
+        self.exit_candidates = exit_candidates
+
+        lens_count = len(scene) - scene.object_count
+        exit_rows = exit_candidates.reshape(lens_count * 2, len(scene))
+        # Rows packed to bytes sort much faster than boolean rows
+        _, first_exits, exit_sets = np.unique(
+            np.packbits(exit_rows, axis=1),
+            axis=0,
+            return_index=True,
+            return_inverse=True,
+        )
+        candidate_sets = exit_rows[first_exits]
+        self.exit_sets = exit_sets.reshape(lens_count, 2)
+        self.bvh_surface_threshold = bvh_surface_threshold
+        self.set_surfaces = [np.flatnonzero(candidates) for candidates in candidate_sets]
+        # Reduced scenes of the sets with many rays and the BVH of the whole scene,
+        # built on first use
+        self.set_accelerators = [None] * len(self.set_surfaces)
+        self.scene_accelerator = None
+        # Candidates of every set in increasing order, padded with -1
+        self.set_counts = candidate_sets.sum(axis=1)
+        self.set_table = np.full(
+            (len(candidate_sets), self.set_counts.max(initial=0)), -1, dtype=np.int64
+        )
+        for set_index, surfaces in enumerate(self.set_surfaces):
+            self.set_table[set_index, : len(surfaces)] = surfaces
+
+    @property
+    def candidate_fraction(self) -> float:
+        """
+        Mean fraction of the scene kept by the lens exits that rays can leave through.
+        """
+        reached = np.isfinite(self.exit_angles)
+        if not np.any(reached) or len(self.scene) == 0:
+            return 0.0
+        return float(self.exit_candidates[reached].mean())
+
+    @staticmethod
+    def build(
+        scene: PackedScene,
+        lenses,
+        rays,
+        power_scales: np.ndarray = None,
+        bvh_surface_threshold: int = BVH_SURFACE_THRESHOLD,
+    ) -> "LensVisibility":
+        """
+        Find the surfaces the rays leaving every lens of a packed scene can reach.
+
+        Args:
+            scene: Packed scene, with the lenses after the objects
+            lenses: List of lenses and lens arrays the scene was packed with
+            rays: Primary rays (ray_dtype or RayBatch)
+            power_scales: Optional optical power of every lens at every wavelength
+                sample, relative to its own (lens count x samples)
+            bvh_surface_threshold: Candidate count from which an exit set gets a BVH
+
+        Returns:
+            New LensVisibility instance
+        """
+        object_count = scene.object_count
+        lens_count = len(scene) - object_count
+        centers = scene.points[object_count:].astype(np.float64)
+        normals = scene.normals[object_count:].astype(np.float64)
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+        extents = scene.extents[object_count:].astype(np.float64)
+        radii = np.where(
+            scene.kinds[object_count:] == SURFACE_KIND_CIRCLE,
+            extents[:, 0],
+            np.hypot(*extents.T),
+        )
+        # Exit 2 * i leaves lens i along its normal, exit 2 * i + 1 against it
+        exit_axes = np.stack([normals, -normals], axis=1).reshape(-1, 3)
+
+        # Largest slope change of every lens, a cell of a lens array bending the
+        # rays from its own center
+        slope_changes = np.empty(lens_count)
+        for lens_surface, lens_index in enumerate(scene.ids[object_count:]):
+            lens = lenses[lens_index]
+            if isinstance(lens, LensArray):
+                radius = float(lens.cell_radius)
+                focal_distance = np.abs(lens.focal_distances).min()
+            else:
+                radius = float(lens.array["radius"])
+                focal_distance = abs(float(lens.array["focal_distance"]))
+            power = (
+                1.0 if power_scales is None else max(power_scales[lens_index].max(), 1)
+            )
+            slope_changes[lens_surface] = radius * power / focal_distance
+        slope_changes = np.repeat(slope_changes, 2)
+
+        # The primary rays stay within a cone around their mean direction, and
+        # within the sight lines from the sphere around their origins to every lens
+        origins, directions = (
+            np.asarray(values, dtype=np.float64).reshape(-1, 3)
+            for values in get_ray_arrays(rays)
+        )
+        directions = directions / np.linalg.norm(directions, axis=1, keepdims=True)
+        primary_axis = directions.sum(axis=0)
+        primary_axis /= max(np.linalg.norm(primary_axis), 1e-30)
+        primary_angle = np.arccos(np.clip((directions @ primary_axis).min(), -1, 1))
+        origin_center = origins.mean(axis=0)
+        origin_radius = np.linalg.norm(origins - origin_center, axis=1).max()
+        entry_angles = np.minimum(
+            LensVisibility._get_entry_angles(
+                primary_axis, primary_angle + ANGLE_MARGIN, exit_axes
+            ),
+            LensVisibility._get_sight_angles(
+                origin_center, None, origin_radius, centers, normals, radii
+            ).reshape(-1),
+        )
+
+        exit_candidates = np.zeros((lens_count * 2, len(scene)), dtype=bool)
+        exit_angles = np.full(lens_count * 2, -np.inf)
+        # An acyclic chain of lenses settles within one pass per lens, longer
+        # propagations go around a loop and open up to half-spaces
+        for _ in range(lens_count * 2 + 2):
+            new_exit_angles = LensVisibility._get_exit_angles(entry_angles, slope_changes)
+            changed = np.flatnonzero(new_exit_angles != exit_angles)
+            if len(changed) == 0:
+                break
+            exit_angles = new_exit_angles
+            exit_candidates[changed] = LensVisibility._get_reached_surfaces(
+                scene, changed, exit_axes[changed], exit_angles[changed]
+            )
+            # Rays leaving through an exit reach the sides of its lenses within its
+            # cone and within the sight lines from its lens to theirs. Cones and
+            # candidates only grow, so the unchanged exits add nothing new
+            pair_exits, pair_lenses = np.nonzero(exit_candidates[changed, object_count:])
+            pair_exits = changed[pair_exits]
+            source_lenses = pair_exits // 2
+            pair_sides = 2 * pair_lenses[:, np.newaxis] + np.arange(2)
+            np.maximum.at(
+                entry_angles,
+                pair_sides,
+                np.minimum(
+                    LensVisibility._get_entry_angles(
+                        exit_axes[pair_exits, np.newaxis],
+                        exit_angles[pair_exits, np.newaxis],
+                        exit_axes[pair_sides],
+                    ),
+                    LensVisibility._get_sight_angles(
+                        centers[source_lenses],
+                        normals[source_lenses],
+                        radii[source_lenses],
+                        centers[pair_lenses],
+                        normals[pair_lenses],
+                        radii[pair_lenses],
+                    ),
+                ),
+            )
+        else:
+            entry_angles = np.where(np.isfinite(entry_angles), HALF_SPACE, -np.inf)
+            exit_angles = LensVisibility._get_exit_angles(entry_angles, slope_changes)
+            exit_candidates = LensVisibility._get_reached_surfaces(
+                scene, np.arange(lens_count * 2), exit_axes, exit_angles
+            )
+
+        return LensVisibility(
+            scene,
+            exit_angles.reshape(lens_count, 2),
+            exit_candidates.reshape(lens_count, 2, len(scene)),
+            bvh_surface_threshold,
+        )
+
+    @staticmethod
+    def _get_entry_angles(axes, angles, side_axes):
+        # Rays within the angle of an axis reach a side within the angle of the
+        # axis from its normal plus that angle, if any of them goes towards it.
+        # The arguments broadcast against each other
+        axis_angles = np.arccos(np.clip(np.sum(axes * side_axes, axis=-1), -1, 1))
+        return np.where(
+            (axis_angles - angles < HALF_SPACE) & np.isfinite(angles),
+            np.minimum(axis_angles + angles, HALF_SPACE),
+            -np.inf,
+        )
+
+    @staticmethod
+    def _get_sight_angles(
+        source_centers, source_normals, source_radii, centers, normals, radii
+    ):
+        # Largest angle to the normal of both sides of a lens of a segment from a
+        # source to the lens, the source being a sphere or, with normals, a disk.
+        # The arguments broadcast against each other, the sides are the last axis
+        offsets = centers - source_centers
+        heights = np.sum(offsets * normals, axis=-1)
+        lateral_offsets = offsets - heights[..., np.newaxis] * normals
+        widths = np.linalg.norm(lateral_offsets, axis=-1) + radii + source_radii
+        if source_normals is None:
+            spreads = np.broadcast_to(source_radii, heights.shape)
+        else:
+            cosines = np.clip(np.sum(source_normals * normals, axis=-1), -1, 1)
+            spreads = source_radii * np.sqrt(1 - cosines**2)
+        sides = []
+        for side_heights in (heights, -heights):
+            lowest = side_heights - spreads
+            with np.errstate(divide="ignore"):
+                angles = np.arctan(widths / lowest) + ANGLE_MARGIN
+            angles = np.where(lowest > 0, np.minimum(angles, HALF_SPACE), HALF_SPACE)
+            # No segment goes towards a side the whole source is in front of
+            sides.append(np.where(side_heights + spreads > 0, angles, -np.inf))
+        return np.stack(sides, axis=-1)
+
+    @staticmethod
+    def _get_exit_angles(entry_angles, slope_changes):
+        # The slopes of the leaving rays are the incoming ones shifted by at most
+        # the slope change, -inf for the sides no ray reaches
+        with np.errstate(invalid="ignore"):
+            exit_angles = np.arctan(np.tan(entry_angles) + slope_changes) + ANGLE_MARGIN
+        exit_angles = np.where(entry_angles >= HALF_SPACE, HALF_SPACE, exit_angles)
+        exit_angles = np.minimum(exit_angles, HALF_SPACE)
+        return np.where(np.isfinite(entry_angles), exit_angles, -np.inf)
+
+    @staticmethod
+    def _get_reached_surfaces(scene, exits, axes, angles):
+        """
+        Get the surfaces some ray leaving through each exit may hit.
+
+        A ray leaves from the disk of its lens, so at height h along the exit axis
+        it is within the lens radius plus h * tan(angle) of the axis. Surfaces
+        parallel to the lens are reached when that disk meets them at their
+        height, which excludes the lens and the other surfaces in its plane. Tilted
+        surfaces are reached when a patch of theirs comes close enough to the cone.
+        """
+        object_count = scene.object_count
+        lens_surfaces = object_count + exits // 2
+        apexes = scene.points[lens_surfaces].astype(np.float64)
+        extents = scene.extents.astype(np.float64)
+        exit_radii = np.where(
+            scene.kinds[lens_surfaces] == SURFACE_KIND_CIRCLE,
+            extents[lens_surfaces, 0],
+            np.hypot(*extents[lens_surfaces].T),
+        )
+        circles = scene.kinds == SURFACE_KIND_CIRCLE
+        points = scene.points.astype(np.float64)
+        u_vectors = scene.u_vectors.astype(np.float64)
+        v_vectors = scene.v_vectors.astype(np.float64)
+        normals = scene.normals / np.linalg.norm(scene.normals, axis=1, keepdims=True)
+        patches = None
+
+        reached = np.zeros((len(exits), len(scene)), dtype=bool)
+        block_size = max(1, BUILD_BLOCK_ELEMENTS // max(len(scene), 1))
+        for start in range(0, len(exits), block_size):
+            block = slice(start, start + block_size)
+            block_axes = axes[block]
+            # Offsets from the apex to the surface points along the exit axis, and
+            # across it along the surface u and v vectors
+            heights = block_axes @ points.T
+            heights -= np.sum(apexes[block] * block_axes, axis=1)[:, np.newaxis]
+            in_plane_gaps = []
+            for vectors in (u_vectors, v_vectors):
+                gaps = np.sum(points * vectors, axis=1) - apexes[block] @ vectors.T
+                gaps -= heights * (block_axes @ vectors.T)
+                in_plane_gaps.append(np.abs(gaps))
+            u_gaps, v_gaps = in_plane_gaps
+            gaps = np.where(
+                circles,
+                np.maximum(np.hypot(u_gaps, v_gaps) - extents[:, 0], 0),
+                np.hypot(
+                    np.maximum(u_gaps - extents[:, 0], 0),
+                    np.maximum(v_gaps - extents[:, 1], 0),
+                ),
+            )
+            with np.errstate(invalid="ignore"):
+                spreads = exit_radii[block, np.newaxis] + heights * np.tan(
+                    angles[block, np.newaxis]
+                )
+            margins = exit_radii[block, np.newaxis] * REACH_MARGIN
+            spreads = spreads * (1 + REACH_MARGIN) + margins
+            block_reached = (heights > 0) & (gaps <= spreads)
+
+            tilted = np.abs(block_axes @ normals.T) < 1 - PARALLEL_TOLERANCE
+            tilted_surfaces = np.flatnonzero(np.any(tilted, axis=0))
+            if len(tilted_surfaces):
+                if patches is None:
+                    patches = get_surface_patches(scene, TARGET_PATCHES)
+                patch_centers, patch_radii, patch_surfaces = patches
+                selected = np.isin(patch_surfaces, tilted_surfaces)
+                distances = get_cone_distances(
+                    apexes[block],
+                    block_axes,
+                    np.maximum(angles[block], 0),
+                    patch_centers[selected],
+                )
+                reach = patch_radii[selected] + exit_radii[block, np.newaxis]
+                reach = reach * (1 + REACH_MARGIN) + margins
+                # The patches of a surface follow each other
+                surfaces, starts = np.unique(
+                    patch_surfaces[selected], return_index=True
+                )
+                patches_reached = np.logical_or.reduceat(
+                    distances <= reach, starts, axis=1
+                )
+                block_reached[:, surfaces] = np.where(
+                    tilted[:, surfaces], patches_reached, block_reached[:, surfaces]
+                )
+            reached[block] = block_reached
+
+        reached[np.arange(len(exits)), lens_surfaces] = False
+        reached &= np.isfinite(angles)[:, np.newaxis]
+        return reached
+
+    def nearest_hit(
+        self,
+        rays,
+        source_surfaces: np.ndarray,
+        t_max: float = 100000,
+        workspace: Workspace = None,
+    ):
+        """
+        Find the nearest surface hit by each ray leaving a lens among its candidates.
+
+        Args:
+            rays: Rays leaving the lenses (ray_dtype or RayBatch)
+            source_surfaces: Index in the scene of the lens surface every ray left
+            t_max: Hits further than this are ignored
+            workspace: Optional arena for the results and the temporaries
+
+        Returns:
+            Tuple of the nearest surface index (-1 for misses), its t (inf for misses)
+            and the local (u, v) coordinates of the hit on that surface (Nx2)
+        """
+        ray_count = len(source_surfaces)
+        surface_indices = get_buffer(
+            workspace, "visible_surface_indices", ray_count, np.int64
+        )
+        hit_ts = get_buffer(workspace, "visible_hit_ts", ray_count, self.scene.dtype)
+        hit_uvs = get_buffer(
+            workspace, "visible_hit_uvs", (ray_count, 2), self.scene.dtype
+        )
+        directions = rays["direction"]
+
+        # Rays leaving against the normal of their lens go through side 1
+        heights = np.einsum(
+            "ij,ij->i", directions, np.take(self.scene.normals, source_surfaces, axis=0)
+        )
+        ray_sets = self.exit_sets[
+            source_surfaces - self.scene.object_count, (heights < 0).astype(np.int64)
+        ]
+        order, offsets = group_by_index(ray_sets, len(self.set_surfaces))
+        set_ray_counts = np.diff(offsets)
+        # Testing more than a few candidates per ray is slower than the BVH of a
+        # large scene, which already skips the far surfaces
+        wide = np.zeros(len(self.set_surfaces), dtype=bool)
+        if len(self.scene) >= self.bvh_surface_threshold:
+            wide = self.set_counts > POOLED_SET_SURFACES
+        pooled = ((set_ray_counts < POOLED_SET_RAYS) | (self.set_counts == 0)) & ~wide
+        if np.any(pooled & (set_ray_counts > 0)):
+            self._nearest_hit_pooled(
+                rays,
+                order[np.repeat(pooled, set_ray_counts)],
+                ray_sets,
+                surface_indices,
+                hit_ts,
+                hit_uvs,
+                t_max,
+            )
+        if np.any(wide & (set_ray_counts > 0)):
+            if self.scene_accelerator is None:
+                self.scene_accelerator = BoundingVolumeHierarchy.build(self.scene)
+            selection = order[np.repeat(wide, set_ray_counts)]
+            self._nearest_hit_selection(
+                self.scene_accelerator,
+                None,
+                rays,
+                selection,
+                surface_indices,
+                hit_ts,
+                hit_uvs,
+                t_max,
+                workspace,
+            )
+        for set_index in np.flatnonzero(~(pooled | wide) & (set_ray_counts > 0)):
+            if self.set_accelerators[set_index] is None:
+                self.set_accelerators[set_index] = self.scene.subset(
+                    self.set_surfaces[set_index]
+                )
+            self._nearest_hit_selection(
+                self.set_accelerators[set_index],
+                self.set_surfaces[set_index],
+                rays,
+                order[offsets[set_index] : offsets[set_index + 1]],
+                surface_indices,
+                hit_ts,
+                hit_uvs,
+                t_max,
+                workspace,
+            )
+        return surface_indices, hit_ts, hit_uvs
+
+    def _nearest_hit_selection(
+        self,
+        accelerator,
+        surfaces,
+        rays,
+        selection,
+        surface_indices,
+        hit_ts,
+        hit_uvs,
+        t_max,
+        workspace,
+    ):
+        # Nearest hits of the selected rays in a scene or BVH holding the given
+        # surfaces of the whole scene, or all of them if None
+        set_surface_indices, set_hit_ts, set_hit_uvs = accelerator.nearest_hit(
+            RayBatch(
+                rays["origin"][selection],
+                rays["direction"][selection],
+                dtype=self.scene.dtype,
+            ),
+            t_max,
+            workspace=workspace,
+        )
+        if surfaces is not None:
+            set_surface_indices = np.where(
+                set_surface_indices >= 0, surfaces[set_surface_indices], -1
+            )
+        surface_indices[selection] = set_surface_indices
+        hit_ts[selection] = set_hit_ts
+        hit_uvs[selection] = set_hit_uvs
+
+    def _nearest_hit_pooled(
+        self, rays, selection, ray_sets, surface_indices, hit_ts, hit_uvs, t_max
+    ):
+        """
+        Find the nearest candidate hit by the selected rays, whatever their set.
+
+        The rays are ordered by decreasing candidate count, so the rays still having
+        a candidate at every slot are a prefix and each slot is one intersect_pairs
+        call on contiguous arrays. Ties go to the lower surface index, like in the
+        nearest-hit pass of a scene.
+        """
+        counts = self.set_counts[ray_sets[selection]]
+        selection = selection[np.argsort(-counts, kind="stable")]
+        counts = self.set_counts[ray_sets[selection]]
+        sets = ray_sets[selection]
+        origins = np.ascontiguousarray(rays["origin"][selection])
+        directions = np.ascontiguousarray(rays["direction"][selection])
+        nearest_surfaces = np.full(len(selection), -1, dtype=np.int64)
+        nearest_ts = np.full(len(selection), np.inf, dtype=hit_ts.dtype)
+        nearest_uvs = np.zeros((len(selection), 2), dtype=hit_uvs.dtype)
+        # Rays with more candidates than the slot, counts being decreasing
+        slot_ray_counts = np.searchsorted(-counts, -np.arange(counts.max(initial=0)))
+        for slot, slot_ray_count in enumerate(slot_ray_counts):
+            slot_rays = slice(0, slot_ray_count)
+            slot_surfaces = self.set_table[sets[slot_rays], slot]
+            slot_ts, slot_uvs = self.scene.intersect_pairs(
+                origins[slot_rays], directions[slot_rays], slot_surfaces, t_max
+            )
+            closer = np.flatnonzero(slot_ts < nearest_ts[slot_rays])
+            nearest_ts[closer] = slot_ts[closer]
+            nearest_uvs[closer] = slot_uvs[closer]
+            nearest_surfaces[closer] = slot_surfaces[closer]
+        surface_indices[selection] = nearest_surfaces
+        hit_ts[selection] = nearest_ts
+        hit_uvs[selection] = nearest_uvs
@@ -0,0 +1,149 @@
+from typing import List
+
+import numpy as np
+
+from optics_raytracer.optics.colored_object import ColoredObject
+from optics_raytracer.optics.lens import Lens, lens_dtype
+from optics_raytracer.scene.packed_scene import PackedScene, get_plane_basis
+
+# Largest allowed deviation of |lens normal . axis| from 1
+AXIS_ALIGNMENT_TOLERANCE = 1e-6
+
+
+class OpticalTrain:
+    """
+    Lenses of a scene ordered along a common optical axis, with every colored object
+    behind the last lens.
+
+    All lens planes are perpendicular to the axis, so a ray moving along it crosses
+    them in a fixed order and never needs a nearest-hit search. The lenses are kept in
+    a local frame whose z axis is the optical axis, where the crossing with a lens
+    plane is a single subtraction and division.
+    """
+
+    def __init__(
+        self,
+        basis: np.ndarray,
+        positions: np.ndarray,
+        lens_indices: np.ndarray,
+        local_lenses: List[Lens],
+        object_scene: PackedScene,
+    ):
+        self.basis = basis
+        self.positions = positions
+        self.lens_indices = lens_indices
+        self.local_lenses = local_lenses
+        self.object_scene = object_scene
+
+    @property
+    def axis(self) -> np.ndarray:
+        return self.basis[2]
+
+    @staticmethod
+    def build(
+        colored_objects: List[ColoredObject], lenses: List[Lens]
+    ) -> "OpticalTrain":
+        """
+        Order the lenses along their common axis.
+
+        Args:
+            colored_objects: List of colored objects in the scene
+            lenses: List of lenses in the scene
+
+        Returns:
+            New OpticalTrain instance, or None if the scene is not a sequential train
+        """
+        if any(not isinstance(lens, Lens) for lens in lenses):
+            # Lens arrays refract per cell, which the single-lens maps can't follow
+            return None
+        object_scene = PackedScene.build(colored_objects, [])
+        if lenses:
+            axis = np.asarray(lenses[0].normal, dtype=np.float64)
+        elif len(object_scene):
+            axis = np.asarray(object_scene.normals[0], dtype=np.float64)
+        else:
+            return None
+        axis = axis / np.linalg.norm(axis)
+
+        for lens in lenses:
+            if abs(np.dot(lens.normal, axis)) < 1 - AXIS_ALIGNMENT_TOLERANCE:
+                return None
+
+        # Objects have to be entirely on one side of the lenses, which fixes the direction
+        positions = np.array([np.dot(lens.center, axis) for lens in lenses])
+        object_starts, object_ends = OpticalTrain._get_axial_ranges(object_scene, axis)
+        if lenses and len(object_scene):
+            if object_ends.max() < positions.min():
+                axis = -axis
+                positions = -positions
+                object_starts, object_ends = -object_ends, -object_starts
+            if object_starts.min() <= positions.max():
+                return None
+
+        lens_indices = np.argsort(positions, kind="stable")
+        positions = positions[lens_indices]
+        if np.any(np.diff(positions) <= 0):
+            return None
+
+        u = get_plane_basis(axis)
+        basis = np.array([u, np.cross(axis, u), axis], dtype=np.float32)
+        local_lenses = [
+            Lens(
+                np.array(
+                    (
+                        basis @ lenses[lens_index].center,
+                        basis @ lenses[lens_index].normal,
+                        lenses[lens_index].array["radius"],
+                        lenses[lens_index].focal_distance,
+                        lenses[lens_index].abbe_number,
+                    ),
+                    dtype=lens_dtype,
+                )
+            )
+            for lens_index in lens_indices
+        ]
+        return OpticalTrain(
+            basis=basis,
+            positions=positions.astype(np.float32),
+            lens_indices=lens_indices,
+            local_lenses=local_lenses,
+            object_scene=object_scene,
+        )
+
+    @staticmethod
+    def _get_axial_ranges(scene: PackedScene, axis: np.ndarray):
+        axial_half_extents = (
+            np.abs(scene.u_vectors @ axis) * scene.extents[:, 0]
+            + np.abs(scene.v_vectors @ axis) * scene.extents[:, 1]
+        )
+        axial_centers = scene.points @ axis
+        return axial_centers - axial_half_extents, axial_centers + axial_half_extents
+
+    def accepts(self, rays) -> bool:
+        """
+        Check that the rays start in front of the first lens and move along the axis.
+
+        Args:
+            rays: Rays to trace (ray_dtype or RayBatch)
+
+        Returns:
+            True if the rays cross the lenses in the order of the train
+        """
+        if not self.local_lenses:
+            return True
+        return bool(
+            np.all(rays["direction"] @ self.axis > 0)
+            and np.all(rays["origin"] @ self.axis < self.positions[0])
+        )
+
+    def to_local(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Rotate world-space points or directions (Nx3) into the frame of the axis.
+        """
+        return np.ascontiguousarray(vectors @ self.basis.T, dtype=np.float32)
+
+    def to_world(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Rotate points or directions (Nx3) from the frame of the axis back to world space.
+        """
+        return vectors @ self.basis
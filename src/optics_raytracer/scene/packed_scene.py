@@ -0,0 +1,595 @@
+from typing import List
+
+import numpy as np
+
+from optics_raytracer.core.ray_batch import get_ray_arrays
+from optics_raytracer.core.workspace import Workspace, get_buffer
+from optics_raytracer.geometry.circle import Circle
+from optics_raytracer.geometry.rectangle import Rectangle
+from optics_raytracer.optics.colored_object import ColoredObject
+from optics_raytracer.optics.lens import Lens
+from optics_raytracer.optics.lens_array import LensArray
+
+SURFACE_KIND_RECTANGLE = 0
+SURFACE_KIND_CIRCLE = 1
+
+# Upper bound for the number of ray-surface pairs evaluated at once
+DEFAULT_BLOCK_ELEMENTS = 1 << 20
+# Rays per block of the axis-aligned kernel, whose per-ray columns stay in cache
+# (see experiments/2026/10/axis_aligned_kernels_benchmark.py)
+AXIS_ALIGNED_BLOCK_RAYS = 1 << 14
+
+
+def get_plane_basis(normal: np.ndarray) -> np.ndarray:
+    """
+    Get an in-plane unit vector orthogonal to the normal.
+    """
+    if abs(normal[0]) < 0.9:
+        arbitrary = np.array([1, 0, 0], dtype=normal.dtype)
+    else:
+        arbitrary = np.array([0, 1, 0], dtype=normal.dtype)
+    tangent = np.cross(normal, arbitrary)
+    return tangent / np.linalg.norm(tangent)
+
+
+def get_vector_axes(vectors: np.ndarray):
+    """
+    Get the world axis and sign of vectors lying along one of the axes.
+
+    Args:
+        vectors: Unit vectors (Kx3)
+
+    Returns:
+        Tuple of the axis of every vector (-1 when it has several nonzero
+        components) and its sign along that axis
+    """
+    axes = np.argmax(np.abs(vectors), axis=1)
+    axes[np.count_nonzero(vectors, axis=1) != 1] = -1
+    signs = np.sign(vectors[np.arange(len(vectors)), axes])
+    return axes, signs
+
+
+class PackedScene:
+    """
+    Contiguous tables of every planar surface of a scene.
+
+    Colored objects come first, followed by the lenses. Each surface is described by
+    its point, normal, in-plane (u, v) frame, extent, kind and the index of the
+    object or lens it was built from, so the nearest hit over all of them is a
+    single blocked N x K pass instead of a Python loop per surface. The orthonormal
+    frames are built once, and every hit also yields its local (u, v) coordinates.
+    Surfaces with a round hole at their center, like aperture stops and baffles, are
+    missed by the rays going through the hole.
+
+    The tables are stored in the compute dtype, and the results and temporaries of
+    the hit tests use it too, so rays of the same dtype never get promoted.
+
+    Surfaces whose normal and (u, v) frame lie along the world axes, like nearly
+    every surface of the configs, are intersected by specialized kernels: the hit t
+    is a subtraction and a division on the normal component of the rays, and the
+    local coordinates are the two other components of the hit points, with no dot
+    products. Surfaces are grouped by normal axis, the other ones keep the general
+    kernel, and the nearest hit is merged over the groups.
+    """
+
+    def __init__(
+        self,
+        points: np.ndarray,
+        normals: np.ndarray,
+        u_vectors: np.ndarray,
+        v_vectors: np.ndarray,
+        extents: np.ndarray,
+        kinds: np.ndarray,
+        ids: np.ndarray,
+        object_count: int,
+        axis_aligned_kernels: bool = True,
+        hole_radii: np.ndarray = None,
+    ):
+        self.points = points
+        self.normals = normals
+        self.u_vectors = u_vectors
+        self.v_vectors = v_vectors
+        self.extents = extents
+        self.kinds = kinds
+        self.ids = ids
+        self.object_count = object_count
+        self.hole_radii = (
+            np.zeros(len(kinds), dtype=points.dtype) if hole_radii is None else hole_radii
+        )
+        # Solid scenes skip the hole test
+        self.has_holes = bool(np.any(self.hole_radii > 0))
+
+        self.point_dot_normals = np.einsum("ij,ij->i", points, normals)
+        self.point_dot_u_vectors = np.einsum("ij,ij->i", points, u_vectors)
+        self.point_dot_v_vectors = np.einsum("ij,ij->i", points, v_vectors)
+
+        # World axes of the axis-aligned surfaces, -1 for the general ones
+        self.axis_aligned_kernels = axis_aligned_kernels
+        self.normal_axes, self.normal_signs = get_vector_axes(normals)
+        self.u_axes, self.u_signs = get_vector_axes(u_vectors)
+        self.v_axes, self.v_signs = get_vector_axes(v_vectors)
+        self.normal_axes[(self.u_axes < 0) | (self.v_axes < 0)] = -1
+        if not axis_aligned_kernels:
+            self.normal_axes[:] = -1
+        # Half extents along the two world axes following the normal axis
+        half_extents = self.get_half_extents()
+        in_plane_axes = (self.normal_axes[:, np.newaxis] + [1, 2]) % 3
+        self.axis_extents = np.take_along_axis(half_extents, in_plane_axes, axis=1)
+
+        # Sub-scenes of the surfaces sharing a kernel, when there are several
+        group_axes = np.unique(self.normal_axes)
+        self.groups = []
+        if len(group_axes) > 1:
+            for axis in group_axes:
+                indices = np.flatnonzero(self.normal_axes == axis)
+                self.groups.append((self.subset(indices), indices))
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.points.dtype
+
+    @staticmethod
+    def build(
+        colored_objects: List[ColoredObject],
+        lenses: List[Lens],
+        dtype=np.float32,
+        axis_aligned_kernels: bool = True,
+    ) -> "PackedScene":
+        """
+        Pack the surfaces of the colored objects and lenses.
+
+        Args:
+            colored_objects: List of colored objects in the scene
+            lenses: List of lenses and lens arrays in the scene
+            dtype: Compute dtype of the tables
+            axis_aligned_kernels: Whether axis-aligned surfaces get the specialized
+                hit kernels, or every surface goes through the general one
+
+        Returns:
+            New PackedScene instance
+        """
+        rows = []
+        for obj_index, obj in enumerate(colored_objects):
+            surface = obj.get_surface()
+            if isinstance(surface, Circle):
+                row = PackedScene._circle_row(surface.array, obj_index)
+            elif isinstance(surface, Rectangle):
+                row = PackedScene._rectangle_row(surface.array, obj_index)
+            else:
+                raise TypeError(
+                    f"{type(obj).__name__} has a {type(surface).__name__} surface, "
+                    "only Rectangle and Circle surfaces can be traced"
+                )
+            rows.append(row + (obj.get_hole_radius(),))
+        object_count = len(rows)
+
+        for lens_index, lens in enumerate(lenses):
+            if isinstance(lens, LensArray):
+                # A lens array is a single rectangle, its cells are found on refraction
+                row = PackedScene._rectangle_row(lens.rectangle.array, lens_index)
+            else:
+                row = PackedScene._circle_row(lens.array, lens_index)
+            rows.append(row + (0.0,))
+
+        points, normals, u_vectors, v_vectors, extents, kinds, ids, hole_radii = (
+            zip(*rows) if rows else ([],) * 8
+        )
+        return PackedScene(
+            points=np.array(points, dtype=dtype).reshape(-1, 3),
+            normals=np.array(normals, dtype=dtype).reshape(-1, 3),
+            u_vectors=np.array(u_vectors, dtype=dtype).reshape(-1, 3),
+            v_vectors=np.array(v_vectors, dtype=dtype).reshape(-1, 3),
+            extents=np.array(extents, dtype=dtype).reshape(-1, 2),
+            kinds=np.array(kinds, dtype=np.int8),
+            ids=np.array(ids, dtype=np.int64),
+            object_count=object_count,
+            axis_aligned_kernels=axis_aligned_kernels,
+            hole_radii=np.array(hole_radii, dtype=dtype),
+        )
+
+    @staticmethod
+    def _rectangle_row(rectangle_array: np.ndarray, surface_id: int):
+        normal = rectangle_array["normal"]
+        u = rectangle_array["u_vector"]
+        v = np.cross(normal, u)
+        return (
+            rectangle_array["middle_point"],
+            normal,
+            u / np.linalg.norm(u),
+            v / np.linalg.norm(v),
+            (rectangle_array["width"] / 2, rectangle_array["height"] / 2),
+            SURFACE_KIND_RECTANGLE,
+            surface_id,
+        )
+
+    @staticmethod
+    def _circle_row(circle_array: np.ndarray, surface_id: int):
+        normal = circle_array["normal"]
+        u = get_plane_basis(normal)
+        return (
+            circle_array["center"],
+            normal,
+            u,
+            np.cross(normal, u),
+            (circle_array["radius"], circle_array["radius"]),
+            SURFACE_KIND_CIRCLE,
+            surface_id,
+        )
+
+    def subset(self, surface_indices: np.ndarray) -> "PackedScene":
+        """
+        Get a scene with only some of the surfaces, kept in their original order.
+
+        Args:
+            surface_indices: Increasing indices of the surfaces to keep
+
+        Returns:
+            New PackedScene instance
+        """
+        return PackedScene(
+            points=self.points[surface_indices],
+            normals=self.normals[surface_indices],
+            u_vectors=self.u_vectors[surface_indices],
+            v_vectors=self.v_vectors[surface_indices],
+            extents=self.extents[surface_indices],
+            kinds=self.kinds[surface_indices],
+            ids=self.ids[surface_indices],
+            object_count=int(np.count_nonzero(surface_indices < self.object_count)),
+            axis_aligned_kernels=self.axis_aligned_kernels,
+            hole_radii=self.hole_radii[surface_indices],
+        )
+
+    def nearest_hit(
+        self,
+        rays,
+        t_max: float = 100000,
+        block_elements: int = DEFAULT_BLOCK_ELEMENTS,
+        workspace: Workspace = None,
+    ):
+        """
+        Find the nearest surface hit by each ray.
+
+        The rays are processed in blocks so that at most `block_elements` ray-surface
+        pairs are alive at once.
+
+        Args:
+            rays: Rays to intersect (ray_dtype or RayBatch)
+            t_max: Hits further than this are ignored
+            block_elements: Upper bound for the ray-surface pairs of one block
+            workspace: Optional arena for the results and the block temporaries
+
+        Returns:
+            Tuple of the nearest surface index (-1 for misses), its t (inf for misses)
+            and the local (u, v) coordinates of the hit on that surface (Nx2)
+        """
+        origins, directions = get_ray_arrays(rays)
+        ray_count = len(rays)
+        surface_indices = get_buffer(workspace, "surface_indices", ray_count, np.int64)
+        hit_ts = get_buffer(workspace, "hit_ts", ray_count, self.dtype)
+        hit_uvs = get_buffer(workspace, "hit_uvs", (ray_count, 2), self.dtype)
+        if len(self) == 0:
+            surface_indices.fill(-1)
+            hit_ts.fill(np.inf)
+            hit_uvs.fill(0)
+            return surface_indices, hit_ts, hit_uvs
+
+        block_size = max(1, block_elements // len(self))
+        if np.any(self.normal_axes >= 0):
+            block_size = min(block_size, AXIS_ALIGNED_BLOCK_RAYS)
+        for start in range(0, ray_count, block_size):
+            block = slice(start, start + block_size)
+            # A shared origin or direction is one row, broadcast over every block
+            self._nearest_hit_block(
+                origins[np.newaxis] if origins.ndim == 1 else origins[block],
+                directions[np.newaxis] if directions.ndim == 1 else directions[block],
+                t_max,
+                surface_indices[block],
+                hit_ts[block],
+                hit_uvs[block],
+                workspace,
+            )
+        return surface_indices, hit_ts, hit_uvs
+
+    def intersect_pairs(self, origins, directions, surface_indices, t_max: float = 100000):
+        """
+        Intersect each ray with one surface of its own.
+
+        Args:
+            origins: Ray origins (Mx3)
+            directions: Ray directions (Mx3)
+            surface_indices: Surface index to test for each ray (M,)
+            t_max: Hits further than this are ignored
+
+        Returns:
+            Tuple of the hit t values (inf for misses) and local (u, v) coordinates (Mx2)
+        """
+        ts = np.empty(len(surface_indices), dtype=self.dtype)
+        uvs = np.empty((len(surface_indices), 2), dtype=self.dtype)
+        aligned = self.normal_axes[surface_indices] >= 0
+        for pairs, kernel in (
+            (aligned, self._intersect_pairs_aligned),
+            (~aligned, self._intersect_pairs_general),
+        ):
+            if pairs.all():
+                return kernel(origins, directions, surface_indices, t_max)
+            if pairs.any():
+                ts[pairs], uvs[pairs] = kernel(
+                    origins[pairs], directions[pairs], surface_indices[pairs], t_max
+                )
+        return ts, uvs
+
+    def _intersect_pairs_aligned(self, origins, directions, surface_indices, t_max):
+        # Single components of the rays along the axes of every surface
+        rows = np.arange(len(surface_indices))
+        axes = self.normal_axes[surface_indices]
+        divisor = directions[rows, axes]
+        divisor[divisor == 0] = 1e-10
+        ts = (self.points[surface_indices, axes] - origins[rows, axes]) / divisor
+
+        coordinates = []
+        for in_plane_axes, signs in (
+            (self.u_axes[surface_indices], self.u_signs[surface_indices]),
+            (self.v_axes[surface_indices], self.v_signs[surface_indices]),
+        ):
+            offsets = origins[rows, in_plane_axes]
+            offsets -= self.points[surface_indices, in_plane_axes]
+            offsets += ts * directions[rows, in_plane_axes]
+            coordinates.append(offsets * signs)
+        u, v = coordinates
+
+        inside = self._get_inside_mask(
+            u,
+            v,
+            ts,
+            self.kinds[surface_indices],
+            self.extents[surface_indices],
+            t_max,
+            hole_radii=self.hole_radii[surface_indices] if self.has_holes else None,
+        )
+        ts[~inside] = np.inf
+        return ts, np.column_stack([u, v])
+
+    def _intersect_pairs_general(self, origins, directions, surface_indices, t_max):
+        normals = self.normals[surface_indices]
+        u_vectors = self.u_vectors[surface_indices]
+        v_vectors = self.v_vectors[surface_indices]
+
+        divisor = np.einsum("ij,ij->i", directions, normals)
+        divisor[divisor == 0] = 1e-10
+        ts = (
+            self.point_dot_normals[surface_indices]
+            - np.einsum("ij,ij->i", origins, normals)
+        ) / divisor
+
+        u = np.einsum("ij,ij->i", origins, u_vectors)
+        u -= self.point_dot_u_vectors[surface_indices]
+        u += ts * np.einsum("ij,ij->i", directions, u_vectors)
+        v = np.einsum("ij,ij->i", origins, v_vectors)
+        v -= self.point_dot_v_vectors[surface_indices]
+        v += ts * np.einsum("ij,ij->i", directions, v_vectors)
+
+        inside = self._get_inside_mask(
+            u,
+            v,
+            ts,
+            self.kinds[surface_indices],
+            self.extents[surface_indices],
+            t_max,
+            hole_radii=self.hole_radii[surface_indices] if self.has_holes else None,
+        )
+        ts[~inside] = np.inf
+        return ts, np.column_stack([u, v])
+
+    def _nearest_hit_block(
+        self, origins, directions, t_max, surface_indices, hit_ts, hit_uvs, workspace
+    ):
+        if not self.groups:
+            kernel = (
+                self._nearest_hit_block_aligned
+                if self.normal_axes[0] >= 0
+                else self._nearest_hit_block_general
+            )
+            kernel(
+                origins, directions, t_max, surface_indices, hit_ts, hit_uvs, workspace
+            )
+            return
+
+        # Nearest hit of every group, the closest one wins
+        ray_count = len(hit_ts)
+        group_indices = get_buffer(
+            workspace, "group_surface_indices", ray_count, np.int64
+        )
+        group_ts = get_buffer(workspace, "group_hit_ts", ray_count, self.dtype)
+        group_uvs = get_buffer(workspace, "group_hit_uvs", (ray_count, 2), self.dtype)
+        closer = get_buffer(workspace, "group_closer", ray_count, bool)
+        hit_ts.fill(np.inf)
+        hit_uvs.fill(0)
+        surface_indices.fill(-1)
+        for scene, indices in self.groups:
+            scene._nearest_hit_block(
+                origins, directions, t_max, group_indices, group_ts, group_uvs, workspace
+            )
+            np.less(group_ts, hit_ts, out=closer)
+            np.copyto(hit_ts, group_ts, where=closer)
+            np.copyto(hit_uvs, group_uvs, where=closer[:, np.newaxis])
+            np.copyto(surface_indices, indices[group_indices], where=closer)
+
+    def _nearest_hit_block_aligned(
+        self, origins, directions, t_max, surface_indices, hit_ts, hit_uvs, workspace
+    ):
+        # Every surface is normal to the same world axis: the hit t only needs that
+        # component of the rays and the two others give the hit coordinates, so each
+        # surface is a few passes over contiguous ray columns kept in cache
+        axis = self.normal_axes[0]
+        first_axis, second_axis = (axis + 1) % 3, (axis + 2) % 3
+        ray_count = len(hit_ts)
+        origin_columns = np.ascontiguousarray(origins.T)
+        direction_columns = np.ascontiguousarray(directions.T)
+        divisor = direction_columns[axis].copy()
+        divisor[divisor == 0] = 1e-10
+
+        ts = get_buffer(workspace, "aligned_ts", ray_count, self.dtype)
+        first = get_buffer(workspace, "aligned_first", ray_count, self.dtype)
+        second = get_buffer(workspace, "aligned_second", ray_count, self.dtype)
+        nearest_first = get_buffer(
+            workspace, "aligned_nearest_first", ray_count, self.dtype
+        )
+        nearest_second = get_buffer(
+            workspace, "aligned_nearest_second", ray_count, self.dtype
+        )
+        scratch = get_buffer(workspace, "aligned_scratch", ray_count, self.dtype)
+        squares = get_buffer(workspace, "aligned_squares", ray_count, self.dtype)
+        inside = get_buffer(workspace, "aligned_inside", ray_count, bool)
+        condition = get_buffer(workspace, "aligned_condition", ray_count, bool)
+        hit_ts.fill(np.inf)
+        surface_indices.fill(0)
+        nearest_first.fill(0)
+        nearest_second.fill(0)
+
+        for surface, point in enumerate(self.points):
+            np.subtract(point[axis], origin_columns[axis], out=ts)
+            ts /= divisor
+            for coordinates, in_plane_axis in ((first, first_axis), (second, second_axis)):
+                np.subtract(
+                    origin_columns[in_plane_axis], point[in_plane_axis], out=coordinates
+                )
+                np.multiply(direction_columns[in_plane_axis], ts, out=scratch)
+                coordinates += scratch
+
+            first_extent, second_extent = self.axis_extents[surface]
+            if self.kinds[surface] == SURFACE_KIND_CIRCLE:
+                np.multiply(first, first, out=scratch)
+                scratch += np.multiply(second, second, out=squares)
+                np.less_equal(scratch, first_extent**2, out=inside)
+            else:
+                np.less_equal(np.abs(first, out=scratch), first_extent, out=inside)
+                inside &= np.less_equal(
+                    np.abs(second, out=scratch), second_extent, out=condition
+                )
+            hole_radius = self.hole_radii[surface]
+            if hole_radius > 0:
+                np.multiply(first, first, out=scratch)
+                scratch += np.multiply(second, second, out=squares)
+                inside &= np.greater_equal(scratch, hole_radius**2, out=condition)
+            inside &= np.greater_equal(ts, 1e-6, out=condition)
+            inside &= np.less_equal(ts, t_max, out=condition)
+            # Strictly closer, so ties keep the first surface like the general kernel
+            inside &= np.less(ts, hit_ts, out=condition)
+            np.copyto(hit_ts, ts, where=inside)
+            np.copyto(nearest_first, first, where=inside)
+            np.copyto(nearest_second, second, where=inside)
+            np.copyto(surface_indices, surface, where=inside)
+
+        u_first = self.u_axes[surface_indices] == first_axis
+        hit_uvs[:, 0] = np.where(u_first, nearest_first, nearest_second)
+        hit_uvs[:, 0] *= self.u_signs[surface_indices]
+        hit_uvs[:, 1] = np.where(u_first, nearest_second, nearest_first)
+        hit_uvs[:, 1] *= self.v_signs[surface_indices]
+        surface_indices[hit_ts == np.inf] = -1
+
+    def _nearest_hit_block_general(
+        self, origins, directions, t_max, surface_indices, hit_ts, hit_uvs, workspace
+    ):
+        # A single origin or direction row stands for every ray of the block, its
+        # terms take one row of their own and broadcast over the block
+        shape = (max(len(origins), len(directions)), len(self))
+        scratch = get_buffer(workspace, "block_scratch", shape, self.dtype)
+        ts = get_buffer(workspace, "block_ts", shape, self.dtype)
+        u = get_buffer(workspace, "block_u", shape, self.dtype)
+        v = get_buffer(workspace, "block_v", shape, self.dtype)
+        origin_out = ts if len(origins) == len(ts) else None
+        direction_out = scratch if len(directions) == len(ts) else None
+
+        divisor = np.matmul(directions, self.normals.T, out=direction_out)
+        divisor[divisor == 0] = 1e-10
+        origin_terms = np.matmul(origins, self.normals.T, out=origin_out)
+        np.subtract(self.point_dot_normals, origin_terms, out=origin_terms)
+        np.divide(origin_terms, divisor, out=ts)
+
+        # Local plane coordinates of the hit points, without building them in 3D
+        for coordinates, axes, point_dot_axes in (
+            (u, self.u_vectors, self.point_dot_u_vectors),
+            (v, self.v_vectors, self.point_dot_v_vectors),
+        ):
+            origin_terms = np.matmul(
+                origins, axes.T, out=coordinates if origin_out is not None else None
+            )
+            origin_terms -= point_dot_axes
+            direction_terms = np.matmul(directions, axes.T, out=direction_out)
+            np.multiply(direction_terms, ts, out=scratch)
+            np.add(origin_terms, scratch, out=coordinates)
+
+        inside = self._get_inside_mask(
+            u,
+            v,
+            ts,
+            self.kinds,
+            self.extents,
+            t_max,
+            workspace,
+            self.hole_radii if self.has_holes else None,
+        )
+        outside = np.logical_not(inside, out=inside)
+        np.copyto(ts, np.inf, where=outside)
+
+        nearest = np.argmin(ts, axis=1)[:, np.newaxis]
+        hit_ts[:] = np.take_along_axis(ts, nearest, axis=1)[:, 0]
+        hit_uvs[:, 0] = np.take_along_axis(u, nearest, axis=1)[:, 0]
+        hit_uvs[:, 1] = np.take_along_axis(v, nearest, axis=1)[:, 0]
+        surface_indices[:] = nearest[:, 0]
+        surface_indices[hit_ts == np.inf] = -1
+
+    @staticmethod
+    def _get_inside_mask(u, v, ts, kinds, extents, t_max, workspace=None, hole_radii=None):
+        scratch = get_buffer(workspace, "inside_scratch", u.shape, u.dtype)
+        squares = get_buffer(workspace, "inside_squares", u.shape, u.dtype)
+        inside = get_buffer(workspace, "inside", u.shape, bool)
+        condition = get_buffer(workspace, "inside_condition", u.shape, bool)
+
+        # Rectangles
+        np.less_equal(np.abs(u, out=scratch), extents[..., 0], out=inside)
+        inside &= np.less_equal(np.abs(v, out=scratch), extents[..., 1], out=condition)
+
+        # Circles
+        np.multiply(u, u, out=scratch)
+        scratch += np.multiply(v, v, out=squares)
+        np.copyto(
+            inside,
+            np.less_equal(scratch, extents[..., 0] ** 2, out=condition),
+            where=kinds == SURFACE_KIND_CIRCLE,
+        )
+
+        # Holes, the squared distances to the center are still in scratch
+        if hole_radii is not None:
+            inside &= np.greater_equal(scratch, hole_radii**2, out=condition)
+
+        inside &= np.greater_equal(ts, 1e-6, out=condition)
+        inside &= np.less_equal(ts, t_max, out=condition)
+        return inside
+
+    def get_half_extents(self) -> np.ndarray:
+        """
+        Get the half extents of every surface along the world axes.
+
+        Returns:
+            Array of the half size of every surface along x, y and z (Kx3)
+        """
+        return np.where(
+            (self.kinds == SURFACE_KIND_CIRCLE)[:, np.newaxis],
+            self.extents[:, :1] * np.sqrt(np.clip(1 - self.normals**2, 0, 1)),
+            np.abs(self.u_vectors) * self.extents[:, :1]
+            + np.abs(self.v_vectors) * self.extents[:, 1:],
+        )
+
+    def get_bounds(self):
+        """
+        Get the axis-aligned bounding box of every surface.
+
+        Returns:
+            Tuple of the minimum and maximum corners (Kx3 each)
+        """
+        half_extents = self.get_half_extents()
+        return self.points - half_extents, self.points + half_extents
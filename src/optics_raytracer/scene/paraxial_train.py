@@ -0,0 +1,155 @@
+import numpy as np
+
+from optics_raytracer.scene.optical_train import OpticalTrain
+
+# Largest allowed distance of a lens center from the common axis, relative to its radius
+COAXIAL_TOLERANCE = 1e-5
+
+
+def get_propagation_matrix(distance: float) -> np.ndarray:
+    """
+    Get the ray-transfer matrix of a free flight along the axis.
+    The ray state is (x, x', y, y'), with the slopes taken against the axis.
+    """
+    return np.array(
+        [
+            [1, distance, 0, 0],
+            [0, 1, 0, 0],
+            [0, 0, 1, distance],
+            [0, 0, 0, 1],
+        ],
+        dtype=np.float64,
+    )
+
+
+def get_thin_lens_matrix(power: float) -> np.ndarray:
+    """
+    Get the ray-transfer matrix of a thin lens with the given optical power (1/f).
+    """
+    return np.array(
+        [
+            [1, 0, 0, 0],
+            [-power, 1, 0, 0],
+            [0, 0, 1, 0],
+            [0, 0, -power, 1],
+        ],
+        dtype=np.float64,
+    )
+
+
+class ParaxialTrain:
+    """
+    Ray-transfer (ABCD) matrices of a coaxial optical train.
+
+    The thin-lens refraction of Lens only changes the slope of a ray by -x/f, so a
+    whole train acts on (x, x', y, y') as one 4x4 matrix. The matrices up to every
+    lens are kept next to each other, so the states of a batch of rays at all lenses
+    come from a single matmul, and the apertures are checked on those states.
+    """
+
+    def __init__(
+        self,
+        train: OpticalTrain,
+        axis_offset: np.ndarray,
+        radii: np.ndarray,
+        lens_matrices: np.ndarray,
+        exit_matrix: np.ndarray,
+    ):
+        self.train = train
+        self.axis_offset = axis_offset
+        self.radii = radii
+        self.lens_matrices = lens_matrices
+        self.exit_matrix = exit_matrix
+
+    @staticmethod
+    def build(train: OpticalTrain) -> "ParaxialTrain":
+        """
+        Compose the matrices of an optical train.
+
+        Args:
+            train: Optical train to compose
+
+        Returns:
+            New ParaxialTrain instance, or None if the lens centers are not on one axis
+        """
+        lenses = train.local_lenses
+        centers = np.array([lens.center[:2] for lens in lenses]).reshape(-1, 2)
+        radii = np.array([lens.array["radius"] for lens in lenses])
+        axis_offset = centers[0] if len(centers) else np.zeros(2)
+        center_offsets = np.linalg.norm(centers - axis_offset, axis=1)
+        if np.any(center_offsets > COAXIAL_TOLERANCE * radii):
+            return None
+
+        lens_matrices = []
+        matrix = np.eye(4)
+        for index, lens in enumerate(lenses):
+            if index > 0:
+                distance = train.positions[index] - train.positions[index - 1]
+                matrix = get_propagation_matrix(distance) @ matrix
+            lens_matrices.append(matrix)
+            # A lens facing the incoming rays flips the sign of its power
+            power = np.sign(lens.normal[2]) / lens.focal_distance
+            matrix = get_thin_lens_matrix(power) @ matrix
+
+        return ParaxialTrain(
+            train=train,
+            axis_offset=axis_offset,
+            radii=radii,
+            lens_matrices=np.array(lens_matrices).reshape(-1, 4, 4),
+            exit_matrix=matrix,
+        )
+
+    def __len__(self) -> int:
+        return len(self.radii)
+
+    def get_entry_states(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        """
+        Get the states of local-frame rays on the plane of the first lens.
+
+        Args:
+            origins: Ray origins in the frame of the axis (Nx3)
+            directions: Ray directions in the frame of the axis, moving along it (Nx3)
+
+        Returns:
+            Array of (x, x', y, y') states relative to the axis (Nx4)
+        """
+        slopes = directions[:, :2] / directions[:, 2:]
+        entry_position = self.train.positions[0] if len(self) else 0
+        points = origins[:, :2] + (entry_position - origins[:, 2:]) * slopes
+        points -= self.axis_offset
+        return np.column_stack([points[:, 0], slopes[:, 0], points[:, 1], slopes[:, 1]])
+
+    def trace(self, states: np.ndarray):
+        """
+        Map entry states through the whole train.
+
+        Args:
+            states: Ray states on the plane of the first lens (Nx4)
+
+        Returns:
+            Tuple of the ray states at every lens, before refraction (LxNx4), the exit
+            states after the last lens (Nx4) and the mask of rays that cleared every
+            aperture
+        """
+        lens_states = np.matmul(states, self.lens_matrices.transpose(0, 2, 1))
+        radial_distances = lens_states[..., 0] ** 2 + lens_states[..., 2] ** 2
+        cleared = np.all(radial_distances <= self.radii[:, np.newaxis] ** 2, axis=0)
+        return lens_states, states @ self.exit_matrix.T, cleared
+
+    def states_to_rays(self, states: np.ndarray, position: float):
+        """
+        Convert states on the plane at the given axial position to local-frame rays.
+
+        Returns:
+            Tuple of the ray origins and unit directions (Nx3 each)
+        """
+        origins = np.column_stack(
+            [
+                states[:, 0] + self.axis_offset[0],
+                states[:, 2] + self.axis_offset[1],
+                np.full(len(states), position),
+            ]
+        )
+        directions = np.column_stack([states[:, 1], states[:, 3], np.ones(len(states))])
+        directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+        return origins.astype(np.float32), directions.astype(np.float32)
@@ -0,0 +1,191 @@
+import numpy as np
+
+from optics_raytracer.scene.optical_train import OpticalTrain
+
+
+def get_plane_vector(point: np.ndarray, normal: np.ndarray) -> np.ndarray:
+    """
+    Get the homogeneous vector (n, -n.p) of a plane, zero on the points of the plane.
+    """
+    return np.append(normal, -np.dot(normal, point)).astype(np.float64)
+
+
+def get_thin_lens_collineation(
+    center: np.ndarray, basis: np.ndarray, power: float
+) -> np.ndarray:
+    """
+    Get the projective map of an ideal thin lens in homogeneous world coordinates (4x4).
+
+    The map sends every point to its image through the lens, and so every incoming ray
+    to its refracted ray, while the lens plane itself stays fixed.
+
+    Args:
+        center: Center of the lens
+        basis: Rows of the lens frame, the last one along the direction of the rays
+        power: Optical power (1/f) of the lens along that direction
+
+    Returns:
+        Collineation matrix (4x4)
+    """
+    frame = np.eye(4)
+    frame[:3, :3] = basis
+    frame[:3, 3] = -basis @ center
+    lens = np.eye(4)
+    lens[3, 2] = power
+    return np.linalg.inv(frame) @ lens @ frame
+
+
+def get_pencil_hit_matrix(point: np.ndarray, plane: np.ndarray) -> np.ndarray:
+    """
+    Get the linear map from the direction of a ray through a fixed homogeneous point
+    to the homogeneous point where it crosses a plane (4x3).
+    """
+    return np.outer(point, plane[:3]) - np.dot(plane, point) * np.eye(4)[:, :3]
+
+
+class ProjectiveWarp:
+    """
+    Closed-form maps from the directions of pinhole rays to their hits on every surface.
+
+    For rays sharing one origin, the hit point on a plane is a projective function of
+    the ray direction, and an ideal thin lens is a collineation of space, so the hits
+    behind any number of lenses stay projective. Each map is a small matrix applied to
+    the ray directions, followed by a division by its last row:
+
+    - lens maps give the hit offsets from the lens center in the frame of the train
+    - object maps give the (u, v) hit coordinates and the distance past the last lens
+      (the ray parameter t for straight rays)
+    - point maps give the homogeneous world hit points, for the 3D export
+
+    A warp built without refraction follows the straight rays that pass beside every
+    lens, and its lens maps tell which rays those are.
+    """
+
+    def __init__(
+        self,
+        origin: np.ndarray,
+        refract: bool,
+        lens_matrices: np.ndarray,
+        object_matrices: np.ndarray,
+        object_distance_offsets: np.ndarray,
+        lens_point_matrices: np.ndarray,
+        object_point_matrices: np.ndarray,
+    ):
+        self.origin = origin
+        self.refract = refract
+        self.lens_matrices = lens_matrices
+        self.object_matrices = object_matrices
+        self.object_distance_offsets = object_distance_offsets
+        self.lens_point_matrices = lens_point_matrices
+        self.object_point_matrices = object_point_matrices
+
+    @staticmethod
+    def build(
+        train: OpticalTrain, origin: np.ndarray, refract: bool = True
+    ) -> "ProjectiveWarp":
+        """
+        Compose the maps of the lenses and objects of an optical train.
+
+        Args:
+            train: Optical train, with the rays passing every lens in order
+            origin: Common origin of the rays
+            refract: If False, the rays go straight past the lenses
+
+        Returns:
+            New ProjectiveWarp instance
+        """
+        pencil_point = np.append(origin, 1).astype(np.float64)
+        basis = train.basis.astype(np.float64)
+        collineation = np.eye(4)
+        lens_matrices, lens_point_matrices = [], []
+        for lens in train.local_lenses:
+            center = basis.T @ lens.center
+            # Hit the lens plane pulled back through the lenses before it, then map forward
+            plane = get_plane_vector(center, basis[2]) @ collineation
+            point_matrix = collineation @ get_pencil_hit_matrix(pencil_point, plane)
+            lens_point_matrices.append(point_matrix)
+            offset_rows = np.column_stack([basis[:2], -(basis[:2] @ center)])
+            lens_matrices.append(
+                np.vstack([offset_rows @ point_matrix, point_matrix[3]])
+            )
+
+            if refract:
+                power = np.sign(lens.normal[2]) / lens.focal_distance
+                collineation = (
+                    get_thin_lens_collineation(center, basis, power) @ collineation
+                )
+
+        scene = train.object_scene
+        object_matrices, object_point_matrices, object_distance_offsets = [], [], []
+        for index in range(len(scene)):
+            point = scene.points[index].astype(np.float64)
+            plane = get_plane_vector(point, scene.normals[index]) @ collineation
+            point_matrix = collineation @ get_pencil_hit_matrix(pencil_point, plane)
+            object_point_matrices.append(point_matrix)
+
+            frame_rows = np.array([scene.u_vectors[index], scene.v_vectors[index]])
+            coordinate_rows = np.column_stack([frame_rows, -(frame_rows @ point)])
+            if refract and train.local_lenses:
+                exit_position = train.positions[-1]
+                distance_row = np.append(basis[2], -exit_position) @ point_matrix
+                distance_offset = 0.0
+            else:
+                # For straight rays t = -(plane . origin) / (plane . direction)
+                distance_row = np.zeros(3)
+                distance_offset = -np.dot(plane, pencil_point)
+            object_matrices.append(
+                np.vstack(
+                    [coordinate_rows @ point_matrix, distance_row, point_matrix[3]]
+                )
+            )
+            object_distance_offsets.append(distance_offset)
+
+        return ProjectiveWarp(
+            origin=np.asarray(origin, dtype=np.float64),
+            refract=refract,
+            lens_matrices=np.array(lens_matrices, dtype=np.float32).reshape(-1, 3, 3),
+            object_matrices=np.array(object_matrices, dtype=np.float32).reshape(
+                -1, 4, 3
+            ),
+            object_distance_offsets=np.array(object_distance_offsets, dtype=np.float32),
+            lens_point_matrices=np.array(lens_point_matrices).reshape(-1, 4, 3),
+            object_point_matrices=np.array(object_point_matrices).reshape(-1, 4, 3),
+        )
+
+    def get_aperture_mask(
+        self, index: int, directions: np.ndarray, radius: float
+    ) -> np.ndarray:
+        """
+        Get the mask of the rays hitting a lens within the given radius of its center.
+        """
+        mapped = directions @ self.lens_matrices[index].T
+        x, y, w = mapped.T
+        # Compared before the division by w, which may be zero for rays along the plane
+        w *= radius
+        x *= x
+        y *= y
+        x += y
+        return x <= w * w
+
+    def get_object_coordinates(self, index: int, directions: np.ndarray):
+        """
+        Get the hit coordinates of an object.
+
+        Returns:
+            Tuple of the (u, v) coordinates (Nx2) and the distances past the last lens,
+            or the ray parameters t without lenses (N,)
+        """
+        mapped = directions @ self.object_matrices[index].T
+        mapped[:, 2] += self.object_distance_offsets[index]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mapped[:, :3] /= mapped[:, 3:]
+        return mapped[:, :2], mapped[:, 2]
+
+    @staticmethod
+    def get_points(point_matrix: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        """
+        Map ray directions (Nx3) to world hit points (Nx3) with a point matrix.
+        """
+        points = directions @ point_matrix.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return points[:, :3] / points[:, 3:]
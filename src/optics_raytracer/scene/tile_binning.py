@@ -0,0 +1,273 @@
+import numpy as np
+
+from optics_raytracer.camera.camera import Camera, SimpleCamera
+from optics_raytracer.core.grouping import group_by_index
+from optics_raytracer.core.ray_batch import RayBatch
+from optics_raytracer.core.workspace import Workspace, get_buffer
+from optics_raytracer.scene.bvh import BVH_SURFACE_THRESHOLD, BoundingVolumeHierarchy
+from optics_raytracer.scene.packed_scene import SURFACE_KIND_CIRCLE, PackedScene
+
+DEFAULT_TILE_SIZE = 16
+
+# Pixels added around every projected surface, covering the float32 rounding of the rays
+PROJECTION_MARGIN = 1.0
+
+# Relative padding of the tile cones, covering the float32 rounding of the rays
+CONE_MARGIN = 1e-5
+
+
+class TileBinning:
+    """
+    Candidate surfaces of the primary camera rays, binned by screen-space tile.
+
+    The image is cut into square tiles of pixels and every tile keeps the surfaces
+    that one of its rays may hit. For a SimpleCamera the surface bounds are projected
+    through the camera center onto the viewport, which is exact up to the tile
+    granularity. Other cameras bound the rays of each tile by a cone around their mean
+    direction, widened by the spread of their origins over the camera lens aperture.
+
+    Tiles with the same candidates share one reduced scene, so the nearest-hit pass
+    of the primary rays runs once per distinct candidate set and only against those
+    surfaces. Rays leaving the lenses are not binned.
+    """
+
+    def __init__(
+        self,
+        scene: PackedScene,
+        tile_size: int,
+        ray_tiles: np.ndarray,
+        tile_candidates: np.ndarray,
+        bvh_surface_threshold: int = BVH_SURFACE_THRESHOLD,
+    ):
+        self.scene = scene
+        self.tile_size = tile_size
+        self.ray_tiles = ray_tiles
+        self.tile_candidates = tile_candidates
+
+        candidate_sets, tile_sets = np.unique(
+            tile_candidates, axis=0, return_inverse=True
+        )
+        self.tile_sets = tile_sets.reshape(-1)
+        self.set_surfaces = [np.flatnonzero(candidates) for candidates in candidate_sets]
+        self.set_accelerators = []
+        for surfaces in self.set_surfaces:
+            set_scene = scene.subset(surfaces)
+            self.set_accelerators.append(
+                BoundingVolumeHierarchy.build(set_scene)
+                if len(set_scene) >= bvh_surface_threshold
+                else set_scene
+            )
+
+    @property
+    def ray_count(self) -> int:
+        return len(self.ray_tiles)
+
+    @property
+    def candidate_fraction(self) -> float:
+        """
+        Fraction of the primary ray-surface pairs that are still tested.
+        """
+        tile_ray_counts = np.bincount(self.ray_tiles, minlength=len(self.tile_candidates))
+        tested_pairs = np.dot(tile_ray_counts, self.tile_candidates.sum(axis=1))
+        return float(tested_pairs / max(self.ray_count * len(self.scene), 1))
+
+    @staticmethod
+    def build(
+        camera: Camera,
+        scene: PackedScene,
+        rays,
+        tile_size: int = DEFAULT_TILE_SIZE,
+        bvh_surface_threshold: int = BVH_SURFACE_THRESHOLD,
+    ) -> "TileBinning":
+        """
+        Bin the surfaces of a scene for the primary rays of a camera.
+
+        Args:
+            camera: Camera the rays come from
+            scene: Packed scene to bin
+            rays: Primary rays of the camera, in pixel order (ray_dtype or RayBatch)
+            tile_size: Width and height of the tiles in pixels
+            bvh_surface_threshold: Candidate count from which a tile set gets a BVH
+
+        Returns:
+            New TileBinning instance, or None if the scene is empty or the rays
+            don't come in whole pixels
+        """
+        image_size = camera.get_image_size()
+        columns, rows = int(image_size.width), int(image_size.height)
+        pixel_count = columns * rows
+        if len(scene) == 0 or pixel_count == 0 or len(rays) % pixel_count:
+            return None
+
+        tile_columns = -(-columns // tile_size)
+        tile_rows = -(-rows // tile_size)
+        pixels = np.arange(pixel_count)
+        pixel_tiles = (pixels // columns // tile_size) * tile_columns + (
+            pixels % columns
+        ) // tile_size
+        rays_per_pixel = len(rays) // pixel_count
+
+        if isinstance(camera, SimpleCamera):
+            tile_candidates = TileBinning._get_projected_candidates(
+                camera, scene, tile_size, tile_columns, tile_rows
+            )
+        else:
+            tile_candidates = TileBinning._get_cone_candidates(
+                rays, rays_per_pixel, pixel_tiles, tile_columns * tile_rows, scene
+            )
+        ray_tiles = np.repeat(pixel_tiles, rays_per_pixel)
+        return TileBinning(
+            scene, tile_size, ray_tiles, tile_candidates, bvh_surface_threshold
+        )
+
+    @staticmethod
+    def _get_projected_candidates(camera, scene, tile_size, tile_columns, tile_rows):
+        viewport = camera.array
+        center = camera.camera_center.astype(np.float64)
+        normal = viewport["normal"].astype(np.float64)
+        u = viewport["u_vector"].astype(np.float64)
+        v = np.cross(normal, u)
+        focal_distance = np.dot(viewport["middle_point"] - center, normal)
+        columns, rows = int(viewport["pixel_columns"]), int(viewport["pixel_rows"])
+        # Same pixel steps as get_pixel_points, measured along the u and v vectors
+        column_step = viewport["width"] / (columns - 1) * np.dot(u, u)
+        row_step = viewport["height"] / (rows - 1) * np.dot(v, v)
+
+        # Rectangle corners, and the corners of the bounding square of circles
+        signs = np.array([[1, 1], [1, -1], [-1, 1], [-1, -1]], dtype=np.float64)
+        extents = scene.extents.astype(np.float64)
+        corners = (
+            scene.points[:, np.newaxis, :]
+            + (signs[:, 0] * extents[:, :1])[..., np.newaxis] * scene.u_vectors[:, np.newaxis]
+            + (signs[:, 1] * extents[:, 1:])[..., np.newaxis] * scene.v_vectors[:, np.newaxis]
+        ) - center
+        depths = corners @ normal
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scales = focal_distance / depths
+        pixel_columns = (corners @ u) * scales / column_step + (columns - 1) / 2
+        pixel_rows = (corners @ v) * scales / row_step + (rows - 1) / 2
+
+        tile_candidates = np.zeros((tile_rows, tile_columns, len(scene)), dtype=bool)
+        for surface in range(len(scene)):
+            if np.all(depths[surface] <= 0):
+                # Behind the camera, no primary ray goes there
+                continue
+            if np.any(depths[surface] <= 0):
+                # Crossing the camera plane, the projection is unbounded
+                tile_candidates[..., surface] = True
+                continue
+            first_column = max(np.floor(pixel_columns[surface].min() - PROJECTION_MARGIN), 0)
+            last_column = min(np.ceil(pixel_columns[surface].max() + PROJECTION_MARGIN), columns - 1)
+            first_row = max(np.floor(pixel_rows[surface].min() - PROJECTION_MARGIN), 0)
+            last_row = min(np.ceil(pixel_rows[surface].max() + PROJECTION_MARGIN), rows - 1)
+            if first_column > last_column or first_row > last_row:
+                continue
+            tile_candidates[
+                int(first_row) // tile_size : int(last_row) // tile_size + 1,
+                int(first_column) // tile_size : int(last_column) // tile_size + 1,
+                surface,
+            ] = True
+        return tile_candidates.reshape(tile_rows * tile_columns, len(scene))
+
+    @staticmethod
+    def _get_cone_candidates(rays, rays_per_pixel, pixel_tiles, tile_count, scene):
+        pixel_count = len(pixel_tiles)
+        origins = np.ascontiguousarray(rays["origin"]).reshape(
+            pixel_count, rays_per_pixel, 3
+        )
+        directions = np.ascontiguousarray(rays["direction"]).reshape(
+            pixel_count, rays_per_pixel, 3
+        )
+        order, offsets = group_by_index(pixel_tiles, tile_count)
+        starts = offsets[:-1]
+        tile_ray_counts = np.diff(offsets)[:, np.newaxis] * rays_per_pixel
+
+        # Every ray of a tile starts within apex_radii of the apex and stays within the
+        # cone angle of the axis, so it lies in the cone widened by that radius
+        apexes = np.add.reduceat(origins.sum(axis=1)[order], starts) / tile_ray_counts
+        axes = np.add.reduceat(directions.sum(axis=1)[order], starts)
+        axes /= np.maximum(np.linalg.norm(axes, axis=1, keepdims=True), 1e-30)
+        pixel_apex_offsets = origins - apexes[pixel_tiles, np.newaxis]
+        pixel_apex_radii = np.sqrt(
+            np.einsum("prj,prj->pr", pixel_apex_offsets, pixel_apex_offsets).max(axis=1)
+        )
+        pixel_cosines = np.einsum("prj,pj->pr", directions, axes[pixel_tiles]).min(axis=1)
+        apex_radii = np.maximum.reduceat(pixel_apex_radii[order], starts)
+        cosines = np.minimum.reduceat(pixel_cosines[order], starts)
+        cosines = np.clip(cosines - CONE_MARGIN, -1, 1)[:, np.newaxis]
+        sines = np.sqrt(1 - cosines**2)
+
+        # Bounding spheres of the surfaces, against the widened cones
+        extents = scene.extents.astype(np.float64)
+        surface_radii = np.where(
+            scene.kinds == SURFACE_KIND_CIRCLE, extents[:, 0], np.hypot(*extents.T)
+        )
+        radii = (surface_radii + apex_radii[:, np.newaxis]) * (1 + CONE_MARGIN)
+        radii += CONE_MARGIN
+        offsets_to_surfaces = scene.points[np.newaxis] - apexes[:, np.newaxis]
+        lengths = np.linalg.norm(offsets_to_surfaces, axis=2)
+        along = np.einsum("tkj,tj->tk", offsets_to_surfaces, axes)
+        across = np.sqrt(np.maximum(lengths**2 - along**2, 0))
+        # Inside the cone, or closer to its surface than the radius
+        return (lengths <= radii) | (
+            (along * cosines + across * sines > 0)
+            & (across * cosines - along * sines <= radii)
+        )
+
+    def nearest_hit(
+        self,
+        rays,
+        ray_indices: np.ndarray,
+        t_max: float = 100000,
+        workspace: Workspace = None,
+    ):
+        """
+        Find the nearest surface hit by each primary ray among its tile candidates.
+
+        Args:
+            rays: Primary rays to intersect (ray_dtype or RayBatch)
+            ray_indices: Index of every ray among the camera rays the binning was built for
+            t_max: Hits further than this are ignored
+            workspace: Optional arena for the results and the temporaries
+
+        Returns:
+            Tuple of the nearest surface index (-1 for misses), its t (inf for misses)
+            and the local (u, v) coordinates of the hit on that surface (Nx2)
+        """
+        ray_count = len(ray_indices)
+        surface_indices = get_buffer(
+            workspace, "binned_surface_indices", ray_count, np.int64
+        )
+        hit_ts = get_buffer(workspace, "binned_hit_ts", ray_count, self.scene.dtype)
+        hit_uvs = get_buffer(
+            workspace, "binned_hit_uvs", (ray_count, 2), self.scene.dtype
+        )
+        origins = rays["origin"]
+        directions = rays["direction"]
+
+        ray_sets = self.tile_sets[self.ray_tiles[ray_indices]]
+        order, offsets = group_by_index(ray_sets, len(self.set_surfaces))
+        for set_index in np.flatnonzero(np.diff(offsets)):
+            selection = order[offsets[set_index] : offsets[set_index + 1]]
+            surfaces = self.set_surfaces[set_index]
+            if len(surfaces) == 0:
+                surface_indices[selection] = -1
+                hit_ts[selection] = np.inf
+                hit_uvs[selection] = 0
+                continue
+
+            set_surface_indices, set_hit_ts, set_hit_uvs = self.set_accelerators[
+                set_index
+            ].nearest_hit(
+                RayBatch(
+                    origins[selection], directions[selection], dtype=self.scene.dtype
+                ),
+                t_max,
+                workspace=workspace,
+            )
+            surface_indices[selection] = np.where(
+                set_surface_indices >= 0, surfaces[set_surface_indices], -1
+            )
+            hit_ts[selection] = set_hit_ts
+            hit_uvs[selection] = set_hit_uvs
+        return surface_indices, hit_ts, hit_uvs